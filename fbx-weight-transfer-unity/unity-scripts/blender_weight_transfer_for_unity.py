@@ -22,7 +22,19 @@ Unity Workflow:
 3. Import the processed FBX into Unity - all meshes will be properly rigged
 
 Usage:
-    blender --background --python blender_weight_transfer_for_unity.py -- input.fbx output.fbx
+    blender --background --python blender_weight_transfer_for_unity.py -- input.fbx output.fbx [--compact] [--import-cache] [--stages verify]
+
+    --compact strips data Unity never uses (empty vertex groups, extra UV maps,
+    color attributes, unused materials, custom normals that match the computed
+    ones) and exports the rest pose without evaluating the armature modifier.
+
+    --import-cache keeps each imported FBX as a .blend in
+    project-files/import-cache, keyed by the FBX content hash, and appends it
+    instead of parsing the FBX again on later runs.
+
+    --stages runs only the named stages and the stages they need
+    (import, discover, transfer, verify, export). "--stages verify" checks the
+    Unity readiness of an FBX without transferring or exporting anything.
 
 Requirements:
 - Blender 4.0.2+
@@ -35,10 +47,18 @@ License: MIT
 """
 
 import bpy
+import numpy as np
 import sys
 import os
 import logging
+import logging.handlers
 import argparse
+import atexit
+import copy
+import hashlib
+import json
+import queue
+import time
 from datetime import datetime
 from pathlib import Path
 
@@ -54,12 +74,79 @@ UNITY_FBX_SETTINGS = {
     'mesh_smooth_type': 'FACE'
 }
 
+# Pipeline stages in run order, with the stages each one needs
+UNITY_STAGES = {
+    'import': (),
+    'discover': ('import',),
+    'transfer': ('discover',),
+    'verify': ('import',),
+    'export': ('transfer',),
+}
+
+# Queue listener of the current setup_detailed_logging() call
+_log_listener = None
+
+# This script is distributed and run on its own (blender --python <file>), so
+# it keeps its own copy of organized/scripts/pipeline_logging.py's handlers
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that resolves messages here and leaves layout and I/O to the listener"""
+    def prepare(self, record):
+        # Arguments may be mutable or bpy data that changes before the listener runs
+        record = copy.copy(record)
+        record.msg = event_json(record) if hasattr(record, 'event') else record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def event_json(record) -> str:
+    """JSON line of an event record"""
+    payload = {
+        'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+        'event': record.event,
+    }
+    payload.update(record.fields)
+    return json.dumps(payload, default=str, ensure_ascii=False)
+
+class JsonEventFormatter(logging.Formatter):
+    """One JSON object per event record (already encoded by DeferredQueueHandler)"""
+    def format(self, record) -> str:
+        return record.getMessage()
+
+def log_event(logger, event: str, **fields):
+    """Emit a structured event to the JSON event log only"""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(event, extra={'event': event, 'fields': fields})
+
+def stop_detailed_logging():
+    """Flush and close the handlers set up by setup_detailed_logging"""
+    global _log_listener
+    if _log_listener is None:
+        return
+    _log_listener.stop()
+    for handler in _log_listener.handlers:
+        handler.close()
+    _log_listener = None
+    logging.getLogger('UnityWeightTransfer').handlers = []
+
+atexit.register(stop_detailed_logging)
+
 def setup_detailed_logging(log_dir: str) -> logging.Logger:
-    """Setup comprehensive logging system for debugging Unity import issues"""
+    """Setup comprehensive logging system for debugging Unity import issues
+    
+    Records go through a queue and are formatted and written on a listener
+    thread. Calling this again replaces the previous handlers, so long-lived
+    processes do not pile them up.
+    """
+    global _log_listener
     os.makedirs(log_dir, exist_ok=True)
+    stop_detailed_logging()
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     log_file = os.path.join(log_dir, f"unity_weight_transfer_{timestamp}.log")
+    events_file = os.path.join(log_dir, f"unity_weight_transfer_{timestamp}.events.jsonl")
     
     # Create formatters
     detailed_formatter = logging.Formatter(
@@ -67,24 +154,44 @@ def setup_detailed_logging(log_dir: str) -> logging.Logger:
     )
     simple_formatter = logging.Formatter('%(levelname)s: %(message)s')
     
+    def is_event(record):
+        return hasattr(record, 'event')
+    
+    def is_message(record):
+        return not hasattr(record, 'event')
+    
     # File handler with detailed logs
-    file_handler = logging.FileHandler(log_file)
+    file_handler = logging.FileHandler(log_file, encoding='utf-8')
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(detailed_formatter)
+    file_handler.addFilter(is_message)
     
     # Console handler with simple format
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(simple_formatter)
+    console_handler.addFilter(is_message)
+    
+    # JSON lines event log for orchestrators
+    events_handler = logging.FileHandler(events_file, encoding='utf-8')
+    events_handler.setFormatter(JsonEventFormatter())
+    events_handler.addFilter(is_event)
+    
+    # Setup logger: one queue handler, formatting happens on the listener thread
+    records = queue.SimpleQueue()
+    _log_listener = logging.handlers.QueueListener(
+        records, file_handler, console_handler, events_handler, respect_handler_level=True
+    )
+    _log_listener.start()
     
-    # Setup logger
     logger = logging.getLogger('UnityWeightTransfer')
     logger.setLevel(logging.DEBUG)
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    logger.handlers = [DeferredQueueHandler(records)]
+    logger.propagate = False
     
-    logger.info(f"Unity Weight Transfer Tool v1.0.0")
-    logger.info(f"Detailed log: {log_file}")
+    logger.info("Unity Weight Transfer Tool v1.0.0")
+    logger.info("Detailed log: %s", log_file)
+    logger.info("Event log: %s", events_file)
     
     return logger
 
@@ -95,13 +202,66 @@ def clear_blender_scene(logger):
     bpy.ops.object.delete(use_global=False)
     logger.info("✓ Scene cleared")
 
-def import_fbx_for_unity_processing(filepath: str, logger) -> bool:
+def import_fbx_cached(filepath: str, cache_dir: str, logger) -> bool:
+    """Append a cached import of filepath, or import it and cache the new objects"""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    # Content, Blender version and cache format: any change misses the cache
+    key = hashlib.sha256(f"1:{bpy.app.version_string}:{digest.hexdigest()}".encode()).hexdigest()[:32]
+    stem = Path(filepath).stem
+    blend_path = os.path.join(cache_dir, f"{stem}_{key}.blend")
+    
+    if os.path.exists(blend_path):
+        data_kinds = ('objects', 'meshes', 'armatures', 'materials', 'images', 'textures',
+                      'node_groups', 'actions', 'shape_keys', 'collections')
+        data_before = {block for kind in data_kinds for block in getattr(bpy.data, kind, ())}
+        try:
+            with bpy.data.libraries.load(blend_path, link=False) as (data_from, data_to):
+                data_to.objects = data_from.objects
+            for obj in data_to.objects:
+                if obj is not None:
+                    bpy.context.scene.collection.objects.link(obj)
+            logger.info(f"✓ Import cache hit: {os.path.basename(blend_path)}")
+            return True
+        except Exception as e:
+            # Remove a partial append, or the FBX import below would duplicate the body
+            added = [block for kind in data_kinds for block in getattr(bpy.data, kind, ())
+                     if block not in data_before]
+            if added:
+                bpy.data.batch_remove(added)
+            logger.warning(f"Import cache entry unreadable, importing FBX: {e}")
+            os.remove(blend_path)
+    
+    before = set(bpy.data.objects)
+    if not import_fbx_for_unity_processing(filepath, logger):
+        return False
+    
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Earlier versions of the same file are stale now
+        for name in os.listdir(cache_dir):
+            if name.startswith(f"{stem}_") and name.endswith(".blend") and len(name) == len(stem) + 39:
+                os.remove(os.path.join(cache_dir, name))
+        objects = {obj for obj in bpy.data.objects if obj not in before}
+        bpy.data.libraries.write(blend_path + ".tmp", objects, compress=False)
+        os.replace(blend_path + ".tmp", blend_path)
+        logger.info(f"  Import cached: {os.path.basename(blend_path)}")
+    except Exception as e:
+        logger.warning(f"Could not write import cache: {e}")
+    return True
+
+def import_fbx_for_unity_processing(filepath: str, logger, cache_dir: str = None) -> bool:
     """Import FBX with settings optimized for weight transfer processing"""
     logger.info(f"Importing FBX for Unity processing: {os.path.basename(filepath)}")
     
     if not os.path.exists(filepath):
         logger.error(f"✗ FBX file not found: {filepath}")
         return False
+    
+    if cache_dir:
+        return import_fbx_cached(filepath, cache_dir, logger)
         
     try:
         # Import with specific settings for weight processing
@@ -141,7 +301,7 @@ def find_body_mesh_for_unity(logger):
         vertex_count = len(obj.data.vertices)
         
         # Log mesh info for Unity debugging
-        logger.debug(f"Mesh '{obj.name}': {vgroup_count} vertex groups, {vertex_count} vertices")
+        logger.debug("Mesh '%s': %d vertex groups, %d vertices", obj.name, vgroup_count, vertex_count)
         
         if vgroup_count > 0:
             mesh_candidates.append((obj, vgroup_count, vertex_count))
@@ -179,10 +339,10 @@ def find_clothing_meshes_for_unity(body_mesh, logger):
         
         if vgroup_count == 0:
             clothing_meshes.append(obj)
-            logger.debug(f"Clothing mesh: '{obj.name}' - needs rigging")
+            logger.debug("Clothing mesh: '%s' - needs rigging", obj.name)
         else:
             rigged_meshes.append(obj)
-            logger.debug(f"Already rigged: '{obj.name}' - {vgroup_count} groups")
+            logger.debug("Already rigged: '%s' - %d groups", obj.name, vgroup_count)
     
     logger.info(f"✓ Found {len(clothing_meshes)} clothing meshes needing Unity weights")
     
@@ -225,7 +385,10 @@ def transfer_weights_for_unity_skinning(body_mesh, clothing_meshes, armature, lo
     
     # Process each clothing mesh
     for i, clothing_mesh in enumerate(clothing_meshes, 1):
-        logger.info(f"Processing clothing mesh {i}/{len(clothing_meshes)}: {clothing_mesh.name}")
+        logger.info("Processing clothing mesh %d/%d: %s", i, len(clothing_meshes), clothing_mesh.name)
+        started = time.perf_counter()
+        final_vgroup_count = 0
+        error = None
         
         try:
             # Clear any existing vertex groups for clean transfer
@@ -238,7 +401,7 @@ def transfer_weights_for_unity_skinning(body_mesh, clothing_meshes, armature, lo
             clothing_mesh.select_set(True)
             
             # Transfer vertex weights using surface sampling
-            logger.debug(f"  Transferring weights using surface interpolation...")
+            logger.debug("  Transferring weights using surface interpolation...")
             bpy.ops.object.data_transfer(
                 data_type='VGROUP_WEIGHTS',
                 use_create=True,
@@ -249,7 +412,7 @@ def transfer_weights_for_unity_skinning(body_mesh, clothing_meshes, armature, lo
             )
             
             # Setup Unity skinning relationship
-            logger.debug(f"  Setting up Unity armature relationship...")
+            logger.debug("  Setting up Unity armature relationship...")
             bpy.ops.object.select_all(action='DESELECT')
             clothing_mesh.select_set(True)
             armature.select_set(True)
@@ -264,21 +427,27 @@ def transfer_weights_for_unity_skinning(body_mesh, clothing_meshes, armature, lo
                 armature_mod = clothing_mesh.modifiers.new(name="Armature", type='ARMATURE')
                 armature_mod.object = armature
                 armature_mod.use_vertex_groups = True
-                logger.debug(f"  Added armature modifier for Unity")
+                logger.debug("  Added armature modifier for Unity")
             
             # Verify Unity readiness
             final_vgroup_count = len(clothing_mesh.vertex_groups)
             
             if final_vgroup_count > 0:
-                logger.info(f"  ✓ SUCCESS: {final_vgroup_count} vertex groups transferred")
+                logger.info("  ✓ SUCCESS: %d vertex groups transferred", final_vgroup_count)
                 successful_transfers += 1
             else:
-                logger.warning(f"  ⚠ WARNING: No weights transferred to {clothing_mesh.name}")
+                logger.warning("  ⚠ WARNING: No weights transferred to %s", clothing_mesh.name)
                 failed_transfers.append(clothing_mesh.name)
                 
         except Exception as e:
-            logger.error(f"  ✗ FAILED: Error transferring to {clothing_mesh.name}: {e}")
+            logger.error("  ✗ FAILED: Error transferring to %s: %s", clothing_mesh.name, e)
             failed_transfers.append(clothing_mesh.name)
+            error = str(e)
+        
+        log_event(logger, 'garment', name=clothing_mesh.name, source=body_mesh.name,
+                  vertices=len(clothing_mesh.data.vertices), vertex_groups=final_vgroup_count,
+                  seconds=round(time.perf_counter() - started, 3),
+                  success=final_vgroup_count > 0 and error is None, error=error)
     
     # Summary for Unity developers
     logger.info("=== UNITY WEIGHT TRANSFER SUMMARY ===")
@@ -338,7 +507,104 @@ def verify_unity_readiness(logger):
     
     return unity_ready_count, total_meshes, unity_issues
 
-def export_fbx_for_unity(output_path: str, logger) -> bool:
+def read_loop_normals_for_unity(mesh):
+    """Split (per-loop) normals as a (L, 3) array"""
+    if hasattr(mesh, 'calc_normals_split'):
+        mesh.calc_normals_split()
+    normals = np.empty(len(mesh.loops) * 3, dtype=np.float32)
+    mesh.loops.foreach_get('normal', normals)
+    return normals.reshape(-1, 3)
+
+def used_vertex_groups(obj) -> set:
+    """Indices of vertex groups with a non-zero weight on any vertex"""
+    # Vertex groups have no foreach_get accessor; flatten the memberships once
+    elements = [element for vertex in obj.data.vertices for element in vertex.groups]
+    groups = np.fromiter((element.group for element in elements), dtype=np.int64, count=len(elements))
+    weights = np.fromiter((element.weight for element in elements), dtype=np.float32, count=len(elements))
+    return set(np.unique(groups[weights > 0.0]).tolist())
+
+def clear_unused_custom_normals(obj) -> bool:
+    """Clear custom split normals that match the computed ones; True if cleared"""
+    mesh = obj.data
+    if not mesh.has_custom_normals or not len(mesh.loops):
+        return False
+    custom = read_loop_normals_for_unity(mesh)
+    with bpy.context.temp_override(object=obj, active_object=obj):
+        bpy.ops.mesh.customdata_custom_splitnormals_clear()
+    computed = read_loop_normals_for_unity(mesh)
+    if (1.0 - np.einsum('ij,ij->i', custom, computed)).max() <= 1e-4:
+        return True
+    # They do change the shading: put them back
+    if hasattr(mesh, 'use_auto_smooth'):
+        mesh.use_auto_smooth = True
+    mesh.normals_split_custom_set(custom.tolist())
+    return False
+
+def compact_scene_for_unity(logger) -> bool:
+    """Strip data Unity never uses; returns whether modifiers still need evaluating on export"""
+    logger.info("=== COMPACTING FOR UNITY ===")
+    removed_groups = removed_layers = removed_slots = cleared_normals = 0
+    compacted = set()
+    
+    for obj in bpy.data.objects:
+        if obj.type != 'MESH':
+            continue
+        mesh = obj.data
+        
+        # Vertex groups without any influence on this mesh
+        used_groups = used_vertex_groups(obj)
+        for group in [g for g in obj.vertex_groups if g.index not in used_groups]:
+            obj.vertex_groups.remove(group)
+            removed_groups += 1
+        
+        if mesh.name in compacted:
+            continue
+        compacted.add(mesh.name)
+        
+        # Keep only the render UV map and drop color attributes
+        for layer in [l.name for i, l in enumerate(mesh.uv_layers) if i > 0 and not l.active_render]:
+            mesh.uv_layers.remove(mesh.uv_layers[layer])
+            removed_layers += 1
+        for layer in [l.name for l in mesh.color_attributes]:
+            mesh.color_attributes.remove(mesh.color_attributes[layer])
+            removed_layers += 1
+        
+        # Material slots no face uses
+        slots = len(mesh.materials)
+        if slots > 1:
+            material_index = [0] * len(mesh.polygons)
+            mesh.polygons.foreach_get('material_index', material_index)
+            used = sorted(set(min(index, slots - 1) for index in material_index))
+            if len(used) < slots:
+                slot_map = {old: new for new, old in enumerate(used)}
+                materials = [mesh.materials[index] for index in used]
+                mesh.materials.clear()
+                for material in materials:
+                    mesh.materials.append(material)
+                mesh.polygons.foreach_set('material_index', [slot_map[min(index, slots - 1)] for index in material_index])
+                removed_slots += slots - len(used)
+        
+        # Custom normals that equal the computed ones only add file size
+        if clear_unused_custom_normals(obj):
+            cleared_normals += 1
+    
+    orphans = [material for material in bpy.data.materials if material.users == 0]
+    for material in orphans:
+        bpy.data.materials.remove(material)
+    
+    logger.info(f"Removed {removed_groups} empty vertex groups, {removed_layers} UV/color layers, "
+                f"{removed_slots} material slots, {cleared_normals} unused custom normal layers, "
+                f"{len(orphans)} materials")
+    
+    # Other modifiers must still be evaluated to be exported at all
+    evaluate_modifiers = any(mod.type != 'ARMATURE'
+                             for obj in bpy.data.objects if obj.type == 'MESH'
+                             for mod in obj.modifiers)
+    if evaluate_modifiers:
+        logger.info("Non-armature modifiers present - modifiers are still evaluated on export")
+    return evaluate_modifiers
+
+def export_fbx_for_unity(output_path: str, logger, use_mesh_modifiers: bool = True) -> bool:
     """Export FBX with Unity-specific optimized settings"""
     logger.info(f"=== EXPORTING FOR UNITY ===")
     logger.info(f"Output file: {os.path.basename(output_path)}")
@@ -363,8 +629,8 @@ def export_fbx_for_unity(output_path: str, logger) -> bool:
             object_types={'ARMATURE', 'MESH'},  # Only export what Unity needs
             
             # Mesh settings for Unity
-            use_mesh_modifiers=True,
-            use_mesh_modifiers_render=True,
+            use_mesh_modifiers=use_mesh_modifiers,
+            use_mesh_modifiers_render=use_mesh_modifiers,
             mesh_smooth_type=UNITY_FBX_SETTINGS['mesh_smooth_type'],
             use_subsurf=False,
             use_mesh_edges=False,
@@ -406,22 +672,48 @@ def export_fbx_for_unity(output_path: str, logger) -> bool:
         logger.error(f"✗ Unity FBX export failed: {e}")
         return False
 
+def resolve_unity_stages(targets) -> list:
+    """Requested stages plus the stages they need, in pipeline order"""
+    unknown = [stage for stage in targets if stage not in UNITY_STAGES]
+    if unknown:
+        raise ValueError(f"Unknown stage: {', '.join(unknown)} (stages: {', '.join(UNITY_STAGES)})")
+    
+    needed = set()
+    pending = list(targets)
+    while pending:
+        stage = pending.pop()
+        if stage not in needed:
+            needed.add(stage)
+            pending.extend(UNITY_STAGES[stage])
+    return [stage for stage in UNITY_STAGES if stage in needed]
+
 def main():
     """Main function for Unity weight transfer workflow"""
     # Parse arguments
     if "--" in sys.argv:
         custom_args = sys.argv[sys.argv.index("--") + 1:]
+        compact = "--compact" in custom_args
+        use_import_cache = "--import-cache" in custom_args
+        custom_args = [arg for arg in custom_args if arg not in ("--compact", "--import-cache")]
+        stages = list(UNITY_STAGES)
+        if "--stages" in custom_args:
+            index = custom_args.index("--stages")
+            stages = [name.strip() for name in custom_args[index + 1].split(',') if name.strip()]
+            del custom_args[index:index + 2]
         if len(custom_args) >= 2:
             input_fbx = custom_args[0]
             output_fbx = custom_args[1]
         else:
-            print("Usage: blender --background --python blender_weight_transfer_for_unity.py -- input.fbx output.fbx")
+            print("Usage: blender --background --python blender_weight_transfer_for_unity.py -- input.fbx output.fbx [--compact] [--import-cache] [--stages verify]")
             return 1
     else:
         # Default paths for development
         script_dir = Path(__file__).parent.parent
         input_fbx = str(script_dir / "project-files/input-fbx/character.fbx")
         output_fbx = str(script_dir / "project-files/output-fbx/character_unity_ready.fbx")
+        compact = False
+        use_import_cache = False
+        stages = list(UNITY_STAGES)
     
     # Setup logging
     log_dir = str(Path(__file__).parent.parent / "project-files/process-logs")
@@ -435,57 +727,94 @@ def main():
     os.makedirs(os.path.dirname(output_fbx), exist_ok=True)
     
     try:
-        # Step 1: Clean scene and import FBX
-        clear_blender_scene(logger)
-        
-        if not import_fbx_for_unity_processing(input_fbx, logger):
-            logger.error("Failed to import FBX - aborting Unity processing")
-            return 1
-        
-        # Step 2: Find body mesh for Unity
-        body_mesh = find_body_mesh_for_unity(logger)
-        if not body_mesh:
-            logger.error("No suitable body mesh found - Unity needs rigged body mesh")
-            return 1
+        state = {}
         
-        # Step 3: Find armature for Unity
-        armature = find_character_armature_for_unity(logger)
-        if not armature:
-            logger.error("No armature found - Unity needs bone structure")
-            return 1
+        def import_stage():
+            # Clean scene and import FBX
+            clear_blender_scene(logger)
+            cache_dir = str(Path(__file__).parent.parent / "project-files/import-cache") if use_import_cache else None
+            if not import_fbx_for_unity_processing(input_fbx, logger, cache_dir):
+                logger.error("Failed to import FBX - aborting Unity processing")
+                return False
+            return True
         
-        # Step 4: Find clothing meshes needing weights
-        clothing_meshes = find_clothing_meshes_for_unity(body_mesh, logger)
+        def discover_stage():
+            # Find body mesh, armature and clothing meshes needing weights
+            state['body_mesh'] = find_body_mesh_for_unity(logger)
+            if not state['body_mesh']:
+                logger.error("No suitable body mesh found - Unity needs rigged body mesh")
+                return False
+            
+            state['armature'] = find_character_armature_for_unity(logger)
+            if not state['armature']:
+                logger.error("No armature found - Unity needs bone structure")
+                return False
+            
+            state['clothing_meshes'] = find_clothing_meshes_for_unity(state['body_mesh'], logger)
+            return True
         
-        # Step 5: Transfer weights for Unity
-        if clothing_meshes:
+        def transfer_stage():
+            # Transfer weights for Unity
+            if not state['clothing_meshes']:
+                logger.info("All meshes already have weights - nothing to transfer")
+                return True
+            
             successful_transfers = transfer_weights_for_unity_skinning(
-                body_mesh, clothing_meshes, armature, logger
+                state['body_mesh'], state['clothing_meshes'], state['armature'], logger
             )
-            
             if successful_transfers == 0:
                 logger.error("All weight transfers failed - Unity model will not animate properly")
-                return 1
-        else:
-            logger.info("All meshes already have weights - proceeding to Unity export")
+                return False
+            return True
         
-        # Step 6: Verify Unity readiness
-        unity_ready_count, total_meshes, unity_issues = verify_unity_readiness(logger)
+        def verify_stage():
+            # Verify Unity readiness of the scene as it is at this point
+            state['unity_ready_count'], state['total_meshes'], state['unity_issues'] = verify_unity_readiness(logger)
+            return True
         
-        # Step 7: Export for Unity
-        if export_fbx_for_unity(output_fbx, logger):
-            logger.info("=== UNITY PROCESSING COMPLETED SUCCESSFULLY ===")
-            logger.info(f"Unity-ready meshes: {unity_ready_count}/{total_meshes}")
-            logger.info(f"Output file: {output_fbx}")
-            logger.info("Import this FBX into Unity - all meshes should animate with rig!")
+        def export_stage():
+            # Export for Unity (optionally compacted)
+            use_mesh_modifiers = True
+            previous_size = os.path.getsize(output_fbx) if os.path.exists(output_fbx) else None
+            if compact:
+                use_mesh_modifiers = compact_scene_for_unity(logger)
             
-            if unity_issues:
-                logger.warning(f"Note: {len(unity_issues)} meshes may have Unity import issues (see log)")
+            if not export_fbx_for_unity(output_fbx, logger, use_mesh_modifiers):
+                logger.error("Unity export failed - check log for details")
+                return False
             
-            return 0
-        else:
-            logger.error("Unity export failed - check log for details")
-            return 1
+            if compact and previous_size:
+                reduction = 1.0 - os.path.getsize(output_fbx) / previous_size
+                logger.info(f"  Compact export: {reduction:.1%} smaller than the previous output")
+                log_event(logger, 'compact_export', bytes=os.path.getsize(output_fbx),
+                          previous_bytes=previous_size, reduction=round(reduction, 4))
+            logger.info(f"Output file: {output_fbx}")
+            logger.info("Import this FBX into Unity - all meshes should animate with rig!")
+            return True
+        
+        stage_functions = {
+            'import': import_stage,
+            'discover': discover_stage,
+            'transfer': transfer_stage,
+            'verify': verify_stage,
+            'export': export_stage,
+        }
+        
+        planned = resolve_unity_stages(stages)
+        logger.info(f"Stages: {', '.join(planned)}")
+        for stage in planned:
+            log_event(logger, 'stage_start', stage=stage)
+            started = time.perf_counter()
+            if not stage_functions[stage]():
+                return 1
+            log_event(logger, 'stage_end', stage=stage, seconds=round(time.perf_counter() - started, 3))
+        
+        logger.info("=== UNITY PROCESSING COMPLETED SUCCESSFULLY ===")
+        if 'unity_ready_count' in state:
+            logger.info(f"Unity-ready meshes: {state['unity_ready_count']}/{state['total_meshes']}")
+            if state['unity_issues']:
+                logger.warning(f"Note: {len(state['unity_issues'])} meshes may have Unity import issues (see log)")
+        return 0
             
     except Exception as e:
         logger.error(f"Unexpected error in Unity processing: {e}")
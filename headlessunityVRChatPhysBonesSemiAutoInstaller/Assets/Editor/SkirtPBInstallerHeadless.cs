@@ -20,6 +20,7 @@ public class SkirtPBInstallerHeadless
             string boneRegex = ".*\\.001"; 
             float angle = 45f;
             float innerAngle = 10f;
+            string manifestPath = null;
             
             // Parse command line arguments
             for (int i = 0; i < args.Length; i++)
@@ -47,6 +48,13 @@ public class SkirtPBInstallerHeadless
                             Debug.Log($"Angle set to: {angle}");
                         }
                         break;
+                    case "-manifest":
+                        if (i + 1 < args.Length)
+                        {
+                            manifestPath = args[++i];
+                            Debug.Log($"PhysBone manifest set to: {manifestPath}");
+                        }
+                        break;
                     case "-innerAngle":
                         if (i + 1 < args.Length && float.TryParse(args[++i], out float innerAngleVal))
                         {
@@ -57,8 +65,16 @@ public class SkirtPBInstallerHeadless
                 }
             }
             
-            // Execute SkirtPB installation with confirmed path
-            InstallSkirtPBForConfirmedTarget(targetRootName, boneRegex, angle, innerAngle);
+            if (manifestPath != null)
+            {
+                // Chains were precomputed by the Blender pipeline - no hierarchy scan needed
+                InstallSkirtPBFromManifest(manifestPath);
+            }
+            else
+            {
+                // Execute SkirtPB installation with confirmed path
+                InstallSkirtPBForConfirmedTarget(targetRootName, boneRegex, angle, innerAngle);
+            }
             
             Debug.Log("=== SkirtPB Installer Headless Completed Successfully ===");
             ExitWithCode(0);
@@ -129,6 +145,84 @@ public class SkirtPBInstallerHeadless
         Debug.Log($"SkirtPB installation completed. Successfully processed: {successCount} targets");
     }
     
+    [System.Serializable]
+    private class PhysBoneChain
+    {
+        public string root;
+        public string bone;
+        public string path;
+        public string leaf;
+        public int segments;
+        public float length;
+        public float maxAngle;
+        public float innerAngle;
+        public float roll;
+    }
+    
+    [System.Serializable]
+    private class PhysBoneManifest
+    {
+        public int version;
+        public string armature;
+        public bool addLeafBones;
+        public PhysBoneChain[] chains;
+    }
+    
+    private static void InstallSkirtPBFromManifest(string manifestPath)
+    {
+        Debug.Log($"Installing SkirtPB from manifest: {manifestPath}");
+        
+        PhysBoneManifest manifest = JsonUtility.FromJson<PhysBoneManifest>(System.IO.File.ReadAllText(manifestPath));
+        if (manifest == null || manifest.chains == null || manifest.chains.Length == 0)
+        {
+            Debug.LogWarning("Manifest contains no PhysBone chains");
+            return;
+        }
+        
+        // Only the armature objects are looked up; chains are resolved by path
+        List<Transform> armatures = new List<Transform>();
+        foreach (GameObject obj in FindObjectsOfType<GameObject>())
+        {
+            if (obj.name == manifest.armature)
+            {
+                armatures.Add(obj.transform);
+            }
+        }
+        
+        if (armatures.Count == 0)
+        {
+            Debug.LogError($"No armature named '{manifest.armature}' found in scene.");
+            return;
+        }
+        
+        int successCount = 0;
+        foreach (Transform armature in armatures)
+        {
+            foreach (PhysBoneChain chain in manifest.chains)
+            {
+                Transform bone = armature.Find(chain.path);
+                if (bone == null)
+                {
+                    Debug.LogWarning($"Chain bone not found: {GetFullPath(armature)}/{chain.path}");
+                    continue;
+                }
+                
+                if (bone.GetComponent<VRCPhysBone>() == null)
+                {
+                    bone.gameObject.AddComponent<VRCPhysBone>();
+                    Debug.Log($"Added VRCPhysBone component to: {bone.name}");
+                    EditorUtility.SetDirty(bone.gameObject);
+                }
+                
+                ConfigurePhysBone(bone.gameObject, chain.maxAngle, chain.innerAngle, chain.roll);
+                successCount++;
+            }
+        }
+        
+        AssetDatabase.SaveAssets();
+        Debug.Log($"SkirtPB installation from manifest completed. Configured: {successCount} chains");
+    }
+    
     private static bool InstallSkirtPBForRoot(GameObject rootBone, string boneRegex, float angle, float innerAngle)
     {
         try
@@ -182,6 +276,14 @@ public class SkirtPBInstallerHeadless
     }
     
     private static void ConfigurePhysBone(GameObject bone, float angle, float innerAngle)
+    {
+        // Calculate roll angle (Y rotation) based on leaf position
+        Vector3 relativePosition = GetRelativePositionToLeaf(bone);
+        float roll = Mathf.Atan2(relativePosition.z, relativePosition.x) * Mathf.Rad2Deg + 90;
+        ConfigurePhysBone(bone, angle, innerAngle, roll);
+    }
+    
+    private static void ConfigurePhysBone(GameObject bone, float angle, float innerAngle, float roll)
     {
         VRCPhysBone physBone = bone.GetComponent<VRCPhysBone>();
         if (physBone == null)
@@ -201,10 +303,6 @@ public class SkirtPBInstallerHeadless
         // Set limit rotation X
         Vector3 limitRotation = physBone.limitRotation;
         limitRotation.x = angle - innerAngle;
-        
-        // Calculate roll angle (Y rotation) based on leaf position
-        Vector3 relativePosition = GetRelativePositionToLeaf(bone);
-        float roll = Mathf.Atan2(relativePosition.z, relativePosition.x) * Mathf.Rad2Deg + 90;
         limitRotation.y = roll;
         
         physBone.limitRotation = limitRotation;
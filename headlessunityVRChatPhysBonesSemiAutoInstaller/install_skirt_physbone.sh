@@ -10,6 +10,7 @@ SKIRT_ROOT=${2:-"HipRoot"}
 BONE_REGEX=${3:-".*\\.001"}
 ANGLE=${4:-"45"}
 INNER_ANGLE=${5:-"10"}
+MANIFEST=${6:-""}
 
 echo "=== SkirtPB PhysBone Installation ==="
 echo "Unity Path: $UNITY_PATH"
@@ -19,6 +20,9 @@ echo "Skirt Root: $SKIRT_ROOT"
 echo "Bone Regex: $BONE_REGEX"
 echo "Angle: $ANGLE°"
 echo "Inner Angle: $INNER_ANGLE°"
+if [ -n "$MANIFEST" ]; then
+    echo "Manifest: $MANIFEST"
+fi
 echo ""
 
 if [ ! -f "$UNITY_PATH" ]; then
@@ -39,6 +43,12 @@ mkdir -p "$OUTPUT_DIR"
 echo "Executing Unity SkirtPB Installation..."
 echo "Command: Installing PhysBones for '$SKIRT_ROOT'"
 
+# A PhysBone manifest from the Blender pipeline replaces the hierarchy scan
+MANIFEST_ARGS=()
+if [ -n "$MANIFEST" ]; then
+    MANIFEST_ARGS=(-manifest "$(realpath "$MANIFEST")")
+fi
+
 "$UNITY_PATH" \
     -batchmode \
     -nographics \
@@ -52,7 +62,8 @@ echo "Command: Installing PhysBones for '$SKIRT_ROOT'"
     -skirtRoot "$SKIRT_ROOT" \
     -boneRegex "$BONE_REGEX" \
     -angle "$ANGLE" \
-    -innerAngle "$INNER_ANGLE"
+    -innerAngle "$INNER_ANGLE" \
+    "${MANIFEST_ARGS[@]}"
 
 EXIT_CODE=$?
 echo "Exit Code: $EXIT_CODE"
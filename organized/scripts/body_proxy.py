@@ -0,0 +1,246 @@
+"""
+Decimated Body Proxies
+======================
+
+Builds decimated copies of the source body mesh so that small or low-detail
+garments can be weighted against a much lighter mesh. Decimation interpolates
+the deform weights, so each proxy carries the body's vertex groups.
+
+Each proxy is measured against the full body (surface deviation and weight
+deviation) and is only used when that error stays within the configured bound.
+
+Garments are routed to a proxy level by an explicit ``weight_transfer_lod``
+custom property (0 = full body) or, failing that, by their vertex count.
+proxy_report() gives the measured error of each kept level and the level
+each garment was routed to, for the transfer report.
+
+With a cache directory, each proxy mesh and its measured error are kept as
+<key>.blend and <key>.json. The key hashes the body's vertices, faces and
+weights with the ratio and Blender version, so an unchanged body reuses its
+proxies instead of decimating and measuring them again.
+"""
+
+import hashlib
+import json
+import os
+
+import bpy
+import numpy as np
+from mathutils import Vector
+from mathutils.bvhtree import BVHTree
+
+from weight_arrays import align_weights, read_coordinates, read_weights
+
+CACHE_VERSION = 1
+
+LOD_PROPERTY = 'weight_transfer_lod'
+ERROR_SAMPLE_LIMIT = 5000
+
+
+def body_hash(source_mesh) -> str:
+    """Content hash of the body's vertices, faces and weights"""
+    mesh = source_mesh.data
+    polygon_vertices = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.polygons.foreach_get('vertices', polygon_vertices)
+    weights, names = read_weights(source_mesh)
+
+    digest = hashlib.sha256()
+    for part in (read_coordinates(source_mesh), polygon_vertices, weights):
+        digest.update(np.ascontiguousarray(part).tobytes())
+    digest.update("\0".join(names).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def cache_paths(cache_dir: str, content_hash: str, ratio: float) -> tuple:
+    """(.blend path, metadata path) of a cached proxy level"""
+    salt = f"{CACHE_VERSION}:{bpy.app.version_string}:{content_hash}:{ratio!r}"
+    base = os.path.join(cache_dir, hashlib.sha256(salt.encode('utf-8')).hexdigest()[:32])
+    return base + ".blend", base + ".json"
+
+
+def new_proxy_object(source_mesh, mesh, level: int):
+    """Link a proxy object using mesh, with the source's transform and vertex groups"""
+    proxy = source_mesh.copy()
+    proxy.data = mesh
+    proxy.name = f"{source_mesh.name}_PROXY_LOD{level}"
+    proxy.modifiers.clear()
+    bpy.context.scene.collection.objects.link(proxy)
+    return proxy
+
+
+def load_cached_proxy(source_mesh, blend_path: str, meta_path: str, level: int):
+    """(proxy, error) from the cache, or (None, None) on a miss"""
+    if not (os.path.exists(blend_path) and os.path.exists(meta_path)):
+        return None, None
+    with open(meta_path, encoding='utf-8') as f:
+        error = json.load(f)['error']
+    with bpy.data.libraries.load(blend_path, link=False) as (data_from, data_to):
+        data_to.meshes = data_from.meshes[:1]
+    if not data_to.meshes or data_to.meshes[0] is None:
+        return None, None
+    return new_proxy_object(source_mesh, data_to.meshes[0], level), error
+
+
+def store_cached_proxy(proxy, error: dict, blend_path: str, meta_path: str):
+    """Write a proxy mesh and its error as a cache entry"""
+    os.makedirs(os.path.dirname(blend_path), exist_ok=True)
+    temp_path = blend_path[:-len(".blend")] + ".tmp.blend"
+    bpy.data.libraries.write(temp_path, {proxy.data}, compress=True)
+    os.replace(temp_path, blend_path)
+    with open(meta_path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump({'error': error, 'blender': bpy.app.version_string}, f, indent=2)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+def build_body_proxy(source_mesh, ratio: float, level: int, logger):
+    """Create a decimated, weighted copy of the source mesh"""
+    proxy = new_proxy_object(source_mesh, source_mesh.data.copy(), level)
+
+    # Decimate in rest pose; the armature modifier is not needed on the proxy
+    decimate = proxy.modifiers.new(name="ProxyDecimate", type='DECIMATE')
+    decimate.decimate_type = 'COLLAPSE'
+    decimate.ratio = ratio
+
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    evaluated = proxy.evaluated_get(depsgraph)
+    decimated_mesh = bpy.data.meshes.new_from_object(
+        evaluated, preserve_all_data_layers=True, depsgraph=depsgraph
+    )
+
+    original_mesh = proxy.data
+    proxy.modifiers.clear()
+    proxy.data = decimated_mesh
+    bpy.data.meshes.remove(original_mesh)
+
+    logger.info(f"  Proxy LOD{level}: {len(decimated_mesh.vertices)}/{len(source_mesh.data.vertices)} "
+                f"vertices (ratio {ratio})")
+    return proxy
+
+
+def measure_proxy_error(source_mesh, proxy) -> dict:
+    """Measure how far a proxy deviates from the body in shape and weights"""
+    body_coords = read_coordinates(source_mesh)
+    body_weights, body_names = read_weights(source_mesh)
+    proxy_weights, proxy_names = read_weights(proxy)
+    proxy_weights = align_weights(proxy_weights, proxy_names, body_names)
+
+    step = max(1, len(body_coords) // ERROR_SAMPLE_LIMIT)
+    samples = np.arange(0, len(body_coords), step)
+
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    tree = BVHTree.FromObject(proxy, depsgraph)
+    proxy_polygons = proxy.data.polygons
+
+    distances = np.zeros(len(samples), dtype=np.float32)
+    nearest_vertices = np.zeros(len(samples), dtype=np.int64)
+    proxy_coords = read_coordinates(proxy)
+    for i, vertex_index in enumerate(samples):
+        location, _normal, face_index, distance = tree.find_nearest(Vector(body_coords[vertex_index]))
+        if location is None:
+            distances[i] = np.inf
+            continue
+        distances[i] = distance
+        # Compare against the closest corner of the nearest proxy face
+        corners = np.array(proxy_polygons[face_index].vertices)
+        offsets = proxy_coords[corners] - np.array(location, dtype=np.float32)
+        nearest_vertices[i] = corners[np.argmin(np.einsum('ij,ij->i', offsets, offsets))]
+
+    weight_error = np.abs(body_weights[samples] - proxy_weights[nearest_vertices]).max(axis=1)
+
+    return {
+        'samples': len(samples),
+        'max_distance': float(distances.max()) if len(samples) else 0.0,
+        'mean_distance': float(distances.mean()) if len(samples) else 0.0,
+        'max_weight_error': float(weight_error.max()) if len(samples) else 0.0,
+        'mean_weight_error': float(weight_error.mean()) if len(samples) else 0.0,
+    }
+
+
+def build_body_proxies(source_mesh, ratios: list, max_error: float, max_weight_error: float,
+                       logger, cache_dir: str = None) -> dict:
+    """Build (or reuse cached) proxy levels, keeping only levels within both error bounds"""
+    logger.info("=== BUILDING BODY PROXIES ===")
+    proxies = {}
+    content_hash = body_hash(source_mesh) if cache_dir else None
+
+    for level, ratio in enumerate(ratios, 1):
+        proxy = error = None
+        if cache_dir:
+            blend_path, meta_path = cache_paths(cache_dir, content_hash, ratio)
+            try:
+                proxy, error = load_cached_proxy(source_mesh, blend_path, meta_path, level)
+            except Exception as e:
+                logger.warning(f"  Proxy cache entry unreadable, rebuilding LOD{level}: {e}")
+            if proxy is not None:
+                logger.info(f"  Proxy LOD{level}: {len(proxy.data.vertices)} vertices (cached)")
+
+        if proxy is None:
+            proxy = build_body_proxy(source_mesh, ratio, level, logger)
+            error = measure_proxy_error(source_mesh, proxy)
+            if cache_dir:
+                try:
+                    store_cached_proxy(proxy, error, blend_path, meta_path)
+                except Exception as e:
+                    logger.warning(f"  Could not write proxy cache: {e}")
+
+        logger.info(f"  LOD{level} error: max distance {error['max_distance']:.5f}, "
+                    f"mean distance {error['mean_distance']:.5f}, "
+                    f"max weight error {error['max_weight_error']:.4f} "
+                    f"({error['samples']} samples)")
+
+        if error['max_distance'] > max_error or error['max_weight_error'] > max_weight_error:
+            logger.warning(f"  ✗ LOD{level} exceeds max error {max_error} or max weight error "
+                           f"{max_weight_error} - garments will use the full body")
+            mesh = proxy.data
+            bpy.data.objects.remove(proxy, do_unlink=True)
+            bpy.data.meshes.remove(mesh)
+            continue
+
+        proxies[level] = {'object': proxy, 'ratio': ratio, 'error': error}
+
+    logger.info(f"Built {len(proxies)}/{len(ratios)} usable body proxies")
+    return proxies
+
+
+def route_garments(target_meshes, proxies: dict, vertex_thresholds: list, logger) -> dict:
+    """Pick a transfer source for each garment: {garment name: proxy object}"""
+    routes = {}
+
+    for target_mesh in target_meshes:
+        vertex_count = len(target_mesh.data.vertices)
+
+        if LOD_PROPERTY in target_mesh:
+            requested = int(target_mesh[LOD_PROPERTY])
+            level = max((lvl for lvl in proxies if lvl <= requested), default=0)
+        else:
+            # Coarsest level whose vertex budget the garment fits in
+            level = 0
+            for lvl, threshold in enumerate(vertex_thresholds, 1):
+                if lvl in proxies and vertex_count <= threshold:
+                    level = lvl
+
+        if level:
+            routes[target_mesh.name] = proxies[level]['object']
+            logger.info(f"  {target_mesh.name} ({vertex_count} vertices) -> LOD{level}")
+
+    logger.info(f"Routed {len(routes)}/{len(target_meshes)} garments to body proxies")
+    return routes
+
+
+def proxy_report(proxies: dict, routes: dict) -> dict:
+    """Measured error of each kept level and the level each routed garment used"""
+    levels = {id(proxy['object']): level for level, proxy in proxies.items()}
+    return {
+        'proxies': {level: {'ratio': proxy['ratio'], 'error': proxy['error']}
+                    for level, proxy in proxies.items()},
+        'routes': {name: levels[id(source)] for name, source in routes.items()},
+    }
+
+
+def remove_body_proxies(proxies: dict, logger):
+    """Delete proxy objects so they are not exported"""
+    for proxy in proxies.values():
+        mesh = proxy['object'].data
+        bpy.data.objects.remove(proxy['object'], do_unlink=True)
+        bpy.data.meshes.remove(mesh)
+    logger.info(f"Removed {len(proxies)} body proxies")
@@ -0,0 +1,156 @@
+"""
+Unused Bone Culling
+===================
+
+Sums the influence of every bone over all skinned meshes after transfer and
+finds bones that deform nothing. Each such bone still costs a transform update
+per frame in Unity, so they can optionally be deleted before export.
+
+Bones are never culled when they are protected:
+- IK bones (bones with an IK constraint) and bones used as constraint targets
+- PhysBone roots matching the configured patterns, and their whole chains
+- Bones matching the user allowlist
+- Ancestors of any bone that is kept
+"""
+
+import re
+
+import bpy
+import numpy as np
+
+from weight_arrays import read_weights
+
+
+def get_ik_bone_names(armature) -> list:
+    """Names of bones with an IK constraint (see blender-workspace ik_bone_manager)"""
+    ik_bone_names = []
+    for pose_bone in armature.pose.bones:
+        for constraint in pose_bone.constraints:
+            if constraint.type == 'IK':
+                ik_bone_names.append(pose_bone.name)
+                break
+    return ik_bone_names
+
+
+def get_constraint_target_names(armature) -> set:
+    """Names of bones this armature's constraints point at (IK targets, poles, ...)"""
+    targets = set()
+    for pose_bone in armature.pose.bones:
+        for constraint in pose_bone.constraints:
+            for target_attr, bone_attr in (('target', 'subtarget'), ('pole_target', 'pole_subtarget')):
+                if getattr(constraint, target_attr, None) == armature and getattr(constraint, bone_attr, ''):
+                    targets.add(getattr(constraint, bone_attr))
+    return targets
+
+
+def aggregate_bone_influence(armature, logger) -> dict:
+    """Total weight of every bone over all meshes deformed by the armature"""
+    influence = {bone.name: 0.0 for bone in armature.data.bones}
+
+    for obj in bpy.data.objects:
+        if obj.type != 'MESH':
+            continue
+        if not any(mod.type == 'ARMATURE' and mod.object == armature for mod in obj.modifiers):
+            continue
+
+        weights, names = read_weights(obj)
+        totals = weights.sum(axis=0, dtype=np.float64)
+        for name, total in zip(names, totals):
+            if name in influence:
+                influence[name] += float(total)
+
+    used = sum(1 for total in influence.values() if total > 0.0)
+    logger.info(f"Bone influence: {used}/{len(influence)} bones carry weight")
+    return influence
+
+
+def find_protected_bones(armature, physbone_roots: list, keep_patterns: list) -> set:
+    """Bones that must survive culling regardless of weight"""
+    protected = set(get_ik_bone_names(armature)) | get_constraint_target_names(armature)
+
+    root_patterns = [re.compile(pattern) for pattern in physbone_roots]
+    keep_patterns = [re.compile(pattern) for pattern in keep_patterns]
+
+    for bone in armature.data.bones:
+        if any(pattern.fullmatch(bone.name) for pattern in keep_patterns):
+            protected.add(bone.name)
+        if any(pattern.fullmatch(bone.name) for pattern in root_patterns):
+            protected.add(bone.name)
+            protected.update(child.name for child in bone.children_recursive)
+
+    return protected
+
+
+def find_unused_bones(armature, influence: dict, protected: set, min_influence: float) -> list:
+    """Bones with no deform contribution, no protected role and no kept descendants"""
+    keep = set()
+    for bone in armature.data.bones:
+        if influence.get(bone.name, 0.0) > min_influence or bone.name in protected:
+            keep.add(bone.name)
+            keep.update(parent.name for parent in bone.parent_recursive)
+
+    return [bone.name for bone in armature.data.bones if bone.name not in keep]
+
+
+def delete_bones(armature, bone_names: list, logger):
+    """Delete bones from the armature and their empty vertex groups from meshes"""
+    bone_names = set(bone_names)
+
+    bpy.ops.object.select_all(action='DESELECT')
+    bpy.context.view_layer.objects.active = armature
+    bpy.ops.object.mode_set(mode='EDIT')
+    edit_bones = armature.data.edit_bones
+    for bone_name in bone_names:
+        if bone_name in edit_bones:
+            edit_bones.remove(edit_bones[bone_name])
+    bpy.ops.object.mode_set(mode='OBJECT')
+
+    for obj in bpy.data.objects:
+        if obj.type != 'MESH':
+            continue
+        for vgroup in [vg for vg in obj.vertex_groups if vg.name in bone_names]:
+            obj.vertex_groups.remove(vgroup)
+
+    logger.info(f"Deleted {len(bone_names)} unused bones")
+
+
+def cull_unused_bones(armature, physbone_roots: list, keep_patterns: list,
+                      min_influence: float, delete: bool, logger) -> list:
+    """Find (and optionally delete) bones that deform nothing"""
+    logger.info("=== ANALYZING BONE USAGE ===")
+
+    influence = aggregate_bone_influence(armature, logger)
+    protected = find_protected_bones(armature, physbone_roots, keep_patterns)
+    unused = find_unused_bones(armature, influence, protected, min_influence)
+
+    logger.info(f"Protected bones: {len(protected)}")
+    logger.info(f"Unused bones: {len(unused)}/{len(armature.data.bones)}")
+    for bone_name in unused:
+        logger.info(f"  - {bone_name}")
+
+    if delete and unused:
+        delete_bones(armature, unused, logger)
+
+    return unused
+
+
+def prune_outside_root(armature, root_name: str, keep_ik: bool, logger) -> list:
+    """Delete bones outside the root's hierarchy (see blender-workspace delete_non_root_bones)"""
+    logger.info("=== PRUNING BONES OUTSIDE ROOT ===")
+    bones = armature.data.bones
+    if not root_name:
+        roots = [bone.name for bone in bones if bone.parent is None]
+        root_name = roots[0] if roots else None
+    if root_name not in bones:
+        logger.warning(f"Root bone not found: {root_name} - nothing pruned")
+        return []
+
+    keep = {root_name} | {bone.name for bone in bones[root_name].children_recursive}
+    if keep_ik:
+        keep.update(get_ik_bone_names(armature))
+    pruned = [bone.name for bone in bones if bone.name not in keep]
+
+    logger.info(f"Root: {root_name}, kept {len(keep)} bones, pruning {len(pruned)}")
+    if pruned:
+        delete_bones(armature, pruned, logger)
+    return pruned
@@ -0,0 +1,169 @@
+"""
+Bone Name Remapping
+===================
+
+Retargets weights between rig naming conventions (JamCommon, VRChat/CATS
+humanoid, MMD) so bodies and armatures from different sources line up before
+transfer, which matches vertex groups by name.
+
+A mapping is an exact-name table (from a humanoid preset) plus optional regex
+rules from a map file with one ``pattern=replacement`` per line. Names that
+map to the same target are merged.
+
+Every mesh's weights are read under their original group names first.
+Armature bones are then renamed (through temporary names, so swaps and
+chains of renames are safe); Blender renames the groups of bound meshes
+along with them, so those are not mapped a second time. Finally each weight
+matrix is remapped in one step: columns are permuted and merged columns
+summed with a single matrix product, and written back over all groups.
+"""
+
+import re
+
+import numpy as np
+
+from weight_arrays import read_weights, write_weights
+
+
+def sided(table: dict, sides: dict) -> dict:
+    """Expand {side} placeholders of a name table for both sides"""
+    expanded = {}
+    for source, target in table.items():
+        if '{side}' in source:
+            for source_side, target_side in sides.items():
+                expanded[source.format(side=source_side)] = target.format(side=target_side)
+        else:
+            expanded[source] = target
+    return expanded
+
+
+VRCHAT_TO_JAMCOMMON = sided({
+    'Hips': 'Hips',
+    'Spine': 'Spine',
+    'Chest': 'Chest',
+    'Upper Chest': 'UpperChest',
+    'Neck': 'Neck',
+    'Head': 'Head',
+    '{side} shoulder': 'Shoulder_{side}',
+    '{side} arm': 'UpperArm_{side}',
+    '{side} elbow': 'LowerArm_{side}',
+    '{side} wrist': 'Hand_{side}',
+    '{side} leg': 'UpperLeg_{side}',
+    '{side} knee': 'LowerLeg_{side}',
+    '{side} ankle': 'Foot_{side}',
+    '{side} toe': 'Toes_{side}',
+}, {'Left': 'L', 'Right': 'R'})
+
+MMD_TO_JAMCOMMON = sided({
+    '下半身': 'Hips',
+    '上半身': 'Spine',
+    '上半身2': 'Chest',
+    '首': 'Neck',
+    '頭': 'Head',
+    '{side}肩': 'Shoulder_{side}',
+    '{side}腕': 'UpperArm_{side}',
+    '{side}ひじ': 'LowerArm_{side}',
+    '{side}手首': 'Hand_{side}',
+    '{side}足': 'UpperLeg_{side}',
+    '{side}ひざ': 'LowerLeg_{side}',
+    '{side}足首': 'Foot_{side}',
+    '{side}つま先': 'Toes_{side}',
+}, {'左': 'L', '右': 'R'})
+
+PRESETS = {
+    'vrchat_to_jamcommon': VRCHAT_TO_JAMCOMMON,
+    'mmd_to_jamcommon': MMD_TO_JAMCOMMON,
+    'jamcommon_to_vrchat': {target: source for source, target in VRCHAT_TO_JAMCOMMON.items()},
+    'jamcommon_to_mmd': {target: source for source, target in MMD_TO_JAMCOMMON.items()},
+}
+
+
+def load_mapping(presets: list, map_file: str = None) -> tuple:
+    """Exact-name table from presets and (regex, replacement) rules from a map file"""
+    table = {}
+    for preset in presets:
+        table.update(PRESETS[preset])
+
+    rules = []
+    if map_file:
+        with open(map_file, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                pattern, replacement = line.split('=', 1)
+                rules.append((re.compile(pattern.strip()), replacement.strip()))
+
+    return table, rules
+
+
+def map_name(name: str, table: dict, rules: list) -> str:
+    """Target name of a bone/group; unmapped names stay unchanged"""
+    if name in table:
+        return table[name]
+    for pattern, replacement in rules:
+        match = pattern.fullmatch(name)
+        if match:
+            return match.expand(replacement)
+    return name
+
+
+def remap_weight_matrix(weights: np.ndarray, names: list, table: dict, rules: list) -> tuple:
+    """Permute and merge weight columns into target names: (weights, target names)"""
+    targets = [map_name(name, table, rules) for name in names]
+    target_names = list(dict.fromkeys(targets))
+    column = {name: index for index, name in enumerate(target_names)}
+
+    projection = np.zeros((len(names), len(target_names)), dtype=np.float32)
+    projection[np.arange(len(names)), [column[target] for target in targets]] = 1.0
+
+    return np.minimum(weights @ projection, 1.0), target_names
+
+
+def rename_bones(armature, table: dict, rules: list, logger) -> int:
+    """Rename armature bones; only the first bone per target name is renamed"""
+    bones = armature.data.bones
+    plan = {}
+    for bone in bones:
+        target = map_name(bone.name, table, rules)
+        if target != bone.name and target not in plan.values():
+            plan[bone.name] = target
+        elif target != bone.name:
+            logger.warning(f"  Bone {bone.name} merges into {target}; its weights move there")
+
+    # Blender renames matching vertex groups along with the bones
+    temporary = {}
+    for index, (name, _target) in enumerate(plan.items()):
+        bones[name].name = f"__remap_{index}"
+        temporary[f"__remap_{index}"] = name
+    for temp_name, name in temporary.items():
+        bones[temp_name].name = plan[name]
+
+    return len(plan)
+
+
+def remap_bone_names(armature, meshes, table: dict, rules: list, logger) -> dict:
+    """Rename armature bones and remap every mesh's vertex groups in bulk"""
+    logger.info("=== REMAPPING BONE NAMES ===")
+
+    # Read before the bone rename, which also renames the groups of bound meshes
+    original = {}
+    for obj in meshes:
+        names = [vgroup.name for vgroup in obj.vertex_groups]
+        if any(map_name(name, table, rules) != name for name in names):
+            original[obj.name] = read_weights(obj)
+
+    renamed_bones = rename_bones(armature, table, rules, logger) if armature else 0
+
+    report = {}
+    for obj in meshes:
+        if obj.name not in original:
+            continue
+        weights, names = original[obj.name]
+        remapped, target_names = remap_weight_matrix(weights, names, table, rules)
+        write_weights(obj, remapped, target_names)
+        report[obj.name] = (len(names), len(target_names))
+        logger.info(f"  {obj.name}: {len(names)} -> {len(target_names)} vertex groups")
+
+    logger.info(f"Renamed {renamed_bones} bones, remapped {len(report)} meshes")
+    return report
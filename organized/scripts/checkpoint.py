@@ -0,0 +1,100 @@
+"""
+Stage Checkpoints
+=================
+
+Saves the scene after the expensive stages so a failed export (disk full, bad
+path, exporter exception) does not cost the whole transfer again.
+
+A checkpoint is an uncompressed .blend copy of the scene plus a small JSON
+state file next to the output FBX:
+
+- <output>_checkpoint.blend
+- <output>_checkpoint.json  (stage, input fingerprint, object names)
+
+Stages, in pipeline order:
+
+- ``transfer``      weights transferred to all garments
+- ``export_ready``  culling, material dedup and merging done
+
+``--resume`` reopens the .blend and continues after the recorded stage. The
+checkpoint is ignored if the input FBX, the settings of the stages it covers
+or the pipeline scripts changed since it was written.
+"""
+
+import json
+import os
+
+import bpy
+
+STAGES = ('transfer', 'export_ready')
+
+
+def checkpoint_paths(output_fbx: str) -> tuple:
+    """(.blend path, state file path) of the checkpoint for an output FBX"""
+    base = os.path.splitext(output_fbx)[0] + "_checkpoint"
+    return base + ".blend", base + ".json"
+
+
+def input_fingerprint(input_fbx: str, settings: str) -> dict:
+    """Input file version (size and modification time) plus a digest of the settings and scripts"""
+    stat = os.stat(input_fbx)
+    return {'input': os.path.abspath(input_fbx), 'size': stat.st_size, 'mtime': stat.st_mtime,
+            'settings': settings}
+
+
+def object_names(objects) -> list:
+    """Names of the objects that still exist (merging removes garments)"""
+    names = []
+    for obj in objects:
+        try:
+            names.append(obj.name)
+        except ReferenceError:
+            continue
+    return names
+
+
+def save_checkpoint(stage: str, input_fbx: str, output_fbx: str, settings: str, source_mesh, armature,
+                    target_meshes, logger):
+    """Save the current scene and record the completed stage"""
+    blend_path, state_path = checkpoint_paths(output_fbx)
+    bpy.ops.wm.save_as_mainfile(filepath=blend_path, copy=True, compress=False)
+
+    state = {
+        'stage': stage,
+        'fingerprint': input_fingerprint(input_fbx, settings),
+        'source': source_mesh.name,
+        'armature': armature.name,
+        'targets': object_names(target_meshes),
+    }
+    # Write the state last and atomically, so it never points at a partial .blend
+    with open(state_path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+    os.replace(state_path + ".tmp", state_path)
+    logger.info(f"Checkpoint saved after stage '{stage}': {blend_path}")
+
+
+def load_checkpoint(input_fbx: str, output_fbx: str, settings: str, logger) -> dict:
+    """Reopen a valid checkpoint; returns its state, or None to start over"""
+    blend_path, state_path = checkpoint_paths(output_fbx)
+    if not (os.path.exists(state_path) and os.path.exists(blend_path)):
+        logger.info("No checkpoint found - starting from the beginning")
+        return None
+
+    with open(state_path, encoding='utf-8') as f:
+        state = json.load(f)
+    if state.get('stage') not in STAGES or state.get('fingerprint') != input_fingerprint(input_fbx, settings):
+        logger.warning("Checkpoint is stale, from another input or from other settings - "
+                       "starting from the beginning")
+        return None
+
+    bpy.ops.wm.open_mainfile(filepath=blend_path)
+    logger.info(f"Resumed from checkpoint after stage '{state['stage']}': {blend_path}")
+    return state
+
+
+def clear_checkpoint(output_fbx: str, logger):
+    """Remove the checkpoint files after a successful run"""
+    for path in checkpoint_paths(output_fbx):
+        if os.path.exists(path):
+            os.remove(path)
+    logger.info("Checkpoint removed")
@@ -0,0 +1,165 @@
+"""
+Compact FBX Export Profile
+==========================
+
+Strips data Unity never uses before export:
+
+- vertex groups with no influence on their mesh
+- UV maps beyond the first KEEP_UV_LAYERS, and color attributes
+- material slots no face uses, and materials left without users
+- custom split normals that match the normals Blender computes anyway
+
+and exports the rest-pose mesh without evaluating the armature modifier when
+armature modifiers are the only modifiers in the scene (other modifiers still
+need evaluation to be exported at all).
+
+The size reduction is measured against the previous file at the output path,
+or against a full-profile export written to a temporary file when
+COMPARE_FULL is enabled.
+"""
+
+import os
+import tempfile
+
+import bpy
+import numpy as np
+
+from weight_arrays import read_loop_normals, read_weights
+
+# Largest 1 - cos(angle) between custom and computed normals that counts as unused
+NORMAL_TOLERANCE = 1e-4
+
+
+def drop_empty_vertex_groups(obj, min_weight: float) -> int:
+    """Remove vertex groups whose weights never exceed min_weight"""
+    weights, names = read_weights(obj)
+    if not names:
+        return 0
+    empty = np.flatnonzero(weights.max(axis=0, initial=0.0) <= min_weight) if len(weights) else range(len(names))
+    for col in empty:
+        obj.vertex_groups.remove(obj.vertex_groups[names[col]])
+    return len(empty)
+
+
+def drop_extra_uv_layers(mesh, keep: int) -> int:
+    """Remove UV maps after the first keep, always keeping the active render UV map"""
+    render = next((layer.name for layer in mesh.uv_layers if layer.active_render), None)
+    extra = [layer.name for index, layer in enumerate(mesh.uv_layers) if index >= keep and layer.name != render]
+    for name in extra:
+        mesh.uv_layers.remove(mesh.uv_layers[name])
+    return len(extra)
+
+
+def drop_color_attributes(mesh) -> int:
+    """Remove all color attributes (and legacy vertex colors)"""
+    layers = getattr(mesh, 'color_attributes', None) or mesh.vertex_colors
+    names = [layer.name for layer in layers]
+    for name in names:
+        layers.remove(layers[name])
+    return len(names)
+
+
+def drop_unused_material_slots(mesh) -> int:
+    """Remove material slots no face uses, remapping face material indices"""
+    slots = len(mesh.materials)
+    if slots < 2:
+        return 0
+    material_index = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('material_index', material_index)
+    material_index = np.minimum(material_index, slots - 1)
+
+    used = np.flatnonzero(np.bincount(material_index, minlength=slots))
+    if len(used) == slots or not len(used):
+        return 0
+
+    slot_map = np.zeros(slots, dtype=np.int32)
+    slot_map[used] = np.arange(len(used), dtype=np.int32)
+    materials = [mesh.materials[int(index)] for index in used]
+
+    mesh.materials.clear()
+    for material in materials:
+        mesh.materials.append(material)
+    mesh.polygons.foreach_set('material_index', slot_map[material_index])
+    return slots - len(used)
+
+
+def drop_unused_custom_normals(obj) -> int:
+    """Clear custom split normals that match the computed normals; returns 1 if cleared"""
+    mesh = obj.data
+    if not mesh.has_custom_normals or not len(mesh.loops):
+        return 0
+    custom = read_loop_normals(mesh)
+    with bpy.context.temp_override(object=obj, active_object=obj):
+        bpy.ops.mesh.customdata_custom_splitnormals_clear()
+    computed = read_loop_normals(mesh)
+
+    if (1.0 - np.einsum('ij,ij->i', custom, computed)).max() <= NORMAL_TOLERANCE:
+        return 1
+    # They do change the shading: put them back
+    if hasattr(mesh, 'use_auto_smooth'):
+        mesh.use_auto_smooth = True
+    mesh.normals_split_custom_set(custom.tolist())
+    return 0
+
+
+def only_armature_modifiers() -> bool:
+    """True when no mesh has a modifier other than Armature"""
+    return all(modifier.type == 'ARMATURE'
+               for obj in bpy.data.objects if obj.type == 'MESH'
+               for modifier in obj.modifiers)
+
+
+def compact_scene(keep_uv_layers: int, keep_colors: bool, min_weight: float, logger) -> dict:
+    """Strip unused export data from every mesh; returns counts of what was removed"""
+    logger.info("=== COMPACTING SCENE FOR EXPORT ===")
+    report = {'vertex_groups': 0, 'uv_layers': 0, 'color_attributes': 0, 'material_slots': 0,
+              'custom_normals': 0, 'materials': 0}
+    compacted = set()
+
+    for obj in bpy.data.objects:
+        if obj.type != 'MESH':
+            continue
+        report['vertex_groups'] += drop_empty_vertex_groups(obj, min_weight)
+        if obj.data.name in compacted:
+            continue
+        compacted.add(obj.data.name)
+        report['uv_layers'] += drop_extra_uv_layers(obj.data, keep_uv_layers)
+        if not keep_colors:
+            report['color_attributes'] += drop_color_attributes(obj.data)
+        report['material_slots'] += drop_unused_material_slots(obj.data)
+        report['custom_normals'] += drop_unused_custom_normals(obj)
+
+    for material in [material for material in bpy.data.materials if material.users == 0]:
+        bpy.data.materials.remove(material)
+        report['materials'] += 1
+
+    report['evaluate_modifiers'] = not only_armature_modifiers()
+    logger.info(f"Removed {report['vertex_groups']} empty vertex groups, {report['uv_layers']} UV maps, "
+                f"{report['color_attributes']} color attributes, {report['material_slots']} unused "
+                f"material slots, {report['custom_normals']} unused custom normal layers, "
+                f"{report['materials']} materials")
+    if report['evaluate_modifiers']:
+        logger.info("Non-armature modifiers present - modifiers are still evaluated on export")
+    return report
+
+
+def full_profile_size(export_fn, logger) -> int:
+    """Size of a full-profile export, written to a temporary file"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "full_profile.fbx")
+        if not export_fn(path, logger):
+            return None
+        return os.path.getsize(path)
+
+
+def log_size_reduction(path: str, baseline: int, logger) -> dict:
+    """Compare the compact export's size with a baseline size in bytes"""
+    size = os.path.getsize(path)
+    report = {'bytes': size, 'baseline_bytes': baseline}
+    if baseline:
+        report['reduction'] = round(1.0 - size / baseline, 4)
+        logger.info(f"Compact export: {size / 1048576:.2f} MB (was {baseline / 1048576:.2f} MB, "
+                    f"-{report['reduction']:.1%})")
+    else:
+        logger.info(f"Compact export: {size / 1048576:.2f} MB")
+    return report
@@ -0,0 +1,122 @@
+"""
+Deterministic FBX Export
+========================
+
+Unity reimports an asset whenever its bytes change. Running the pipeline twice
+on the same input otherwise gives different files, because:
+
+- the FBX header stores the export time
+- objects are written in collection link order, which depends on import and
+  merge order
+- vertex groups are written in creation order, which follows data transfer
+
+Before export this stage relinks objects in name order, sorts every mesh's
+vertex groups into armature bone order (other groups by name after them) and
+material slots by material name. During export the exporter's clock is pinned
+to SOURCE_DATE_EPOCH (or 1970-01-01), so identical inputs and config give a
+byte-identical FBX.
+"""
+
+import contextlib
+import datetime
+import os
+import types
+
+import bpy
+import numpy as np
+
+from weight_arrays import read_weights, write_weights
+
+
+def sort_collection_objects(collection) -> bool:
+    """Relink the objects of a collection in name order"""
+    objects = list(collection.objects)
+    ordered = sorted(objects, key=lambda obj: obj.name)
+    if objects == ordered:
+        return False
+    for obj in ordered:
+        collection.objects.unlink(obj)
+        collection.objects.link(obj)
+    return True
+
+
+def sort_vertex_groups(obj, bone_order: dict) -> bool:
+    """Reorder vertex groups by bone order, then by name"""
+    names = [vgroup.name for vgroup in obj.vertex_groups]
+    ordered = sorted(names, key=lambda name: (bone_order.get(name, len(bone_order)), name))
+    if names == ordered:
+        return False
+
+    weights, names = read_weights(obj)
+    columns = [names.index(name) for name in ordered]
+    write_weights(obj, weights[:, columns], ordered)
+    return True
+
+
+def sort_material_slots(mesh) -> bool:
+    """Reorder material slots by material name, remapping face material indices"""
+    materials = list(mesh.materials)
+    order = sorted(range(len(materials)),
+                   key=lambda i: (materials[i] is None, materials[i].name if materials[i] else '', i))
+    if order == list(range(len(materials))):
+        return False
+
+    slot_map = np.empty(len(order), dtype=np.int32)
+    slot_map[order] = np.arange(len(order), dtype=np.int32)
+    material_index = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('material_index', material_index)
+
+    mesh.materials.clear()
+    for i in order:
+        mesh.materials.append(materials[i])
+    mesh.polygons.foreach_set('material_index', slot_map[np.minimum(material_index, len(slot_map) - 1)])
+    return True
+
+
+def normalize_scene(scene, armature, logger) -> dict:
+    """Put objects, vertex groups and material slots into a stable order"""
+    logger.info("=== NORMALIZING SCENE ORDER ===")
+    bone_order = {bone.name: index for index, bone in enumerate(armature.data.bones)} if armature else {}
+    report = {'collections': 0, 'vertex_groups': 0, 'material_slots': 0}
+
+    for collection in [scene.collection] + list(scene.collection.children_recursive):
+        report['collections'] += sort_collection_objects(collection)
+
+    sorted_meshes = set()
+    for obj in bpy.data.objects:
+        if obj.type != 'MESH':
+            continue
+        report['vertex_groups'] += sort_vertex_groups(obj, bone_order)
+        if obj.data.name not in sorted_meshes:
+            sorted_meshes.add(obj.data.name)
+            report['material_slots'] += sort_material_slots(obj.data)
+
+    logger.info(f"Reordered objects in {report['collections']} collections, vertex groups on "
+                f"{report['vertex_groups']} meshes, material slots on {report['material_slots']} meshes")
+    return report
+
+
+def export_time() -> datetime.datetime:
+    """Fixed export time from SOURCE_DATE_EPOCH, or the Unix epoch"""
+    epoch = int(os.environ.get('SOURCE_DATE_EPOCH', '0'))
+    return datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).replace(tzinfo=None)
+
+
+@contextlib.contextmanager
+def fixed_export_time(moment: datetime.datetime = None):
+    """Pin the clock the FBX exporter writes into the file header"""
+    from io_scene_fbx import export_fbx_bin
+
+    moment = moment or export_time()
+
+    class FixedDatetime(datetime.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return moment
+
+    original = export_fbx_bin.datetime
+    export_fbx_bin.datetime = types.SimpleNamespace(**{**vars(datetime), 'datetime': FixedDatetime})
+    try:
+        yield moment
+    finally:
+        export_fbx_bin.datetime = original
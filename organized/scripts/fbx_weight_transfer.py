@@ -15,7 +15,10 @@ Features:
 - Batch processing of multiple garment meshes
 
 Usage:
-    blender --background --python fbx_weight_transfer.py -- <input_fbx> <output_fbx>
+    blender --background --python fbx_weight_transfer.py -- <input_fbx> <output_fbx> [config_file] [--resume] [--stages verify,export]
+
+    --stages runs only the named stages and what they depend on
+    (load, discover, prepare, transfer, post_transfer, verify, variants, export, prune).
 
 Requirements:
 - Blender 4.0.2 or later
@@ -32,9 +35,39 @@ import os
 import logging
 import argparse
 import configparser
+import contextlib
+import functools
+import time
+from dataclasses import asdict
 from datetime import datetime
 from pathlib import Path
 
+# Blender does not add the script directory to sys.path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import body_proxy
+import bone_culling
+import bone_remap
+import checkpoint
+import compact_export
+import deterministic_export
+import garment_dedup
+import import_cache
+import layered_transfer
+import material_dedup
+import mesh_cleanup
+import mesh_merge
+import output_variants
+import physbone_manifest
+import pose_validation
+import shape_key_transfer
+import stage_pipeline
+import symmetry
+import texture_optimize
+import transform_normalize
+from pipeline_logging import log_event, setup_pipeline_logging
+from transfer_result import GarmentResult, TransferResult
+
 class WeightTransferConfig:
     """Configuration class for weight transfer settings"""
     def __init__(self, config_file: str = None):
@@ -43,6 +76,7 @@ class WeightTransferConfig:
         # Default values
         self.transfer_method = 'POLY_NEAREST'
         self.max_distance = 0.5
+        self.limit_distance = False
         self.min_influence = 0.001
         self.clean_vertex_groups = True
         self.global_scale = 1.0
@@ -50,10 +84,76 @@ class WeightTransferConfig:
         self.secondary_bone_axis = 'X'
         self.add_leaf_bones = True
         self.armature_nodetype = 'NULL'
+        self.deterministic_export = False
         self.verbose = True
         self.show_progress = True
         self.create_backup = False
         self.log_prefix = 'weight_transfer'
+        self.proxy_enabled = False
+        self.proxy_ratios = [0.1, 0.03]
+        self.proxy_vertex_thresholds = [5000, 1000]
+        self.proxy_max_error = 0.01
+        self.proxy_max_weight_error = 0.25
+        self.proxy_cache_dir = os.path.join(str(Path.home()), '.cache', 'bpyutils', 'proxies')
+        self.symmetry_enabled = False
+        self.symmetry_tolerance = 0.0005
+        self.symmetry_min_paired_ratio = 0.95
+        self.dedup_enabled = False
+        self.dedup_sample_count = 32
+        self.dedup_weight_tolerance = 0.01
+        self.culling_enabled = False
+        self.culling_delete = False
+        self.culling_min_influence = 0.0
+        self.culling_physbone_roots = ['HipRoot.*']
+        self.culling_keep_bones = []
+        self.merge_enabled = False
+        self.material_dedup_enabled = False
+        self.cleanup_enabled = False
+        self.cleanup_weld_distance = 0.0001
+        self.cleanup_min_face_area = 1e-10
+        self.cleanup_drop_duplicate_faces = False
+        self.validation_enabled = False
+        self.validation_influences = 4
+        self.validation_stretch_tolerance = 0.25
+        self.validation_penetration_samples = 2000
+        self.validation_poses_file = None
+        self.physbone_manifest_enabled = False
+        self.physbone_roots = ['HipRoot']
+        self.physbone_bone_regex = r'.*\.001'
+        self.physbone_max_angle = 45.0
+        self.physbone_inner_angle = 10.0
+        self.remap_enabled = False
+        self.remap_presets = []
+        self.remap_map_file = None
+        self.checkpoint_enabled = False
+        self.checkpoint_keep = False
+        self.layers_enabled = False
+        self.layers_samples = 256
+        self.normalize_enabled = False
+        self.shape_keys_enabled = False
+        self.shape_keys_patterns = ['.*']
+        self.shape_keys_max_distance = 0.05
+        self.shape_keys_min_offset = 0.0001
+        self.compact_enabled = False
+        self.compact_keep_uv_layers = 1
+        self.compact_keep_colors = False
+        self.compact_min_weight = 0.0
+        self.compact_compare_full = False
+        self.textures_enabled = False
+        self.textures_max_size = 1024
+        self.textures_atlas = False
+        self.textures_atlas_size = 2048
+        self.textures_workers = 0
+        self.stage_targets = ['verify', 'export', 'variants']
+        self.stage_cache_enabled = False
+        self.stage_cache_dir = os.path.join(str(Path.home()), '.cache', 'bpyutils', 'stages')
+        self.stage_cache_max_entries = 2
+        self.prune_root = None
+        self.prune_keep_ik = True
+        self.import_cache_enabled = False
+        self.import_cache_dir = os.path.join(str(Path.home()), '.cache', 'bpyutils', 'fbx_import')
+        self.import_cache_max_entries = 20
+        self.variants = []
         
         if config_file and os.path.exists(config_file):
             self.load_config(config_file)
@@ -73,6 +173,7 @@ class WeightTransferConfig:
         if self.config.has_section('PROCESSING'):
             self.transfer_method = self.config.get('PROCESSING', 'TRANSFER_METHOD', fallback=self.transfer_method)
             self.max_distance = self.config.getfloat('PROCESSING', 'MAX_DISTANCE', fallback=self.max_distance)
+            self.limit_distance = self.config.getboolean('PROCESSING', 'LIMIT_DISTANCE', fallback=self.limit_distance)
             self.min_influence = self.config.getfloat('PROCESSING', 'MIN_INFLUENCE', fallback=self.min_influence)
             self.clean_vertex_groups = self.config.getboolean('PROCESSING', 'CLEAN_VERTEX_GROUPS', fallback=self.clean_vertex_groups)
         
@@ -83,6 +184,7 @@ class WeightTransferConfig:
             self.secondary_bone_axis = self.config.get('EXPORT', 'SECONDARY_BONE_AXIS', fallback=self.secondary_bone_axis)
             self.add_leaf_bones = self.config.getboolean('EXPORT', 'ADD_LEAF_BONES', fallback=self.add_leaf_bones)
             self.armature_nodetype = self.config.get('EXPORT', 'ARMATURE_NODETYPE', fallback=self.armature_nodetype)
+            self.deterministic_export = self.config.getboolean('EXPORT', 'DETERMINISTIC', fallback=self.deterministic_export)
         
         # Output settings
         if self.config.has_section('OUTPUT'):
@@ -90,25 +192,170 @@ class WeightTransferConfig:
             self.show_progress = self.config.getboolean('OUTPUT', 'SHOW_PROGRESS', fallback=self.show_progress)
             self.create_backup = self.config.getboolean('OUTPUT', 'CREATE_BACKUP', fallback=self.create_backup)
             self.log_prefix = self.config.get('OUTPUT', 'LOG_PREFIX', fallback=self.log_prefix)
+        
+        # Body proxy settings
+        if self.config.has_section('PROXY'):
+            self.proxy_enabled = self.config.getboolean('PROXY', 'ENABLED', fallback=self.proxy_enabled)
+            self.proxy_ratios = self.get_list('PROXY', 'RATIOS', float, self.proxy_ratios)
+            self.proxy_vertex_thresholds = self.get_list('PROXY', 'VERTEX_THRESHOLDS', int, self.proxy_vertex_thresholds)
+            self.proxy_max_error = self.config.getfloat('PROXY', 'MAX_ERROR', fallback=self.proxy_max_error)
+            self.proxy_max_weight_error = self.config.getfloat('PROXY', 'MAX_WEIGHT_ERROR', fallback=self.proxy_max_weight_error)
+            proxy_cache_dir = self.config.get('PROXY', 'CACHE_DIR', fallback=self.proxy_cache_dir)
+            self.proxy_cache_dir = os.path.expanduser(proxy_cache_dir) if proxy_cache_dir else None
+        
+        # Mirror symmetry settings
+        if self.config.has_section('SYMMETRY'):
+            self.symmetry_enabled = self.config.getboolean('SYMMETRY', 'ENABLED', fallback=self.symmetry_enabled)
+            self.symmetry_tolerance = self.config.getfloat('SYMMETRY', 'TOLERANCE', fallback=self.symmetry_tolerance)
+            self.symmetry_min_paired_ratio = self.config.getfloat('SYMMETRY', 'MIN_PAIRED_RATIO', fallback=self.symmetry_min_paired_ratio)
+        
+        # Identical garment settings
+        if self.config.has_section('DEDUP'):
+            self.dedup_enabled = self.config.getboolean('DEDUP', 'ENABLED', fallback=self.dedup_enabled)
+            self.dedup_sample_count = self.config.getint('DEDUP', 'SAMPLE_COUNT', fallback=self.dedup_sample_count)
+            self.dedup_weight_tolerance = self.config.getfloat('DEDUP', 'WEIGHT_TOLERANCE', fallback=self.dedup_weight_tolerance)
+        
+        # Unused bone culling settings
+        if self.config.has_section('CULLING'):
+            self.culling_enabled = self.config.getboolean('CULLING', 'ENABLED', fallback=self.culling_enabled)
+            self.culling_delete = self.config.getboolean('CULLING', 'DELETE', fallback=self.culling_delete)
+            self.culling_min_influence = self.config.getfloat('CULLING', 'MIN_INFLUENCE', fallback=self.culling_min_influence)
+            self.culling_physbone_roots = self.get_list('CULLING', 'PHYSBONE_ROOTS', str, self.culling_physbone_roots)
+            self.culling_keep_bones = self.get_list('CULLING', 'KEEP_BONES', str, self.culling_keep_bones)
+        
+        # Garment merge settings
+        if self.config.has_section('MERGE'):
+            self.merge_enabled = self.config.getboolean('MERGE', 'ENABLED', fallback=self.merge_enabled)
+        
+        # Material settings
+        if self.config.has_section('MATERIALS'):
+            self.material_dedup_enabled = self.config.getboolean('MATERIALS', 'DEDUPLICATE', fallback=self.material_dedup_enabled)
+        
+        # Garment cleanup settings
+        if self.config.has_section('CLEANUP'):
+            self.cleanup_enabled = self.config.getboolean('CLEANUP', 'ENABLED', fallback=self.cleanup_enabled)
+            self.cleanup_weld_distance = self.config.getfloat('CLEANUP', 'WELD_DISTANCE', fallback=self.cleanup_weld_distance)
+            self.cleanup_min_face_area = self.config.getfloat('CLEANUP', 'MIN_FACE_AREA', fallback=self.cleanup_min_face_area)
+            self.cleanup_drop_duplicate_faces = self.config.getboolean('CLEANUP', 'DROP_DUPLICATE_FACES', fallback=self.cleanup_drop_duplicate_faces)
+        
+        # Pose validation settings
+        if self.config.has_section('VALIDATION'):
+            self.validation_enabled = self.config.getboolean('VALIDATION', 'ENABLED', fallback=self.validation_enabled)
+            self.validation_influences = self.config.getint('VALIDATION', 'INFLUENCES', fallback=self.validation_influences)
+            self.validation_stretch_tolerance = self.config.getfloat('VALIDATION', 'STRETCH_TOLERANCE', fallback=self.validation_stretch_tolerance)
+            self.validation_penetration_samples = self.config.getint('VALIDATION', 'PENETRATION_SAMPLES', fallback=self.validation_penetration_samples)
+            self.validation_poses_file = self.config.get('VALIDATION', 'POSES_FILE', fallback=None) or None
+        
+        # PhysBone manifest settings
+        if self.config.has_section('PHYSBONES'):
+            self.physbone_manifest_enabled = self.config.getboolean('PHYSBONES', 'MANIFEST', fallback=self.physbone_manifest_enabled)
+            self.physbone_roots = self.get_list('PHYSBONES', 'ROOTS', str, self.physbone_roots)
+            self.physbone_bone_regex = self.config.get('PHYSBONES', 'BONE_REGEX', fallback=self.physbone_bone_regex)
+            self.physbone_max_angle = self.config.getfloat('PHYSBONES', 'MAX_ANGLE', fallback=self.physbone_max_angle)
+            self.physbone_inner_angle = self.config.getfloat('PHYSBONES', 'INNER_ANGLE', fallback=self.physbone_inner_angle)
+        
+        # Bone name remapping settings
+        if self.config.has_section('REMAP'):
+            self.remap_enabled = self.config.getboolean('REMAP', 'ENABLED', fallback=self.remap_enabled)
+            self.remap_presets = self.get_list('REMAP', 'PRESETS', str, self.remap_presets)
+            self.remap_map_file = self.config.get('REMAP', 'MAP_FILE', fallback=None) or None
+        
+        # Stage checkpoint settings
+        if self.config.has_section('CHECKPOINT'):
+            self.checkpoint_enabled = self.config.getboolean('CHECKPOINT', 'ENABLED', fallback=self.checkpoint_enabled)
+            self.checkpoint_keep = self.config.getboolean('CHECKPOINT', 'KEEP', fallback=self.checkpoint_keep)
+        
+        # Layered garment settings
+        if self.config.has_section('LAYERS'):
+            self.layers_enabled = self.config.getboolean('LAYERS', 'ENABLED', fallback=self.layers_enabled)
+            self.layers_samples = self.config.getint('LAYERS', 'SAMPLES', fallback=self.layers_samples)
+        
+        # Transform normalization settings
+        if self.config.has_section('NORMALIZE'):
+            self.normalize_enabled = self.config.getboolean('NORMALIZE', 'ENABLED', fallback=self.normalize_enabled)
+        
+        # Shape key propagation settings
+        if self.config.has_section('SHAPEKEYS'):
+            self.shape_keys_enabled = self.config.getboolean('SHAPEKEYS', 'ENABLED', fallback=self.shape_keys_enabled)
+            self.shape_keys_patterns = self.get_list('SHAPEKEYS', 'KEYS', str, self.shape_keys_patterns)
+            self.shape_keys_max_distance = self.config.getfloat('SHAPEKEYS', 'MAX_DISTANCE', fallback=self.shape_keys_max_distance)
+            self.shape_keys_min_offset = self.config.getfloat('SHAPEKEYS', 'MIN_OFFSET', fallback=self.shape_keys_min_offset)
+        
+        # FBX import cache settings
+        if self.config.has_section('CACHE'):
+            self.import_cache_enabled = self.config.getboolean('CACHE', 'ENABLED', fallback=self.import_cache_enabled)
+            self.import_cache_dir = os.path.expanduser(self.config.get('CACHE', 'DIR', fallback='') or self.import_cache_dir)
+            self.import_cache_max_entries = self.config.getint('CACHE', 'MAX_ENTRIES', fallback=self.import_cache_max_entries)
+        
+        # Stage selection and caching settings
+        if self.config.has_section('STAGES'):
+            self.stage_targets = self.get_list('STAGES', 'TARGETS', str, self.stage_targets)
+            self.stage_cache_enabled = self.config.getboolean('STAGES', 'CACHE', fallback=self.stage_cache_enabled)
+            self.stage_cache_dir = os.path.expanduser(self.config.get('STAGES', 'CACHE_DIR', fallback='') or self.stage_cache_dir)
+            self.stage_cache_max_entries = self.config.getint('STAGES', 'MAX_ENTRIES', fallback=self.stage_cache_max_entries)
+        
+        # Bone pruning settings
+        if self.config.has_section('PRUNE'):
+            self.prune_root = self.config.get('PRUNE', 'ROOT', fallback='') or None
+            self.prune_keep_ik = self.config.getboolean('PRUNE', 'KEEP_IK', fallback=self.prune_keep_ik)
+        
+        # Output variant profiles, one [VARIANT:<name>] section each
+        self.variants = [self.get_variant(section) for section in self.config.sections()
+                         if section.startswith('VARIANT:')]
+        
+        # Compact export profile settings
+        if self.config.has_section('COMPACT'):
+            self.compact_enabled = self.config.getboolean('COMPACT', 'ENABLED', fallback=self.compact_enabled)
+            self.compact_keep_uv_layers = self.config.getint('COMPACT', 'KEEP_UV_LAYERS', fallback=self.compact_keep_uv_layers)
+            self.compact_keep_colors = self.config.getboolean('COMPACT', 'KEEP_COLORS', fallback=self.compact_keep_colors)
+            self.compact_min_weight = self.config.getfloat('COMPACT', 'MIN_WEIGHT', fallback=self.compact_min_weight)
+            self.compact_compare_full = self.config.getboolean('COMPACT', 'COMPARE_FULL', fallback=self.compact_compare_full)
+        
+        # Texture downscale and atlas settings
+        if self.config.has_section('TEXTURES'):
+            self.textures_enabled = self.config.getboolean('TEXTURES', 'ENABLED', fallback=self.textures_enabled)
+            self.textures_max_size = self.config.getint('TEXTURES', 'MAX_SIZE', fallback=self.textures_max_size)
+            self.textures_atlas = self.config.getboolean('TEXTURES', 'ATLAS', fallback=self.textures_atlas)
+            self.textures_atlas_size = self.config.getint('TEXTURES', 'ATLAS_SIZE', fallback=self.textures_atlas_size)
+            self.textures_workers = self.config.getint('TEXTURES', 'WORKERS', fallback=self.textures_workers)
+    
+    def get_variant(self, section: str) -> dict:
+        """Read one output variant profile section"""
+        name = section.split(':', 1)[1].strip()
+        return {
+            'name': name,
+            'suffix': self.config.get(section, 'SUFFIX', fallback=f"_{name}"),
+            'max_influences': self.config.getint(section, 'MAX_INFLUENCES', fallback=0),
+            'max_bones': self.config.getint(section, 'MAX_BONES', fallback=0),
+            'cull_unused': self.config.getboolean(section, 'CULL_UNUSED', fallback=False),
+            'merge': self.config.getboolean(section, 'MERGE', fallback=False),
+            'decimate_ratio': self.config.getfloat(section, 'DECIMATE_RATIO', fallback=1.0),
+            'texture_max_size': self.config.getint(section, 'TEXTURE_MAX_SIZE', fallback=0),
+        }
+    
+    def get_list(self, section: str, key: str, cast, fallback: list) -> list:
+        """Read a comma separated list value"""
+        value = self.config.get(section, key, fallback=None)
+        if value is None:
+            return fallback
+        return [cast(item.strip()) for item in value.split(',') if item.strip()]
 
 def setup_logging(log_dir: str, config: WeightTransferConfig) -> logging.Logger:
-    """Setup detailed logging"""
+    """Setup detailed logging plus a JSON lines event log"""
     os.makedirs(log_dir, exist_ok=True)
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     log_file = os.path.join(log_dir, f"{config.log_prefix}_{timestamp}.log")
+    events_file = os.path.join(log_dir, f"{config.log_prefix}_{timestamp}.events.jsonl")
     
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()
-        ]
-    )
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    handlers = [logging.FileHandler(log_file, encoding='utf-8'), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
     
-    logger = logging.getLogger(__name__)
-    logger.info(f"Log file: {log_file}")
+    logger = setup_pipeline_logging('fbx_weight_transfer', handlers, events_file, logging.INFO)
+    logger.info("Log file: %s", log_file)
+    logger.info("Event log: %s", events_file)
     return logger
 
 def clear_scene(logger):
@@ -118,13 +365,18 @@ def clear_scene(logger):
     bpy.ops.object.delete(use_global=False)
     logger.info("Scene cleared")
 
-def load_fbx(filepath: str, logger) -> bool:
-    """Load FBX file into Blender"""
+def load_fbx(filepath: str, logger, cache_dir: str = None, cache_max_entries: int = 20) -> bool:
+    """Load FBX file into Blender, through the import cache if cache_dir is given"""
     logger.info(f"Loading FBX file: {filepath}")
     
     if not os.path.exists(filepath):
         logger.error(f"FBX file not found: {filepath}")
         return False
+    
+    if cache_dir:
+        return import_cache.import_with_cache(
+            filepath, lambda path: load_fbx(path, logger), cache_dir, cache_max_entries, logger
+        )
         
     try:
         bpy.ops.import_scene.fbx(filepath=filepath)
@@ -179,8 +431,39 @@ def find_armature(logger):
     logger.error("No armature found!")
     return None
 
-def transfer_weights(source_mesh, target_meshes, armature, logger) -> int:
-    """Transfer weights from source mesh to target meshes"""
+def transfer_with_operator(source, target_mesh, max_distance: float = None):
+    """Transfer vertex groups with Blender's data transfer operator"""
+    # Clear selection
+    bpy.ops.object.select_all(action='DESELECT')
+    
+    # Select source mesh first, then target
+    source.select_set(True)
+    bpy.context.view_layer.objects.active = source
+    target_mesh.select_set(True)
+    
+    # Transfer vertex groups using data transfer
+    bpy.ops.object.data_transfer(
+        data_type='VGROUP_WEIGHTS',
+        use_create=True,
+        vert_mapping='POLYINTERP_NEAREST',
+        layers_select_src='ALL',
+        layers_select_dst='NAME',
+        mix_mode='REPLACE',
+        use_max_distance=max_distance is not None,
+        max_distance=max_distance or 0.0
+    )
+
+def transfer_weights(source_mesh, target_meshes, armature, logger,
+                     source_overrides: dict = None, transfer_fn=None, garment_results: list = None) -> int:
+    """Transfer weights from source mesh to target meshes
+    
+    source_overrides maps a target mesh name to a different source object,
+    e.g. a decimated body proxy. transfer_fn(source, target_mesh) replaces the
+    data transfer operator, e.g. with a symmetric transfer. A GarmentResult
+    per target is appended to garment_results when given.
+    """
+    transfer_fn = transfer_fn or transfer_with_operator
+    
     logger.info("=== STARTING WEIGHT TRANSFER ===")
     logger.info(f"Source: {source_mesh.name}")
     logger.info(f"Armature: {armature.name}")
@@ -189,33 +472,20 @@ def transfer_weights(source_mesh, target_meshes, armature, logger) -> int:
     successful_transfers = 0
     
     for i, target_mesh in enumerate(target_meshes):
-        logger.info(f"Processing mesh {i+1}/{len(target_meshes)}: {target_mesh.name}")
+        logger.info("Processing mesh %d/%d: %s", i + 1, len(target_meshes), target_mesh.name)
+        source = (source_overrides or {}).get(target_mesh.name, source_mesh)
+        garment = GarmentResult(target_mesh.name, source.name, len(target_mesh.data.vertices))
+        started = time.perf_counter()
         
         try:
             # Clear any existing vertex groups
             target_mesh.vertex_groups.clear()
             
-            # Clear selection
-            bpy.ops.object.select_all(action='DESELECT')
-            
-            # Select source mesh first, then target
-            source_mesh.select_set(True)
-            bpy.context.view_layer.objects.active = source_mesh
-            target_mesh.select_set(True)
-            
-            # Transfer vertex groups using data transfer
-            logger.info(f"  Transferring weights...")
-            bpy.ops.object.data_transfer(
-                data_type='VGROUP_WEIGHTS',
-                use_create=True,
-                vert_mapping='POLYINTERP_NEAREST',
-                layers_select_src='ALL',
-                layers_select_dst='NAME',
-                mix_mode='REPLACE'
-            )
+            logger.info("  Transferring weights from %s...", source.name)
+            transfer_fn(source, target_mesh)
             
             # Parent to armature
-            logger.info(f"  Setting up armature relationship...")
+            logger.info("  Setting up armature relationship...")
             bpy.ops.object.select_all(action='DESELECT')
             target_mesh.select_set(True)
             armature.select_set(True)
@@ -232,15 +502,23 @@ def transfer_weights(source_mesh, target_meshes, armature, logger) -> int:
             
             # Verify transfer success
             vgroup_count = len(target_mesh.vertex_groups)
-            logger.info(f"  ✓ Success: {vgroup_count} vertex groups transferred")
+            logger.info("  ✓ Success: %d vertex groups transferred", vgroup_count)
             
+            garment.vertex_groups = vgroup_count
             if vgroup_count > 0:
                 successful_transfers += 1
+                garment.success = True
             else:
-                logger.warning(f"  ✗ Warning: No vertex groups transferred to {target_mesh.name}")
+                logger.warning("  ✗ Warning: No vertex groups transferred to %s", target_mesh.name)
                 
         except Exception as e:
-            logger.error(f"  ✗ Failed to transfer weights to {target_mesh.name}: {e}")
+            logger.error("  ✗ Failed to transfer weights to %s: %s", target_mesh.name, e)
+            garment.error = str(e)
+        
+        garment.seconds = round(time.perf_counter() - started, 3)
+        log_event(logger, 'garment', **asdict(garment))
+        if garment_results is not None:
+            garment_results.append(garment)
     
     logger.info(f"=== WEIGHT TRANSFER COMPLETE ===")
     logger.info(f"Successfully transferred weights to {successful_transfers}/{len(target_meshes)} meshes")
@@ -271,7 +549,7 @@ def verify_weights(logger):
     logger.info(f"Verification complete: {rigged_count}/{total_meshes} meshes properly rigged")
     return rigged_count, total_meshes
 
-def export_fbx(output_path: str, logger) -> bool:
+def export_fbx(output_path: str, logger, use_mesh_modifiers: bool = True) -> bool:
     """Export FBX with Unity-optimized settings"""
     logger.info(f"=== EXPORTING FBX: {output_path} ===")
     
@@ -286,8 +564,8 @@ def export_fbx(output_path: str, logger) -> bool:
             use_space_transform=True,
             bake_space_transform=False,
             object_types={'ARMATURE', 'MESH'},
-            use_mesh_modifiers=True,
-            use_mesh_modifiers_render=True,
+            use_mesh_modifiers=use_mesh_modifiers,
+            use_mesh_modifiers_render=use_mesh_modifiers,
             mesh_smooth_type='FACE',
             use_subsurf=False,
             use_mesh_edges=False,
@@ -310,18 +588,433 @@ def export_fbx(output_path: str, logger) -> bool:
         logger.error(f"FBX export failed: {e}")
         return False
 
+def config_params(config: WeightTransferConfig, *sections) -> dict:
+    """Config values a stage depends on, for its cache key"""
+    return {section: dict(config.config.items(section)) for section in sections
+            if config.config.has_section(section)}
+
+def code_version() -> str:
+    """Digest of the pipeline scripts, so cached stages miss after a code change"""
+    scripts = sorted(Path(__file__).parent.glob('*.py'))
+    return stage_pipeline.digest([(path.name, import_cache.file_hash(str(path))) for path in scripts])
+
+def checkpoint_settings(config: WeightTransferConfig) -> str:
+    """Digest of the settings and scripts the checkpointed stages depend on"""
+    sections = ('PROCESSING', 'REMAP', 'NORMALIZE', 'CLEANUP', 'EXPORT', 'PROXY', 'LAYERS',
+                'SYMMETRY', 'DEDUP', 'SHAPEKEYS', 'CULLING', 'MATERIALS', 'MERGE')
+    return stage_pipeline.digest(config_params(config, *sections), code_version())
+
+def discovered_objects(values: dict) -> tuple:
+    """(source mesh, armature, target meshes) from the discover stage's names"""
+    discovered = values['discovered']
+    objects = bpy.data.objects
+    return (objects[discovered['source']], objects[discovered['armature']],
+            [objects[name] for name in discovered['targets'] if name in objects])
+
+def build_stages(input_fbx, output_fbx: str, config: WeightTransferConfig, logger) -> list:
+    """The pipeline as a table of stages with their inputs and outputs"""
+    Stage = stage_pipeline.Stage
+    
+    def load(values):
+        # Clear scene and load FBX (no input: process the loaded scene)
+        if input_fbx:
+            clear_scene(logger)
+            cache_dir = config.import_cache_dir if config.import_cache_enabled else None
+            if not load_fbx(input_fbx, logger, cache_dir, config.import_cache_max_entries):
+                raise stage_pipeline.StageError("Failed to load input FBX file")
+        return {'imported': True}
+    
+    def discover(values):
+        # Find source mesh, targets, and armature
+        source_mesh = find_source_mesh(logger)
+        if not source_mesh:
+            raise stage_pipeline.StageError("No suitable source mesh found")
+        
+        armature = find_armature(logger)
+        if not armature:
+            raise stage_pipeline.StageError("No armature found")
+        
+        target_meshes = find_target_meshes(source_mesh, logger)
+        if not target_meshes:
+            logger.warning("No target meshes found - all meshes already have weights")
+        return {'discovered': {'source': source_mesh.name, 'armature': armature.name,
+                               'targets': [obj.name for obj in target_meshes]}}
+    
+    def prepare(values):
+        source_mesh, armature, target_meshes = discovered_objects(values)
+        reports = {}
+        
+        # Retarget bone and vertex group names to the target rig convention
+        if config.remap_enabled:
+            table, rules = bone_remap.load_mapping(config.remap_presets, config.remap_map_file)
+            meshes = [obj for obj in bpy.data.objects if obj.type == 'MESH']
+            reports['remap'] = bone_remap.remap_bone_names(armature, meshes, table, rules, logger)
+        
+        # Bake mesh transforms so body and garments share the armature's space
+        if config.normalize_enabled:
+            meshes = [obj for obj in bpy.data.objects if obj.type == 'MESH']
+            reports['normalize'] = transform_normalize.normalize_transforms(
+                armature, meshes, config.global_scale, logger
+            )
+        
+        # Weld seams and drop degenerate faces before transfer
+        if config.cleanup_enabled and target_meshes:
+            reports['cleanup'] = mesh_cleanup.clean_garments(
+                target_meshes, config.cleanup_weld_distance, config.cleanup_min_face_area, logger,
+                config.cleanup_drop_duplicate_faces
+            )
+        return {'prepared': True, 'prepare_report': {'reports': reports}}
+    
+    def transfer(values):
+        source_mesh, armature, target_meshes = discovered_objects(values)
+        reports = {}
+        garments = []
+        
+        if target_meshes:
+            proxies = {}
+            source_overrides = {}
+            if config.proxy_enabled:
+                proxies = body_proxy.build_body_proxies(
+                    source_mesh, config.proxy_ratios, config.proxy_max_error,
+                    config.proxy_max_weight_error, logger, config.proxy_cache_dir
+                )
+                source_overrides = body_proxy.route_garments(
+                    target_meshes, proxies, config.proxy_vertex_thresholds, logger
+                )
+                reports['proxy'] = body_proxy.proxy_report(proxies, source_overrides)
+            
+            # With LIMIT_DISTANCE every mode leaves vertices beyond MAX_DISTANCE unweighted
+            reach = config.max_distance if config.limit_distance else None
+            operator_fn = functools.partial(transfer_with_operator, max_distance=reach)
+            
+            # Inner garments first, outer ones sample the layers beneath them
+            base_fn = operator_fn
+            layered = None
+            if config.layers_enabled:
+                target_meshes = layered_transfer.order_layers(
+                    source_mesh, target_meshes, config.layers_samples, logger
+                )
+                layered = layered_transfer.LayeredTransfer(logger, reach)
+                base_fn = layered.transfer_direct
+            
+            transfer_fn = None
+            if config.symmetry_enabled:
+                transfer_fn = symmetry.SymmetricTransfer(
+                    armature, config.symmetry_tolerance, config.symmetry_min_paired_ratio,
+                    base_fn, logger, layered.sample if layered else None, reach
+                )
+            
+            if layered:
+                transfer_fn = layered.wrap(transfer_fn)
+            
+            if config.dedup_enabled:
+                groups = garment_dedup.group_identical_garments(target_meshes, logger)
+                transfer_fn = garment_dedup.DeduplicatedTransfer(
+                    groups, transfer_fn or operator_fn,
+                    config.dedup_sample_count, config.dedup_weight_tolerance, logger
+                )
+            
+            successful_transfers = transfer_weights(
+                source_mesh, target_meshes, armature, logger, source_overrides,
+                transfer_fn or operator_fn, garments
+            )
+            
+            if proxies:
+                body_proxy.remove_body_proxies(proxies, logger)
+            
+            if successful_transfers == 0:
+                raise stage_pipeline.StageError("Weight transfer failed completely")
+            
+            # Garments follow the body's blendshapes (body-type sliders, correctives)
+            if config.shape_keys_enabled:
+                reports['shape_keys'] = shape_key_transfer.propagate_shape_keys(
+                    source_mesh, target_meshes, config.shape_keys_patterns,
+                    config.shape_keys_max_distance, config.shape_keys_min_offset, logger
+                )
+        
+        if config.checkpoint_enabled and input_fbx:
+            checkpoint.save_checkpoint('transfer', input_fbx, output_fbx, checkpoint_settings(config),
+                                       source_mesh, armature, target_meshes, logger)
+        return {'weighted': True, 'transfer_report': {'reports': reports,
+                                                      'garments': [asdict(garment) for garment in garments]}}
+    
+    def post_transfer(values):
+        source_mesh, armature, target_meshes = discovered_objects(values)
+        reports = {}
+        files = []
+        
+        # Find (and optionally delete) bones that deform nothing
+        if config.culling_enabled:
+            reports['unused_bones'] = bone_culling.cull_unused_bones(
+                armature, config.culling_physbone_roots, config.culling_keep_bones,
+                config.culling_min_influence, config.culling_delete, logger
+            )
+        
+        # Collapse identical materials into shared slots
+        if config.material_dedup_enabled:
+            material_mapping = material_dedup.deduplicate_materials(logger)
+            manifest_path = os.path.splitext(output_fbx)[0] + "_materials.json"
+            material_dedup.write_material_manifest(material_mapping, manifest_path, logger)
+            reports['materials'] = material_mapping
+            files.append(manifest_path)
+        
+        # Merge same-material garments into shared skinned meshes
+        if config.merge_enabled and target_meshes:
+            name_map = mesh_merge.merge_garments(target_meshes, logger)
+            map_path = os.path.splitext(output_fbx)[0] + "_merge_map.json"
+            mesh_merge.write_name_map(name_map, map_path, logger)
+            reports['merge'] = name_map
+            files.append(map_path)
+        
+        if config.checkpoint_enabled and input_fbx:
+            checkpoint.save_checkpoint('export_ready', input_fbx, output_fbx, checkpoint_settings(config),
+                                       source_mesh, armature, target_meshes, logger)
+        return {'export_ready': True, 'post_transfer_report': {'reports': reports, 'files': files}}
+    
+    def verify(values):
+        source_mesh, armature, _target_meshes = discovered_objects(values)
+        reports = {}
+        files = []
+        
+        # Verify results
+        rigged_count, total_count = verify_weights(logger)
+        
+        # Deform everything through test poses and score the weights
+        if config.validation_enabled:
+            meshes = [obj for obj in bpy.data.objects if obj.type == 'MESH']
+            pose_report = pose_validation.validate_poses(
+                armature, source_mesh, meshes,
+                pose_validation.load_poses(config.validation_poses_file),
+                config.validation_influences, config.validation_stretch_tolerance,
+                config.validation_penetration_samples, logger
+            )
+            report_path = os.path.splitext(output_fbx)[0] + "_pose_report.json"
+            pose_validation.write_pose_report(pose_report, report_path, logger)
+            reports['validation'] = pose_report
+            files.append(report_path)
+        return {'verify_report': {'reports': reports, 'files': files,
+                                  'rigged_meshes': rigged_count, 'total_meshes': total_count}}
+    
+    def export(values):
+        _source_mesh, armature, _target_meshes = discovered_objects(values)
+        reports = {}
+        files = []
+        
+        # Stable ordering and a pinned header time give byte-identical output
+        # A factory: each export enters a fresh context manager
+        export_clock = contextlib.nullcontext
+        if config.deterministic_export:
+            deterministic_export.normalize_scene(bpy.context.scene, armature, logger)
+            export_clock = deterministic_export.fixed_export_time
+        
+        # Downscaled, deduplicated (and optionally atlased) textures next to the FBX
+        if config.textures_enabled:
+            meshes = [obj for obj in bpy.data.objects if obj.type == 'MESH']
+            texture_report = texture_optimize.optimize_textures(
+                meshes, values['discovered']['targets'], output_fbx, config.textures_max_size,
+                config.textures_atlas, config.textures_atlas_size, config.textures_workers, logger
+            )
+            reports['textures'] = texture_report
+            if texture_report:
+                files.append(texture_report['directory'])
+        
+        # Strip data Unity never uses; the rest pose is exported unevaluated
+        evaluate_modifiers = True
+        if config.compact_enabled:
+            baseline = os.path.getsize(output_fbx) if os.path.exists(output_fbx) else None
+            if config.compact_compare_full:
+                with export_clock():
+                    baseline = compact_export.full_profile_size(export_fbx, logger)
+            compact_report = compact_export.compact_scene(
+                config.compact_keep_uv_layers, config.compact_keep_colors,
+                config.compact_min_weight, logger
+            )
+            evaluate_modifiers = compact_report['evaluate_modifiers']
+            reports['compact'] = compact_report
+        
+        # Export FBX
+        with export_clock():
+            exported = export_fbx(output_fbx, logger, use_mesh_modifiers=evaluate_modifiers)
+        if not exported:
+            raise stage_pipeline.StageError("Export failed")
+        
+        if config.compact_enabled:
+            compact_report['size'] = compact_export.log_size_reduction(output_fbx, baseline, logger)
+        
+        # Describe PhysBone chains for the headless Unity installer
+        if config.physbone_manifest_enabled:
+            chains = physbone_manifest.find_physbone_chains(
+                armature, config.physbone_roots, config.physbone_bone_regex,
+                config.physbone_max_angle, config.physbone_inner_angle,
+                config.add_leaf_bones, logger
+            )
+            manifest_path = os.path.splitext(output_fbx)[0] + "_physbones.json"
+            physbone_manifest.write_physbone_manifest(
+                armature, chains, config.add_leaf_bones, manifest_path, logger
+            )
+            reports['physbones'] = chains
+            files.append(manifest_path)
+        
+        if config.checkpoint_enabled and not config.checkpoint_keep:
+            checkpoint.clear_checkpoint(output_fbx, logger)
+        
+        logger.info(f"Output file ready for Unity: {output_fbx}")
+        return {'export_report': {'reports': reports, 'files': files}}
+    
+    def variants(values):
+        # Derive each output profile from the shared weighted scene
+        discovered = values['discovered']
+        culling = {
+            'physbone_roots': config.culling_physbone_roots,
+            'keep_bones': config.culling_keep_bones,
+            'min_influence': config.culling_min_influence,
+        }
+        reports = {}
+        if config.variants:
+            reports['variants'] = output_variants.export_variants(
+                config.variants, output_fbx, discovered['armature'], discovered['targets'],
+                culling, export_fbx, logger, config.textures_workers
+            )
+            failed = [name for name, report in reports['variants'].items() if not report['success']]
+            if failed:
+                raise stage_pipeline.StageError(f"Variant export failed: {', '.join(failed)}")
+        files = [report['output'] for report in reports.get('variants', {}).values()]
+        return {'variants_report': {'reports': reports, 'files': files}}
+    
+    def prune(values):
+        # Keep only the root hierarchy (and IK bones), as blender-workspace's bone scripts do
+        _source_mesh, armature, _target_meshes = discovered_objects(values)
+        pruned = bone_culling.prune_outside_root(armature, config.prune_root, config.prune_keep_ik, logger)
+        blend_path = os.path.splitext(output_fbx)[0] + "_pruned.blend"
+        bpy.ops.wm.save_as_mainfile(filepath=blend_path, copy=True)
+        logger.info(f"Pruned scene saved: {blend_path}")
+        return {'pruned': True, 'prune_report': {'reports': {'pruned_bones': pruned}, 'files': [blend_path]}}
+    
+    return [
+        Stage('load', load, ('input_fbx',), ('imported',), ('imported',), cache=False),
+        Stage('discover', discover, ('imported',), ('discovered',)),
+        Stage('prepare', prepare, ('imported', 'discovered'), ('prepared', 'prepare_report'), ('prepared',),
+              config_params(config, 'REMAP', 'NORMALIZE', 'CLEANUP', 'EXPORT')),
+        Stage('transfer', transfer, ('prepared', 'discovered'), ('weighted', 'transfer_report'), ('weighted',),
+              config_params(config, 'PROCESSING', 'PROXY', 'LAYERS', 'SYMMETRY', 'DEDUP', 'SHAPEKEYS')),
+        Stage('post_transfer', post_transfer, ('weighted', 'discovered', 'output_fbx'),
+              ('export_ready', 'post_transfer_report'), ('export_ready',),
+              config_params(config, 'CULLING', 'MATERIALS', 'MERGE')),
+        Stage('verify', verify, ('export_ready', 'discovered', 'output_fbx'), ('verify_report',),
+              params=config_params(config, 'VALIDATION')),
+        Stage('variants', variants, ('export_ready', 'discovered', 'output_fbx'), ('variants_report',),
+              params=config_params(config, 'CULLING', *[section for section in config.config.sections()
+                                                         if section.startswith('VARIANT:')]), cache=False),
+        Stage('export', export, ('export_ready', 'discovered', 'output_fbx'), ('export_report',),
+              params=config_params(config, 'EXPORT', 'TEXTURES', 'COMPACT', 'PHYSBONES'), cache=False),
+        Stage('prune', prune, ('imported', 'discovered', 'output_fbx'), ('pruned', 'prune_report'), ('pruned',),
+              config_params(config, 'PRUNE'), cache=False),
+    ]
+
+def mark_stage(result: TransferResult, stage: str, logger):
+    """Record the time of a finished stage and emit a stage event"""
+    result.mark(stage)
+    log_event(logger, 'stage_end', stage=stage, seconds=result.stage_seconds[stage])
+
+def run_pipeline(input_fbx, output_fbx: str, config: WeightTransferConfig, logger,
+                 resume: bool = False, stages: list = None) -> TransferResult:
+    """Run the requested stages (and what they depend on) and return a structured result
+    
+    stages defaults to [STAGES] TARGETS (verify and export). With input_fbx None
+    the data already loaded in Blender is processed.
+    """
+    targets = stages or config.stage_targets
+    result = TransferResult(input_fbx=input_fbx, output_fbx=output_fbx)
+    log_event(logger, 'run_start', input=input_fbx, output=output_fbx, resume=resume, stages=targets)
+    
+    # Ensure output directory exists
+    os.makedirs(os.path.dirname(os.path.abspath(output_fbx)), exist_ok=True)
+    
+    def on_start(stage, cached):
+        log_event(logger, 'stage_start', stage=stage.name, cached=cached)
+    
+    def on_stage(stage, outputs, cached):
+        if cached:
+            result.cached_stages.append(stage.name)
+        report = outputs.get(f"{stage.name}_report", {})
+        result.reports.update(report.get('reports', {}))
+        result.files.extend(report.get('files', []))
+        result.garments.extend(GarmentResult(**garment) for garment in report.get('garments', []))
+        if 'rigged_meshes' in report:
+            result.rigged_meshes, result.total_meshes = report['rigged_meshes'], report['total_meshes']
+        if 'discovered' in outputs:
+            result.source_mesh = outputs['discovered']['source']
+            result.armature = outputs['discovered']['armature']
+        mark_stage(result, stage.name, logger)
+    
+    try:
+        values = {'input_fbx': input_fbx, 'output_fbx': output_fbx}
+        done = set()
+        
+        # Continue after the last completed stage of an earlier run
+        state = None
+        if resume and input_fbx:
+            state = checkpoint.load_checkpoint(input_fbx, output_fbx, checkpoint_settings(config), logger)
+        if state:
+            result.resumed_stage = state['stage']
+            result.source_mesh, result.armature = state['source'], state['armature']
+            done = {'load', 'discover', 'prepare', 'transfer'}
+            values.update(imported=True, prepared=True, weighted=True, discovered={
+                'source': state['source'], 'armature': state['armature'], 'targets': state['targets'],
+            })
+            if state['stage'] == 'export_ready':
+                done.add('post_transfer')
+                values['export_ready'] = True
+        
+        # Stage results are cached per input content, config and code version
+        cache_dir = config.stage_cache_dir if config.stage_cache_enabled and input_fbx and not state else None
+        seed = stage_pipeline.digest(import_cache.file_hash(input_fbx), code_version()) if cache_dir else ''
+        
+        pipeline = stage_pipeline.StagePipeline(build_stages(input_fbx, output_fbx, config, logger), logger,
+                                                cache_dir, config.stage_cache_max_entries)
+        pipeline.run(targets, seed, values, done, on_stage, on_start)
+        
+        result.success = True
+        logger.info("=== PROCESSING COMPLETED SUCCESSFULLY ===")
+        logger.info(f"Stages: {', '.join(targets)}")
+        if 'verify' in targets:
+            logger.info(f"Meshes with proper rigging: {result.rigged_meshes}/{result.total_meshes}")
+            
+    except stage_pipeline.StageError as e:
+        logger.error(str(e))
+        result.fail(str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
+        result.fail(str(e))
+    finally:
+        log_event(logger, 'run_end', success=result.success, error=result.error,
+                  seconds=result.total_seconds, garments=result.successful_transfers)
+    
+    return result
+
+
 def main():
     """Main processing function"""
     # Parse command line arguments
     config_file = None
+    resume = False
+    stages = None
     if "--" in sys.argv:
         custom_args = sys.argv[sys.argv.index("--") + 1:]
+        resume = "--resume" in custom_args
+        custom_args = [arg for arg in custom_args if arg != "--resume"]
+        if "--stages" in custom_args:
+            index = custom_args.index("--stages")
+            stages = [name.strip() for name in custom_args[index + 1].split(',') if name.strip()]
+            del custom_args[index:index + 2]
         if len(custom_args) >= 2:
             input_fbx = custom_args[0]
             output_fbx = custom_args[1]
             config_file = custom_args[2] if len(custom_args) >= 3 else None
         else:
-            print("Usage: blender --background --python fbx_weight_transfer.py -- <input_fbx> <output_fbx> [config_file]")
+            print("Usage: blender --background --python fbx_weight_transfer.py -- <input_fbx> <output_fbx> [config_file] [--resume] [--stages verify,export]")
             return
     else:
         # Default paths - load config first to get default FBX paths
@@ -352,55 +1045,7 @@ def main():
     logger.info(f"Input: {input_fbx}")
     logger.info(f"Output: {output_fbx}")
     
-    # Ensure output directory exists
-    os.makedirs(os.path.dirname(output_fbx), exist_ok=True)
-    
-    try:
-        # Clear scene and load FBX
-        clear_scene(logger)
-        
-        if not load_fbx(input_fbx, logger):
-            logger.error("Failed to load input FBX file")
-            return
-        
-        # Find source mesh, targets, and armature
-        source_mesh = find_source_mesh(logger)
-        if not source_mesh:
-            logger.error("No suitable source mesh found")
-            return
-            
-        armature = find_armature(logger)
-        if not armature:
-            logger.error("No armature found")
-            return
-            
-        target_meshes = find_target_meshes(source_mesh, logger)
-        if not target_meshes:
-            logger.warning("No target meshes found - all meshes already have weights")
-        
-        # Transfer weights
-        if target_meshes:
-            successful_transfers = transfer_weights(source_mesh, target_meshes, armature, logger)
-            
-            if successful_transfers == 0:
-                logger.error("Weight transfer failed completely")
-                return
-        
-        # Verify results
-        rigged_count, total_count = verify_weights(logger)
-        
-        # Export FBX
-        if export_fbx(output_fbx, logger):
-            logger.info("=== PROCESSING COMPLETED SUCCESSFULLY ===")
-            logger.info(f"Output file ready for Unity: {output_fbx}")
-            logger.info(f"Meshes with proper rigging: {rigged_count}/{total_count}")
-        else:
-            logger.error("Export failed")
-            
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
+    run_pipeline(input_fbx, output_fbx, config, logger, resume, stages)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""
+Garment Deduplication
+=====================
+
+Groups garments whose local-space vertex and topology buffers are identical
+(buttons, straps, earrings, ...) so weights are transferred once per group.
+
+For every further instance a handful of sample vertices is moved by the
+instance's world transform and looked up on the body. If the body weights
+found there match the ones under the group's first instance, the weights are
+copied; otherwise the instance sits over a different part of the body and
+gets its own full transfer.
+"""
+
+import hashlib
+
+import numpy as np
+
+import surface_mapping
+from weight_arrays import apply_matrix, read_coordinates, read_weights, write_weights
+
+HASH_DECIMALS = 5
+
+
+def mesh_signature(obj) -> str:
+    """Hash the local-space vertex positions and polygon topology of a mesh"""
+    mesh = obj.data
+    coords = np.round(read_coordinates(obj), HASH_DECIMALS) + 0.0  # fold -0.0 into 0.0
+
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+    loop_vertices = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', loop_vertices)
+
+    digest = hashlib.sha1()
+    for buffer in (coords.astype(np.float32), loop_totals, loop_vertices):
+        digest.update(np.int64(buffer.size).tobytes())
+        digest.update(buffer.tobytes())
+    return digest.hexdigest()
+
+
+def group_identical_garments(target_meshes, logger) -> list:
+    """Group garments with identical mesh buffers, keeping target order"""
+    groups = {}
+    for target_mesh in target_meshes:
+        groups.setdefault(mesh_signature(target_mesh), []).append(target_mesh)
+
+    duplicate_groups = [group for group in groups.values() if len(group) > 1]
+    for group in duplicate_groups:
+        # Linked duplicates would share vertex groups through their mesh data
+        for instance in group[1:]:
+            if instance.data.users > 1:
+                instance.data = instance.data.copy()
+        logger.info(f"  Identical garments: {', '.join(obj.name for obj in group)}")
+
+    saved = sum(len(group) - 1 for group in duplicate_groups)
+    logger.info(f"Found {len(duplicate_groups)} groups of identical garments ({saved} duplicates)")
+    return list(groups.values())
+
+
+class DeduplicatedTransfer:
+    """Transfer callable that reuses the first instance's weights for identical garments"""
+
+    def __init__(self, groups: list, transfer_fn, sample_count: int, tolerance: float, logger):
+        self.transfer_fn = transfer_fn
+        self.sample_count = sample_count
+        self.tolerance = tolerance
+        self.logger = logger
+        self.representative = {}
+        for group in groups:
+            if len(group) < 2:
+                continue
+            for instance in group:
+                self.representative[instance.name] = group[0]
+        self.results = {}
+        self.surfaces = {}
+        self.copied = 0
+
+    def body_samples(self, source, obj, local_samples: np.ndarray) -> np.ndarray:
+        """Body weights under sample vertices placed by obj's world transform"""
+        if source.name not in self.surfaces:
+            weights, _names = read_weights(source)
+            self.surfaces[source.name] = (surface_mapping.build_surface(source), weights)
+        surface, weights = self.surfaces[source.name]
+        mapping = surface_mapping.map_points(surface, apply_matrix(local_samples, obj.matrix_world))
+        return surface_mapping.interpolate(surface, mapping, weights)
+
+    def __call__(self, source, target_mesh):
+        representative = self.representative.get(target_mesh.name, target_mesh)
+        result = self.results.get(representative.name)
+
+        if result is not None and result['source'] == source.name:
+            samples = self.body_samples(source, target_mesh, result['local_samples'])
+            if np.abs(samples - result['samples']).max(initial=0.0) <= self.tolerance:
+                write_weights(target_mesh, result['weights'], result['names'])
+                self.copied += 1
+                self.logger.info(f"  Copied weights from identical garment {representative.name}")
+                return
+
+        self.transfer_fn(source, target_mesh)
+
+        if representative is target_mesh and representative.name in self.representative:
+            local_coords = read_coordinates(target_mesh)
+            step = max(1, len(local_coords) // self.sample_count)
+            local_samples = local_coords[::step]
+            weights, names = read_weights(target_mesh)
+            self.results[target_mesh.name] = {
+                'source': source.name,
+                'local_samples': local_samples,
+                'samples': self.body_samples(source, target_mesh, local_samples),
+                'weights': weights,
+                'names': names,
+            }
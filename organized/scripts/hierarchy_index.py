@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Unity Hierarchy Dump Index
+==========================
+
+Stream-parses Unity hierarchy/armature dump files (hierarchy_dump.txt,
+unity_armature_bones.txt, ...) into a path trie with interned names and
+parent/depth arrays, and answers queries that are otherwise done with grep:
+
+- subtree of a path
+- regex over names or full paths
+- all nodes at a depth
+- diff of two dumps
+- cross-check against a Blender bone list: the console output of
+  list_all_bones() in blender-workspace/scripts/process_sun_fbx.py
+  ("  1. Name (親: Parent)") or plain names, one per line
+
+Runs with plain Python; no Blender needed.
+
+Usage:
+    python hierarchy_index.py <dump> [--subtree PATH] [--regex RE] [--depth N]
+                              [--diff OTHER_DUMP] [--bones BONES_TXT] [--armature NAME]
+"""
+
+import argparse
+import re
+import sys
+from array import array
+
+# Line formats written by SimpleHierarchyDump.cs and the analysis scripts
+LINE_PATTERNS = [
+    re.compile(r'^\s*(?:Bone Found|Potential Armature): (?P<path>.+?)\s*$'),
+    re.compile(r'^\s*[^|]+ \| (?P<path>.+?)(?: \[(?P<components>[^\]]*)\])?\s*$'),
+    re.compile(r'^\s*referencePath: (?P<path>.+?)\s*$'),
+]
+# A line of list_all_bones(): "  1. Name (親: Parent)"
+BONE_LIST_LINE = re.compile(r'^\s*\d+\. (?P<name>.+) \(親: .*\)\s*$')
+
+
+class HierarchyIndex:
+    """Prefix trie over slash-separated paths with interned names"""
+
+    def __init__(self):
+        self.strings = []
+        self.string_ids = {}
+        self.name = array('i')
+        self.parent = array('i')
+        self.depth = array('i')
+        self.children = []
+        self.components = {}
+        self.lookup = {}
+
+    def intern(self, text: str) -> int:
+        """Id of a name in the string table"""
+        string_id = self.string_ids.get(text)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(text)
+            self.string_ids[text] = string_id
+        return string_id
+
+    def add_path(self, path: str) -> int:
+        """Insert a path and all its prefixes; returns the node id"""
+        node = -1
+        for part in path.split('/'):
+            key = (node, self.intern(part))
+            child = self.lookup.get(key)
+            if child is None:
+                child = len(self.name)
+                self.lookup[key] = child
+                self.name.append(key[1])
+                self.parent.append(node)
+                self.depth.append(self.depth[node] + 1 if node >= 0 else 0)
+                self.children.append([])
+                if node >= 0:
+                    self.children[node].append(child)
+            node = child
+        return node
+
+    def __len__(self) -> int:
+        return len(self.name)
+
+    def roots(self) -> list:
+        return [node for node in range(len(self)) if self.parent[node] < 0]
+
+    def node_name(self, node: int) -> str:
+        return self.strings[self.name[node]]
+
+    def path_of(self, node: int) -> str:
+        parts = []
+        while node >= 0:
+            parts.append(self.strings[self.name[node]])
+            node = self.parent[node]
+        return '/'.join(reversed(parts))
+
+    def find(self, path: str) -> int:
+        """Node id of a path, or -1"""
+        node = -1
+        for part in path.split('/'):
+            string_id = self.string_ids.get(part)
+            node = self.lookup.get((node, string_id), -1) if string_id is not None else -1
+            if node < 0:
+                return -1
+        return node
+
+    def walk(self, node: int):
+        """Node ids of node and its descendants, depth first"""
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            yield current
+            stack.extend(reversed(self.children[current]))
+
+    def subtree(self, path: str) -> list:
+        node = self.find(path)
+        return [self.path_of(child) for child in self.walk(node)] if node >= 0 else []
+
+    def match(self, pattern: str, full_path: bool = False) -> list:
+        """Paths whose name (or full path) matches the regex"""
+        regex = re.compile(pattern)
+        if full_path:
+            return [self.path_of(node) for node in range(len(self)) if regex.search(self.path_of(node))]
+        # Test each distinct name once, then collect the nodes that use it
+        matching = {string_id for string_id, text in enumerate(self.strings) if regex.search(text)}
+        return [self.path_of(node) for node in range(len(self)) if self.name[node] in matching]
+
+    def at_depth(self, depth: int) -> list:
+        return [self.path_of(node) for node in range(len(self)) if self.depth[node] == depth]
+
+    def child_names(self, node: int) -> dict:
+        nodes = self.children[node] if node >= 0 else self.roots()
+        return {self.node_name(child): child for child in nodes}
+
+    def diff(self, other: 'HierarchyIndex') -> tuple:
+        """(paths only in self, paths only in other), comparing both tries in one walk"""
+        only_self = []
+        only_other = []
+        stack = [(-1, -1)]
+        while stack:
+            mine, theirs = stack.pop()
+            my_children = self.child_names(mine)
+            their_children = other.child_names(theirs)
+            for name, node in my_children.items():
+                if name in their_children:
+                    stack.append((node, their_children[name]))
+                else:
+                    only_self.extend(self.path_of(child) for child in self.walk(node))
+            for name, node in their_children.items():
+                if name not in my_children:
+                    only_other.extend(other.path_of(child) for child in other.walk(node))
+        return sorted(only_self), sorted(only_other)
+
+    def cross_check(self, bone_names, armature: str = None, ignore_leaf_bones: bool = True) -> tuple:
+        """(bones missing in Unity, Unity transforms missing in Blender) under the armature
+
+        Leaf bones added by the FBX exporter (``*_end``) are ignored by default.
+        """
+        if armature:
+            nodes = [node for node in range(len(self)) if self.node_name(node) == armature]
+        else:
+            nodes = self.roots()
+
+        unity_names = set()
+        for armature_node in nodes:
+            for node in self.walk(armature_node):
+                if node != armature_node:
+                    unity_names.add(self.node_name(node))
+        if ignore_leaf_bones:
+            unity_names = {name for name in unity_names if not name.endswith('_end')}
+
+        bone_names = set(bone_names)
+        return sorted(bone_names - unity_names), sorted(unity_names - bone_names)
+
+
+def parse_dump(path: str) -> HierarchyIndex:
+    """Stream-parse a dump file into a HierarchyIndex"""
+    index = HierarchyIndex()
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if line.startswith('==='):
+                continue
+            for pattern in LINE_PATTERNS:
+                found = pattern.match(line)
+                if found:
+                    node = index.add_path(found.group('path'))
+                    components = found.groupdict().get('components')
+                    if components:
+                        index.components[node] = components.split(', ')
+                    break
+    return index
+
+
+def read_bone_list(path: str) -> list:
+    """Bone names from list_all_bones() output or a plain one-name-per-line file"""
+    names = []
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.rstrip('\r\n')
+            if not line.strip() or line.lstrip().startswith('==='):
+                continue
+            found = BONE_LIST_LINE.match(line)
+            names.append(found.group('name') if found else line.strip())
+    return names
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Query Unity hierarchy dump files")
+    parser.add_argument('dump', help="hierarchy_dump.txt, unity_armature_bones.txt, ...")
+    parser.add_argument('--subtree', help="print the subtree of a full path")
+    parser.add_argument('--regex', help="print paths whose name matches a regex")
+    parser.add_argument('--full-path', action='store_true', help="match --regex against full paths")
+    parser.add_argument('--depth', type=int, help="print all paths at a depth (0 = scene roots)")
+    parser.add_argument('--diff', help="print paths that differ from another dump")
+    parser.add_argument('--bones', help="list_all_bones() output, or Blender bone names one per line, "
+                                        "to cross-check")
+    parser.add_argument('--armature', help="armature transform name for --bones, e.g. Armature.JamCommon")
+    args = parser.parse_args(argv)
+
+    index = parse_dump(args.dump)
+    print(f"Indexed {len(index)} transforms ({len(index.strings)} distinct names) from {args.dump}")
+
+    if args.subtree:
+        print('\n'.join(index.subtree(args.subtree)))
+    if args.regex:
+        print('\n'.join(index.match(args.regex, args.full_path)))
+    if args.depth is not None:
+        print('\n'.join(index.at_depth(args.depth)))
+    if args.diff:
+        only_self, only_other = index.diff(parse_dump(args.diff))
+        print(f"Only in {args.dump}: {len(only_self)}")
+        print('\n'.join(f"- {path}" for path in only_self))
+        print(f"Only in {args.diff}: {len(only_other)}")
+        print('\n'.join(f"+ {path}" for path in only_other))
+    if args.bones:
+        names = read_bone_list(args.bones)
+        missing_unity, missing_blender = index.cross_check(names, args.armature)
+        print(f"Blender bones missing in Unity: {len(missing_unity)}")
+        print('\n'.join(f"  {name}" for name in missing_unity))
+        print(f"Unity transforms missing in Blender: {len(missing_blender)}")
+        print('\n'.join(f"  {name}" for name in missing_blender))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+FBX Import Cache
+================
+
+Keeps the result of each FBX import as a .blend, keyed by the FBX content
+hash, so the same body (or any unchanged FBX) is parsed only once. Later runs
+append the cached objects instead, which is much faster than the Python FBX
+importer.
+
+Only the imported objects and the data they use are written
+(``bpy.data.libraries.write``), not the whole session.
+
+Per entry the cache directory holds:
+
+- <key>.blend  the imported objects
+- <key>.json   source path, content hash, Blender version, last use
+
+The key covers the file content, the Blender version and the cache format,
+so a changed FBX or a Blender upgrade misses. Entries of older versions of
+the same source file are removed when a new one is stored, and the least
+recently used entries beyond MAX_ENTRIES are pruned.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import bpy
+
+CACHE_VERSION = 1
+# Data an appended cache entry can bring along
+APPENDED_DATA = ('objects', 'meshes', 'armatures', 'materials', 'images', 'textures',
+                 'node_groups', 'actions', 'shape_keys', 'collections')
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(content_hash: str) -> str:
+    """Entry key for a content hash under this Blender version and cache format"""
+    salt = f"{CACHE_VERSION}:{bpy.app.version_string}:{content_hash}"
+    return hashlib.sha256(salt.encode('utf-8')).hexdigest()[:32]
+
+
+def cache_paths(cache_dir: str, key: str) -> tuple:
+    """(.blend path, metadata path) of a cache entry"""
+    base = os.path.join(cache_dir, key)
+    return base + ".blend", base + ".json"
+
+
+def read_entries(cache_dir: str) -> dict:
+    """{key: metadata} of every complete entry"""
+    entries = {}
+    for name in os.listdir(cache_dir):
+        key, ext = os.path.splitext(name)
+        if ext != '.json' or not os.path.exists(cache_paths(cache_dir, key)[0]):
+            continue
+        try:
+            with open(os.path.join(cache_dir, name), encoding='utf-8') as f:
+                entries[key] = json.load(f)
+        except (OSError, ValueError):
+            continue
+    return entries
+
+
+def remove_entry(cache_dir: str, key: str):
+    for path in cache_paths(cache_dir, key):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def write_meta(meta_path: str, meta: dict):
+    with open(meta_path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+def prune(cache_dir: str, source: str, keep: str, max_entries: int, logger):
+    """Drop stale versions of source and the least recently used entries beyond max_entries"""
+    entries = read_entries(cache_dir)
+    for key, meta in list(entries.items()):
+        if key != keep and meta.get('source') == source:
+            remove_entry(cache_dir, key)
+            del entries[key]
+            logger.info(f"  Removed stale import cache entry for {os.path.basename(source)}")
+
+    by_use = sorted(entries, key=lambda key: entries[key].get('last_used', 0), reverse=True)
+    for key in by_use[max_entries:]:
+        if key != keep:
+            remove_entry(cache_dir, key)
+
+
+def data_snapshot() -> set:
+    """Every datablock an append could add, to undo a failed one"""
+    return {block for attr in APPENDED_DATA for block in getattr(bpy.data, attr, ())}
+
+
+def remove_new_data(before: set) -> int:
+    """Remove datablocks created since a data_snapshot()"""
+    added = [block for block in data_snapshot() if block not in before]
+    if added:
+        bpy.data.batch_remove(added)
+    return len(added)
+
+
+def append_cached(blend_path: str) -> list:
+    """Append all objects of a cache entry to the current scene"""
+    with bpy.data.libraries.load(blend_path, link=False) as (data_from, data_to):
+        data_to.objects = data_from.objects
+
+    objects = [obj for obj in data_to.objects if obj is not None]
+    collection = bpy.context.scene.collection
+    for obj in objects:
+        collection.objects.link(obj)
+    return objects
+
+
+def store(cache_dir: str, key: str, source: str, content_hash: str, objects: list):
+    """Write imported objects (and the data they use) as a cache entry"""
+    blend_path, meta_path = cache_paths(cache_dir, key)
+    temp_path = blend_path[:-len(".blend")] + ".tmp.blend"
+    bpy.data.libraries.write(temp_path, set(objects), compress=False)
+    os.replace(temp_path, blend_path)
+    write_meta(meta_path, {
+        'source': source,
+        'hash': content_hash,
+        'blender': bpy.app.version_string,
+        'objects': len(objects),
+        'last_used': time.time(),
+    })
+
+
+def import_with_cache(filepath: str, import_fn, cache_dir: str, max_entries: int, logger):
+    """Append a cached import of filepath, or run import_fn(filepath) and cache its objects"""
+    os.makedirs(cache_dir, exist_ok=True)
+    source = os.path.abspath(filepath)
+    content_hash = file_hash(filepath)
+    key = cache_key(content_hash)
+    blend_path, meta_path = cache_paths(cache_dir, key)
+
+    if os.path.exists(blend_path) and os.path.exists(meta_path):
+        appended_before = data_snapshot()
+        try:
+            started = time.perf_counter()
+            objects = append_cached(blend_path)
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            meta['last_used'] = time.time()
+            write_meta(meta_path, meta)
+            logger.info(f"✓ Import cache hit: {len(objects)} objects in "
+                        f"{time.perf_counter() - started:.2f}s ({key})")
+            return True
+        except Exception as e:
+            # A partial append would leave a second body for the FBX import to duplicate
+            removed = remove_new_data(appended_before)
+            logger.warning(f"Import cache entry unreadable ({removed} partially appended datablocks "
+                           f"removed), importing FBX: {e}")
+            remove_entry(cache_dir, key)
+
+    before = set(bpy.data.objects)
+    if not import_fn(filepath):
+        return False
+    objects = [obj for obj in bpy.data.objects if obj not in before]
+
+    try:
+        store(cache_dir, key, source, content_hash, objects)
+        prune(cache_dir, source, key, max_entries, logger)
+        logger.info(f"Import cached: {len(objects)} objects ({key})")
+    except Exception as e:
+        logger.warning(f"Could not write import cache: {e}")
+    return True
@@ -0,0 +1,141 @@
+"""
+Layered Garment Transfer
+========================
+
+Weights outer garments from the layers beneath them instead of from the body
+alone, so a coat follows the shirt under it (and an obi the robe) rather than
+the body under both, which makes it clip during animation.
+
+Garments are ordered by their median distance from the body. Each garment is
+then transferred from the nearest surface among the body and all garments
+already weighted before it, interpolating that surface's weights
+barycentrically.
+
+The combined index is a list of per-layer BVH trees: adding a weighted garment
+builds only its own tree, and queries run the body first, then each layer
+limited to the best distance found so far.
+"""
+
+import numpy as np
+from mathutils import Vector
+
+import surface_mapping
+from weight_arrays import align_weights, read_coordinates, read_weights, write_weights
+
+
+def body_distance(surface: dict, obj, samples: int) -> float:
+    """Median distance of a garment's (sampled) vertices from the body surface"""
+    coords = read_coordinates(obj, world=True)
+    if not len(coords):
+        return 0.0
+    sampled = coords[::max(1, len(coords) // samples)]
+    mapping = surface_mapping.map_points(surface, sampled)
+    return float(np.median(mapping['distance']))
+
+
+def order_layers(body, garments, samples: int, logger) -> list:
+    """Garments sorted from the innermost to the outermost layer"""
+    surface = surface_mapping.build_surface(body)
+    distances = {garment.name: body_distance(surface, garment, samples) for garment in garments}
+    ordered = sorted(garments, key=lambda garment: (distances[garment.name], garment.name))
+
+    logger.info("=== GARMENT LAYER ORDER ===")
+    for layer, garment in enumerate(ordered, 1):
+        logger.info(f"  Layer {layer}: {garment.name} ({distances[garment.name]:.4f} from body)")
+    return ordered
+
+
+class LayeredTransfer:
+    """Transfer callable sampling the nearest of the body and earlier garments"""
+
+    def __init__(self, logger, max_distance: float = None):
+        self.logger = logger
+        self.max_distance = max_distance
+        self.bodies = {}
+        self.names = None
+        self.layers = []
+        self.pending = []
+        self.inner = None
+
+    def body_layer(self, source) -> dict:
+        """Surface and weights of a body (or body proxy), built once per run"""
+        if source.name not in self.bodies:
+            weights, names = read_weights(source)
+            if self.names is None:
+                self.names = names
+            self.bodies[source.name] = {
+                'surface': surface_mapping.build_surface(source),
+                'weights': align_weights(weights, names, self.names),
+            }
+        return self.bodies[source.name]
+
+    def add_pending_layers(self):
+        """Index garments transferred since the last call, with their final weights"""
+        for obj in self.pending:
+            weights, names = read_weights(obj)
+            if not names or not len(obj.data.polygons):
+                continue
+            self.layers.append({
+                'name': obj.name,
+                'surface': surface_mapping.build_surface(obj),
+                'weights': align_weights(weights, names, self.names),
+            })
+        self.pending = []
+
+    def sample(self, source, points: np.ndarray) -> tuple:
+        """Weights at world-space points from the nearest layer: (weights, names)"""
+        self.add_pending_layers()
+        layers = [self.body_layer(source)] + self.layers
+
+        count = len(points)
+        best_layer = np.full(count, -1, dtype=np.int64)
+        triangle_index = np.full(count, -1, dtype=np.int64)
+        locations = np.zeros((count, 3), dtype=np.float32)
+
+        # Points beyond max_distance from every layer stay unweighted
+        trees = [layer['surface']['tree'] for layer in layers]
+        for i, point in enumerate(points):
+            point = Vector(point)
+            best = self.max_distance
+            for layer_index, tree in enumerate(trees):
+                if best is None:
+                    location, _normal, index, distance = tree.find_nearest(point)
+                else:
+                    location, _normal, index, distance = tree.find_nearest(point, best)
+                if location is not None and (best_layer[i] < 0 or distance < best):
+                    best = distance
+                    best_layer[i] = layer_index
+                    triangle_index[i] = index
+                    locations[i] = location
+
+        weights = np.zeros((count, len(self.names)), dtype=np.float32)
+        for layer_index, layer in enumerate(layers):
+            chosen = best_layer == layer_index
+            if not chosen.any():
+                continue
+            surface = layer['surface']
+            corners = surface['coords'][surface['triangles'][triangle_index[chosen]]]
+            mapping = {
+                'triangle_index': triangle_index[chosen],
+                'barycentric': surface_mapping.barycentric(locations[chosen], corners),
+            }
+            weights[chosen] = surface_mapping.interpolate(surface, mapping, layer['weights'])
+
+        from_layers = int((best_layer > 0).sum())
+        if from_layers:
+            self.logger.info(f"  Layered: {from_layers}/{count} vertices from inner garments")
+        return weights, self.names
+
+    def transfer_direct(self, source, target_mesh):
+        """Weight a whole garment from the nearest layers"""
+        weights, names = self.sample(source, read_coordinates(target_mesh, world=True))
+        write_weights(target_mesh, weights, names)
+
+    def wrap(self, transfer_fn) -> 'LayeredTransfer':
+        """Use transfer_fn (e.g. a symmetric transfer sampling through this index) per garment"""
+        self.inner = transfer_fn
+        return self
+
+    def __call__(self, source, target_mesh):
+        (self.inner or self.transfer_direct)(source, target_mesh)
+        self.pending.append(target_mesh)
@@ -0,0 +1,200 @@
+"""
+Material Deduplication
+======================
+
+Marvelous Designer exports one material per fabric panel even when panels use
+the same fabric. This stage hashes each material's node setup (node types,
+every editable node property, color ramp stops, curve points, input values,
+links) and texture references, points every slot at one shared
+material per hash, collapses mesh slots that became identical, and writes a
+manifest of the mapping so the Unity lilToon conversion only has to handle the
+remaining materials.
+"""
+
+import hashlib
+import json
+import os
+
+import bpy
+import numpy as np
+
+FLOAT_DECIMALS = 6
+# Node properties that only affect the editor, or are keyed separately
+IGNORED_NODE_PROPERTIES = {
+    'name', 'label', 'location', 'width', 'width_hidden', 'height', 'select', 'hide',
+    'show_options', 'show_preview', 'show_texture', 'use_custom_color', 'color', 'parent',
+    'image', 'node_tree',
+}
+
+
+def normalize_value(value):
+    """Convert an RNA value to a hashable, rounded representation"""
+    if isinstance(value, float):
+        return round(value, FLOAT_DECIMALS)
+    if isinstance(value, (int, bool, str)) or value is None:
+        return value
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(value))
+    try:
+        return tuple(normalize_value(item) for item in value)
+    except TypeError:
+        return str(value)
+
+
+def image_reference(image) -> tuple:
+    """Identify an image by its file (or name when packed/generated) and colour space"""
+    if image is None:
+        return None
+    if image.packed_file or not image.filepath:
+        source = ('name', image.name)
+    else:
+        source = ('file', os.path.normcase(os.path.abspath(bpy.path.abspath(image.filepath))))
+    return source + (image.colorspace_settings.name,)
+
+
+def rna_settings(struct, ignored=()) -> tuple:
+    """Every editable property of an RNA struct; datablock pointers by name"""
+    settings = []
+    for prop in struct.bl_rna.properties:
+        if prop.is_readonly or prop.type == 'COLLECTION' or prop.identifier in ignored:
+            continue
+        value = getattr(struct, prop.identifier, None)
+        if prop.type == 'POINTER':
+            value = getattr(value, 'name', None)
+        settings.append((prop.identifier, normalize_value(value)))
+    return tuple(settings)
+
+
+def ramp_key(ramp) -> tuple:
+    """Interpolation and stops of a color ramp"""
+    stops = tuple((normalize_value(element.position), normalize_value(element.color))
+                  for element in ramp.elements)
+    return rna_settings(ramp), stops
+
+
+def curve_mapping_key(mapping) -> tuple:
+    """Clipping and control points of a curve mapping"""
+    curves = tuple(
+        tuple((normalize_value(point.location), point.handle_type) for point in curve.points)
+        for curve in mapping.curves
+    )
+    return rna_settings(mapping), curves
+
+
+def node_key(node) -> tuple:
+    """Settings of a node that affect shading, independent of its name"""
+    inputs = tuple(
+        (socket.identifier, normalize_value(getattr(socket, 'default_value', None)))
+        for socket in node.inputs if not socket.is_linked
+    )
+    settings = rna_settings(node, IGNORED_NODE_PROPERTIES)
+    # Ramps and curves are read-only structs whose contents are not node properties
+    ramp = getattr(node, 'color_ramp', None)
+    mapping = getattr(node, 'mapping', None)
+    nested = (
+        ramp_key(ramp) if ramp is not None else None,
+        curve_mapping_key(mapping) if hasattr(mapping, 'curves') else None,
+    )
+    # Group nodes are only equal when their group contents are
+    group = getattr(node, 'node_tree', None)
+    group_key = tree_key(group) if group else None
+    return (node.bl_idname, inputs, settings, nested,
+            image_reference(getattr(node, 'image', None)), group_key)
+
+
+def tree_key(node_tree) -> tuple:
+    """Nodes and links of a node tree, independent of node names"""
+    keys = {node.name: repr(node_key(node)) for node in node_tree.nodes}
+    return (
+        ('nodes', tuple(sorted(keys.values()))),
+        ('links', tuple(sorted(
+            (keys[link.from_node.name], link.from_socket.identifier,
+             keys[link.to_node.name], link.to_socket.identifier)
+            for link in node_tree.links
+        ))),
+    )
+
+
+def material_signature(material) -> str:
+    """Hash of everything about a material that Unity conversion would see"""
+    settings = [
+        ('diffuse_color', normalize_value(material.diffuse_color)),
+        ('blend_method', getattr(material, 'blend_method', None)),
+        ('use_backface_culling', material.use_backface_culling),
+        ('use_nodes', material.use_nodes),
+    ]
+
+    if material.use_nodes and material.node_tree:
+        settings.extend(tree_key(material.node_tree))
+
+    return hashlib.sha1(repr(settings).encode('utf-8')).hexdigest()
+
+
+def find_duplicate_materials(materials) -> dict:
+    """Map every material name to the name of its canonical (first seen) twin"""
+    canonical = {}
+    mapping = {}
+    for material in sorted(materials, key=lambda mat: mat.name):
+        signature = material_signature(material)
+        canonical.setdefault(signature, material)
+        mapping[material.name] = canonical[signature].name
+    return mapping
+
+
+def collapse_material_slots(mesh) -> int:
+    """Merge slots of a mesh that point at the same material; returns slots removed"""
+    materials = list(mesh.materials)
+    unique = []
+    for material in materials:
+        if material not in unique:
+            unique.append(material)
+    if len(unique) == len(materials):
+        return 0
+
+    slot_map = np.array([unique.index(material) for material in materials], dtype=np.int32)
+    material_index = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('material_index', material_index)
+
+    mesh.materials.clear()
+    for material in unique:
+        mesh.materials.append(material)
+    mesh.polygons.foreach_set('material_index', slot_map[np.minimum(material_index, len(slot_map) - 1)])
+
+    return len(materials) - len(unique)
+
+
+def deduplicate_materials(logger) -> dict:
+    """Point all mesh slots at shared materials and drop the duplicates"""
+    logger.info("=== DEDUPLICATING MATERIALS ===")
+
+    meshes = [obj for obj in bpy.data.objects if obj.type == 'MESH']
+    used = {slot.material for obj in meshes for slot in obj.material_slots if slot.material}
+    mapping = find_duplicate_materials(used)
+
+    for obj in meshes:
+        for slot in obj.material_slots:
+            if slot.material and mapping[slot.material.name] != slot.material.name:
+                slot.material = bpy.data.materials[mapping[slot.material.name]]
+
+    removed_slots = 0
+    for mesh in {obj.data for obj in meshes}:
+        removed_slots += collapse_material_slots(mesh)
+
+    for name, target in mapping.items():
+        if name != target and bpy.data.materials[name].users == 0:
+            bpy.data.materials.remove(bpy.data.materials[name])
+
+    shared = len(set(mapping.values()))
+    logger.info(f"Materials: {len(mapping)} -> {shared} ({removed_slots} mesh slots collapsed)")
+    return mapping
+
+
+def write_material_manifest(mapping: dict, path: str, logger):
+    """Save the {shared material: [original materials]} manifest as JSON"""
+    manifest = {}
+    for name, target in sorted(mapping.items()):
+        manifest.setdefault(target, []).append(name)
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    logger.info(f"Material manifest written: {path}")
@@ -0,0 +1,224 @@
+"""
+Seam Welding and Degenerate Geometry Cleanup
+============================================
+
+Marvelous Designer garments arrive with duplicated vertices along every seam
+and panel border, plus zero-area faces. This pre-transfer stage:
+
+- welds vertices closer than the weld distance, found through a spatial
+  hash grid that also checks the neighbouring cells
+- drops collapsed loops, faces with fewer than three distinct corners and
+  faces below a minimum area
+- optionally drops faces that welding made duplicates of another. Welded
+  double-sided panels end up as two faces on the same corners; both are kept
+  by default, since backface-culled shaders need each side
+- rebuilds each mesh in one pass, keeping UVs, materials, generic
+  attributes and the original split normals so welded seams keep their
+  shading
+
+Everything runs on foreach_get/foreach_set arrays.
+"""
+
+import bpy
+import numpy as np
+
+from mesh_merge import build_mesh, read_attributes
+from weight_arrays import read_coordinates, read_loop_normals
+
+
+def starts_from_totals(totals: np.ndarray) -> np.ndarray:
+    """Loop start of each polygon given the polygon loop counts"""
+    return np.concatenate(([0], np.cumsum(totals)))[:-1].astype(np.int64)
+
+
+def next_loop_indices(loop_starts: np.ndarray, loop_totals: np.ndarray) -> np.ndarray:
+    """Index of the following loop within the same polygon, wrapping around"""
+    next_loop = np.arange(loop_totals.sum(), dtype=np.int64) + 1
+    last = loop_starts + loop_totals - 1
+    next_loop[last] = loop_starts
+    return next_loop
+
+
+def polygon_areas(coords: np.ndarray, loop_vertices: np.ndarray,
+                  loop_starts: np.ndarray, loop_totals: np.ndarray) -> np.ndarray:
+    """Polygon areas with Newell's method, vectorized over all loops"""
+    if not len(loop_starts):
+        return np.zeros(0, dtype=np.float32)
+    points = coords[loop_vertices]
+    following = points[next_loop_indices(loop_starts, loop_totals)]
+    normals = np.add.reduceat(np.cross(points, following), loop_starts, axis=0)
+    return 0.5 * np.linalg.norm(normals, axis=1)
+
+
+def weld_clusters(coords: np.ndarray, distance: float) -> np.ndarray:
+    """Cluster label of each vertex; vertices within distance of each other share one
+
+    Chains of close vertices join one cluster, and the label is the lowest
+    vertex index in it.
+    """
+    count = len(coords)
+    labels = np.arange(count, dtype=np.int64)
+    if distance <= 0.0 or count < 2:
+        return labels
+
+    # Cells of the weld distance: close pairs share a cell or are neighbours
+    cells = np.floor(coords / distance).astype(np.int64)
+    cells -= cells.min(axis=0) - 1
+    extent = cells.max(axis=0) + 2
+    keys = (cells[:, 0] * extent[1] + cells[:, 1]) * extent[2] + cells[:, 2]
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+
+    firsts = []
+    seconds = []
+    for dx, dy, dz in np.ndindex(3, 3, 3):
+        neighbour = keys + ((dx - 1) * extent[1] + (dy - 1)) * extent[2] + (dz - 1)
+        low = np.searchsorted(sorted_keys, neighbour, 'left')
+        counts = np.searchsorted(sorted_keys, neighbour, 'right') - low
+        if not counts.any():
+            continue
+        first = np.repeat(np.arange(count), counts)
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        second = order[np.repeat(low, counts) + within]
+        offsets = coords[first] - coords[second]
+        close = (first < second) & (np.einsum('ij,ij->i', offsets, offsets) <= distance * distance)
+        firsts.append(first[close])
+        seconds.append(second[close])
+
+    first = np.concatenate(firsts)
+    second = np.concatenate(seconds)
+    # Propagate the lowest label along close pairs until every pair agrees
+    while len(first):
+        previous = labels.copy()
+        np.minimum.at(labels, second, labels[first])
+        np.minimum.at(labels, first, labels[second])
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            break
+    return labels
+
+
+def duplicate_faces(loops: np.ndarray, starts: np.ndarray, totals: np.ndarray) -> np.ndarray:
+    """Mask of faces using the same vertices as an earlier face"""
+    duplicate = np.zeros(len(totals), dtype=bool)
+    for total in np.unique(totals):
+        faces = np.flatnonzero(totals == total)
+        corners = np.sort(loops[starts[faces, None] + np.arange(total)], axis=1)
+        _corners, first = np.unique(corners, axis=0, return_index=True)
+        duplicate[faces] = True
+        duplicate[faces[first]] = False
+    return duplicate
+
+
+def weld_mesh(obj, weld_distance: float, min_face_area: float, drop_duplicates: bool = False) -> tuple:
+    """Weld coincident vertices and drop degenerate faces; returns (before, after) vertex counts"""
+    mesh = obj.data
+    coords = read_coordinates(obj)
+    vertex_count = len(coords)
+
+    loop_vertices = np.empty(len(mesh.loops), dtype=np.int64)
+    mesh.loops.foreach_get('vertex_index', loop_vertices)
+    loop_starts = np.empty(len(mesh.polygons), dtype=np.int64)
+    mesh.polygons.foreach_get('loop_start', loop_starts)
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int64)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+    material_index = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('material_index', material_index)
+    use_smooth = np.empty(len(mesh.polygons), dtype=bool)
+    mesh.polygons.foreach_get('use_smooth', use_smooth)
+    loop_normals = read_loop_normals(mesh)
+    attributes = read_attributes(mesh)
+
+    uvs = []
+    for uv_layer in mesh.uv_layers:
+        uv = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+        uv_layer.data.foreach_get('uv', uv)
+        uvs.append((uv_layer.name, uv.reshape(-1, 2)))
+
+    # Vertices within the weld distance become one vertex
+    first, cluster = np.unique(weld_clusters(coords, weld_distance), return_inverse=True)
+    cluster = cluster.ravel()
+    welded_coords = coords[first]
+    welded_loops = cluster[loop_vertices]
+
+    # Drop loops that collapsed onto their neighbour
+    polygon_of_loop = np.repeat(np.arange(len(loop_starts)), loop_totals)
+    collapsed = welded_loops == welded_loops[next_loop_indices(loop_starts, loop_totals)]
+    kept_loops = ~collapsed
+    totals = np.bincount(polygon_of_loop[kept_loops], minlength=len(loop_starts))
+    starts = starts_from_totals(totals)
+    loops = welded_loops[kept_loops]
+    kept_polygon_of_loop = polygon_of_loop[kept_loops]
+
+    # Faces need three distinct corners and a non-zero area
+    pairs = np.unique(kept_polygon_of_loop * len(welded_coords) + loops)
+    distinct = np.bincount(pairs // len(welded_coords), minlength=len(loop_starts))
+    valid = (totals >= 3) & (distinct == totals)
+    areas = np.zeros(len(loop_starts), dtype=np.float32)
+    nonempty = totals > 0
+    areas[nonempty] = polygon_areas(welded_coords, loops, starts[nonempty], totals[nonempty])
+    valid &= areas > min_face_area
+
+    # Welded double-sided panels leave two faces on the same corners; optionally keep the first
+    if drop_duplicates:
+        valid_faces = np.flatnonzero(valid)
+        valid[valid_faces[duplicate_faces(loops, starts[valid], totals[valid])]] = False
+
+    loop_mask = valid[kept_polygon_of_loop]
+    final_loops = loops[loop_mask]
+    final_totals = totals[valid]
+    final_starts = starts_from_totals(final_totals).astype(np.int32)
+    source_loops = np.flatnonzero(kept_loops)[loop_mask]
+
+    # Keep only vertices still referenced by a face
+    used, final_loops = np.unique(final_loops, return_inverse=True)
+
+    # Welded vertices keep the attribute values of their lowest-index original
+    sources = {'POINT': first[used], 'CORNER': source_loops, 'FACE': np.flatnonzero(valid)}
+
+    buffers = {
+        'coords': welded_coords[used],
+        'loop_vertices': final_loops.ravel().astype(np.int32),
+        'loop_starts': final_starts,
+        'material_index': material_index[valid],
+        'use_smooth': use_smooth[valid],
+        'uvs': [(uv_name, uv[source_loops]) for uv_name, uv in uvs],
+        'materials': list(mesh.materials),
+        'normals': loop_normals[source_loops],
+        'attributes': [(attr_name, data_type, domain, values[sources[domain]])
+                       for attr_name, data_type, domain, values in attributes],
+    }
+    new_mesh = build_mesh(mesh.name, buffers)
+
+    mesh_name = mesh.name
+    mesh.user_remap(new_mesh)
+    bpy.data.meshes.remove(mesh)
+    new_mesh.name = mesh_name
+
+    return vertex_count, len(used)
+
+
+def clean_garments(target_meshes, weld_distance: float, min_face_area: float, logger,
+                   drop_duplicates: bool = False) -> dict:
+    """Weld seams and remove degenerate faces on every garment before transfer"""
+    logger.info("=== CLEANING GARMENT GEOMETRY ===")
+    report = {}
+    cleaned = set()
+
+    for target_mesh in target_meshes:
+        if target_mesh.data.shape_keys:
+            logger.info(f"  {target_mesh.name}: skipped (has shape keys)")
+            continue
+        if target_mesh.data.name in cleaned or not len(target_mesh.data.polygons):
+            continue
+
+        before, after = weld_mesh(target_mesh, weld_distance, min_face_area, drop_duplicates)
+        cleaned.add(target_mesh.data.name)
+        report[target_mesh.name] = (before, after)
+        reduction = 1.0 - after / before if before else 0.0
+        logger.info(f"  {target_mesh.name}: {before} -> {after} vertices (-{reduction:.1%})")
+
+    total_before = sum(before for before, _after in report.values())
+    total_after = sum(after for _before, after in report.values())
+    logger.info(f"Cleaned {len(report)} garments: {total_before} -> {total_after} vertices")
+    return report
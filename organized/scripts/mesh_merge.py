@@ -0,0 +1,354 @@
+"""
+Same-Material Garment Merging
+=============================
+
+Merges garments that are deformed by the same armature and use the same
+materials into one mesh, so Unity gets one SkinnedMeshRenderer (and one
+skinning job) per material set instead of one per Marvelous Designer panel.
+
+Vertex, polygon, UV, material, weight and generic attribute buffers, plus
+split normals, are concatenated with foreach_get/foreach_set; no selection
+or bpy.ops.object.join is involved. Edge attributes are not carried over,
+since edges are rebuilt from the faces.
+
+A name map records which vertex/loop/polygon ranges of each merged mesh came
+from which garment, so undo_merge() can split it back apart.
+"""
+
+import json
+
+import bpy
+import numpy as np
+from mathutils import Matrix
+
+from weight_arrays import (align_weights, apply_matrix, read_coordinates, read_loop_normals,
+                           read_weights, write_weights)
+
+# Attribute data type -> (foreach property, components, dtype)
+ATTRIBUTE_LAYOUTS = {
+    'FLOAT': ('value', 1, np.float32),
+    'INT': ('value', 1, np.int32),
+    'INT8': ('value', 1, np.int32),
+    'BOOLEAN': ('value', 1, bool),
+    'FLOAT2': ('vector', 2, np.float32),
+    'INT32_2D': ('value', 2, np.int32),
+    'FLOAT_VECTOR': ('vector', 3, np.float32),
+    'FLOAT_COLOR': ('color', 4, np.float32),
+    'BYTE_COLOR': ('color', 4, np.float32),
+    'QUATERNION': ('value', 4, np.float32),
+}
+ATTRIBUTE_DOMAINS = ('POINT', 'CORNER', 'FACE')
+# Written through dedicated buffers (or rebuilt) instead of as generic attributes
+BUILTIN_ATTRIBUTES = {'position', 'material_index', 'sharp_face', 'custom_normal'}
+
+
+def get_armature_object(obj):
+    """Armature deforming obj through its armature modifier"""
+    for mod in obj.modifiers:
+        if mod.type == 'ARMATURE' and mod.object:
+            return mod.object
+    return None
+
+
+def read_attributes(mesh) -> list:
+    """Generic point, corner and face attributes as (name, data type, domain, (N, C) array)"""
+    uv_names = {uv_layer.name for uv_layer in mesh.uv_layers}
+    attributes = []
+    for attribute in mesh.attributes:
+        if (attribute.name.startswith('.') or attribute.name in BUILTIN_ATTRIBUTES
+                or attribute.name in uv_names or attribute.domain not in ATTRIBUTE_DOMAINS
+                or attribute.data_type not in ATTRIBUTE_LAYOUTS):
+            continue
+        prop, components, dtype = ATTRIBUTE_LAYOUTS[attribute.data_type]
+        values = np.empty(len(attribute.data) * components, dtype=dtype)
+        attribute.data.foreach_get(prop, values)
+        attributes.append((attribute.name, attribute.data_type, attribute.domain,
+                           values.reshape(-1, components)))
+    return attributes
+
+
+def write_attributes(mesh, attributes: list):
+    """Create the attributes read by read_attributes on a new mesh"""
+    for name, data_type, domain, values in attributes:
+        attribute = mesh.attributes.get(name) or mesh.attributes.new(name, data_type, domain)
+        prop, _components, dtype = ATTRIBUTE_LAYOUTS[data_type]
+        attribute.data.foreach_set(prop, np.ascontiguousarray(values, dtype=dtype).ravel())
+
+
+def read_mesh_buffers(obj, armature) -> dict:
+    """Read the buffers needed to rebuild obj's mesh in the armature's space"""
+    mesh = obj.data
+    world_coords = read_coordinates(obj, world=True)
+
+    loop_vertices = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', loop_vertices)
+    loop_starts = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_start', loop_starts)
+    material_index = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('material_index', material_index)
+    use_smooth = np.empty(len(mesh.polygons), dtype=bool)
+    mesh.polygons.foreach_get('use_smooth', use_smooth)
+
+    uvs = []
+    for uv_layer in mesh.uv_layers:
+        uv = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+        uv_layer.data.foreach_get('uv', uv)
+        uvs.append((uv_layer.name, uv.reshape(-1, 2)))
+
+    weights, names = read_weights(obj)
+
+    # Normals follow the coordinates into the armature's space
+    to_armature = armature.matrix_world.inverted() @ obj.matrix_world
+    normal_matrix = np.array(to_armature.to_3x3().inverted().transposed(), dtype=np.float32)
+    normals = read_loop_normals(mesh) @ normal_matrix.T
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals = np.divide(normals, lengths, out=normals, where=lengths > 0.0)
+
+    return {
+        'coords': apply_matrix(world_coords, armature.matrix_world.inverted()),
+        'loop_vertices': loop_vertices,
+        'loop_starts': loop_starts,
+        'material_index': material_index,
+        'use_smooth': use_smooth,
+        'uvs': uvs,
+        'weights': weights,
+        'names': names,
+        'materials': [slot.material for slot in obj.material_slots],
+        'attributes': read_attributes(mesh),
+        'normals': normals if mesh.has_custom_normals else None,
+        'loop_normals': normals,
+    }
+
+
+def build_mesh(name: str, buffers: dict):
+    """Create a mesh datablock from raw buffers in one pass"""
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(buffers['coords']))
+    mesh.loops.add(len(buffers['loop_vertices']))
+    mesh.polygons.add(len(buffers['loop_starts']))
+
+    mesh.vertices.foreach_set('co', buffers['coords'].ravel())
+    mesh.loops.foreach_set('vertex_index', buffers['loop_vertices'])
+    mesh.polygons.foreach_set('loop_start', buffers['loop_starts'])
+    mesh.polygons.foreach_set('material_index', buffers['material_index'])
+    mesh.polygons.foreach_set('use_smooth', buffers['use_smooth'])
+
+    for uv_name, uv in buffers['uvs']:
+        uv_layer = mesh.uv_layers.new(name=uv_name)
+        uv_layer.data.foreach_set('uv', uv.ravel())
+
+    for material in buffers['materials']:
+        mesh.materials.append(material)
+
+    # No validate(): it may drop or reorder elements, and callers rely on the
+    # buffer order (merge name map ranges, per-loop normals)
+    mesh.update(calc_edges=True)
+    write_attributes(mesh, buffers.get('attributes', []))
+
+    if buffers.get('normals') is not None:
+        if hasattr(mesh, 'use_auto_smooth'):
+            mesh.use_auto_smooth = True
+        mesh.normals_split_custom_set(buffers['normals'].tolist())
+    return mesh
+
+
+def concatenate_buffers(parts: list) -> tuple:
+    """Concatenate per-garment buffers, returning merged buffers and index ranges"""
+    materials = []
+    for part in parts:
+        for material in part['materials']:
+            if material not in materials:
+                materials.append(material)
+
+    names = []
+    for part in parts:
+        names.extend(name for name in part['names'] if name not in names)
+
+    attribute_types = {}
+    for part in parts:
+        for name, data_type, domain, _values in part['attributes']:
+            attribute_types.setdefault(name, (data_type, domain))
+
+    uv_count = max((len(part['uvs']) for part in parts), default=0)
+    uv_names = [next(part['uvs'][i][0] for part in parts if len(part['uvs']) > i) for i in range(uv_count)]
+
+    merged = {key: [] for key in ('coords', 'loop_vertices', 'loop_starts', 'material_index',
+                                  'use_smooth', 'weights')}
+    merged_uvs = [[] for _ in range(uv_count)]
+    merged_attributes = {name: [] for name in attribute_types}
+    merged_normals = []
+    ranges = []
+    vertex_offset = loop_offset = polygon_offset = 0
+
+    for part in parts:
+        vertex_count = len(part['coords'])
+        loop_count = len(part['loop_vertices'])
+        polygon_count = len(part['loop_starts'])
+
+        slot_map = np.array([materials.index(material) for material in part['materials']] or [0],
+                            dtype=np.int32)
+
+        merged['coords'].append(part['coords'])
+        merged['loop_vertices'].append(part['loop_vertices'] + vertex_offset)
+        merged['loop_starts'].append(part['loop_starts'] + loop_offset)
+        merged['material_index'].append(slot_map[np.minimum(part['material_index'], len(slot_map) - 1)])
+        merged['use_smooth'].append(part['use_smooth'])
+        merged['weights'].append(align_weights(part['weights'], part['names'], names))
+        for i in range(uv_count):
+            uv = part['uvs'][i][1] if i < len(part['uvs']) else np.zeros((loop_count, 2), dtype=np.float32)
+            merged_uvs[i].append(uv)
+        merged_normals.append(part['loop_normals'])
+
+        # Parts without an attribute (or with a different type) get zeros
+        counts = {'POINT': vertex_count, 'CORNER': loop_count, 'FACE': polygon_count}
+        own = {name: (data_type, domain, values) for name, data_type, domain, values in part['attributes']}
+        for name, (data_type, domain) in attribute_types.items():
+            _prop, components, dtype = ATTRIBUTE_LAYOUTS[data_type]
+            values = own.get(name)
+            if values is None or values[:2] != (data_type, domain):
+                values = (data_type, domain, np.zeros((counts[domain], components), dtype=dtype))
+            merged_attributes[name].append(values[2])
+
+        ranges.append({
+            'vertex_start': vertex_offset, 'vertex_count': vertex_count,
+            'loop_start': loop_offset, 'loop_count': loop_count,
+            'polygon_start': polygon_offset, 'polygon_count': polygon_count,
+        })
+        vertex_offset += vertex_count
+        loop_offset += loop_count
+        polygon_offset += polygon_count
+
+    buffers = {key: np.concatenate(values) for key, values in merged.items()}
+    buffers['uvs'] = [(uv_names[i], np.concatenate(merged_uvs[i])) for i in range(uv_count)]
+    buffers['names'] = names
+    buffers['materials'] = materials
+    buffers['attributes'] = [(name, data_type, domain, np.concatenate(merged_attributes[name]))
+                             for name, (data_type, domain) in attribute_types.items()]
+    # Custom normals are kept when any part had them; the others keep their computed ones
+    buffers['normals'] = (np.concatenate(merged_normals)
+                          if any(part['normals'] is not None for part in parts) else None)
+    return buffers, ranges
+
+
+def create_skinned_object(name: str, buffers: dict, armature, collection):
+    """Create a mesh object in the armature's space with weights and armature modifier"""
+    obj = bpy.data.objects.new(name, build_mesh(name, buffers))
+    collection.objects.link(obj)
+    obj.parent = armature
+    obj.matrix_parent_inverse.identity()
+    obj.matrix_world = armature.matrix_world
+
+    write_weights(obj, buffers['weights'], buffers['names'])
+    armature_mod = obj.modifiers.new(name="Armature", type='ARMATURE')
+    armature_mod.object = armature
+    armature_mod.use_vertex_groups = True
+    return obj
+
+
+def group_mergeable_garments(meshes) -> list:
+    """Group meshes by (armature, material set), keeping only groups of two or more"""
+    groups = {}
+    for obj in meshes:
+        armature = get_armature_object(obj)
+        # Merged meshes are rebuilt from buffers, which would drop shape keys
+        if armature is None or len(obj.vertex_groups) == 0 or obj.data.shape_keys:
+            continue
+        materials = tuple(sorted(slot.material.name for slot in obj.material_slots if slot.material))
+        groups.setdefault((armature.name, materials), []).append(obj)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def merge_garments(meshes, logger) -> dict:
+    """Merge same-armature, same-material garments; returns the name map"""
+    logger.info("=== MERGING GARMENTS BY MATERIAL ===")
+    groups = group_mergeable_garments(meshes)
+    name_map = {}
+    renderers_before = draws_before = renderers_after = draws_after = 0
+
+    for group in groups:
+        armature = get_armature_object(group[0])
+        collection = group[0].users_collection[0] if group[0].users_collection else bpy.context.scene.collection
+        parts = [read_mesh_buffers(obj, armature) for obj in group]
+        buffers, ranges = concatenate_buffers(parts)
+
+        material = buffers['materials'][0] if buffers['materials'] else None
+        material_label = material.name if material else 'NoMaterial'
+        merged = create_skinned_object(f"Merged_{material_label}", buffers, armature, collection)
+
+        name_map[merged.name] = {
+            'armature': armature.name,
+            'parts': [dict(rng, name=obj.name, matrix_world=[list(row) for row in obj.matrix_world])
+                      for obj, rng in zip(group, ranges)],
+        }
+
+        renderers_before += len(group)
+        draws_before += sum(max(1, len(obj.material_slots)) for obj in group)
+        renderers_after += 1
+        draws_after += max(1, len(merged.material_slots))
+
+        for obj in group:
+            mesh = obj.data
+            bpy.data.objects.remove(obj, do_unlink=True)
+            if mesh.users == 0:
+                bpy.data.meshes.remove(mesh)
+
+        logger.info(f"  {merged.name}: merged {len(group)} garments "
+                    f"({len(buffers['coords'])} vertices)")
+
+    logger.info(f"Skinned mesh renderers: {renderers_before} -> {renderers_after}")
+    logger.info(f"Draw calls: {draws_before} -> {draws_after}")
+    return name_map
+
+
+def write_name_map(name_map: dict, path: str, logger):
+    """Save the merge name map as JSON"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(name_map, f, indent=2, ensure_ascii=False)
+    logger.info(f"Merge map written: {path}")
+
+
+def undo_merge(merged, entry: dict, logger) -> list:
+    """Split a merged mesh back into its original garments using its name map entry"""
+    armature = bpy.data.objects[entry['armature']]
+    collection = merged.users_collection[0] if merged.users_collection else bpy.context.scene.collection
+    buffers = read_mesh_buffers(merged, armature)
+    restored = []
+
+    for part in entry['parts']:
+        v0, l0, p0 = part['vertex_start'], part['loop_start'], part['polygon_start']
+        v1 = v0 + part['vertex_count']
+        l1 = l0 + part['loop_count']
+        p1 = p0 + part['polygon_count']
+
+        used_slots = np.unique(buffers['material_index'][p0:p1])
+        domain_slices = {'POINT': slice(v0, v1), 'CORNER': slice(l0, l1), 'FACE': slice(p0, p1)}
+        part_buffers = {
+            'coords': buffers['coords'][v0:v1],
+            'loop_vertices': buffers['loop_vertices'][l0:l1] - v0,
+            'loop_starts': buffers['loop_starts'][p0:p1] - l0,
+            'material_index': np.searchsorted(used_slots, buffers['material_index'][p0:p1]).astype(np.int32),
+            'use_smooth': buffers['use_smooth'][p0:p1],
+            'uvs': [(uv_name, uv[l0:l1]) for uv_name, uv in buffers['uvs']],
+            'weights': buffers['weights'][v0:v1],
+            'names': buffers['names'],
+            'materials': [buffers['materials'][slot] for slot in used_slots if slot < len(buffers['materials'])],
+            'attributes': [(name, data_type, domain, values[domain_slices[domain]])
+                           for name, data_type, domain, values in buffers['attributes']],
+            'normals': None if buffers['normals'] is None else buffers['normals'][l0:l1],
+        }
+        obj = create_skinned_object(part['name'], part_buffers, armature, collection)
+
+        # Restore the original object transform without moving the vertices
+        original_matrix = np.array(part['matrix_world'], dtype=np.float64)
+        to_local = np.linalg.inv(original_matrix) @ np.array(armature.matrix_world, dtype=np.float64)
+        # Custom normals are stored relative to the faces, so they turn with the vertices
+        obj.data.vertices.foreach_set('co', apply_matrix(part_buffers['coords'], to_local).ravel())
+        obj.data.update()
+        obj.matrix_world = Matrix(part['matrix_world'])
+        restored.append(obj)
+
+    mesh = merged.data
+    bpy.data.objects.remove(merged, do_unlink=True)
+    bpy.data.meshes.remove(mesh)
+    logger.info(f"Restored {len(restored)} garments from merged mesh")
+    return restored
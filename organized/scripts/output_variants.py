@@ -0,0 +1,188 @@
+"""
+Output Variants
+===============
+
+Derives several builds of one avatar (e.g. PC, Quest, LODs) from a single
+import and transfer. Each [VARIANT:<name>] section of weight_transfer.conf
+is applied to the shared, already weighted scene with cheap post-processing
+only, then exported as <output><SUFFIX>.fbx:
+
+- MAX_INFLUENCES  keep the strongest N bone weights per vertex, renormalized
+- CULL_UNUSED     delete bones that deform nothing (as [CULLING])
+- MAX_BONES       bone budget: fold the weakest leaf bones into their parents
+- MERGE           merge same-material garments into shared meshes
+- DECIMATE_RATIO  collapse-decimate meshes on export (LODs)
+- TEXTURE_MAX_SIZE  downscale textures into <output><SUFFIX>_textures/
+
+The shared scene is saved once to a temporary .blend and reopened between
+variants. That is much cheaper than importing and transferring again, and
+no variant sees another's changes.
+"""
+
+import os
+import tempfile
+
+import bpy
+import numpy as np
+
+import bone_culling
+import mesh_merge
+import texture_optimize
+from weight_arrays import read_weights, write_weights
+
+
+def skinned_meshes(armature) -> list:
+    """Meshes deformed by the armature"""
+    return [obj for obj in bpy.data.objects if obj.type == 'MESH'
+            and any(mod.type == 'ARMATURE' and mod.object == armature for mod in obj.modifiers)]
+
+
+def limit_influences(obj, max_influences: int) -> int:
+    """Keep the strongest max_influences weights per vertex; returns the vertices changed"""
+    weights, names = read_weights(obj)
+    if len(names) <= max_influences or not len(weights):
+        return 0
+
+    over = (weights > 0.0).sum(axis=1) > max_influences
+    if not over.any():
+        return 0
+
+    rows = weights[over]
+    weakest = np.argpartition(rows, -max_influences, axis=1)[:, :-max_influences]
+    np.put_along_axis(rows, weakest, 0.0, axis=1)
+    totals = rows.sum(axis=1, keepdims=True)
+    weights[over] = np.divide(rows, totals, out=rows, where=totals > 0.0)
+
+    write_weights(obj, weights, names)
+    return int(over.sum())
+
+
+def fold_bones(armature, bone_names: list, logger):
+    """Move the weights of bones into their nearest surviving ancestor, then delete the bones"""
+    removed = set(bone_names)
+    target = {}
+    for name in bone_names:
+        parent = armature.data.bones[name].parent
+        while parent is not None and parent.name in removed:
+            parent = parent.parent
+        target[name] = parent.name if parent else None
+
+    for obj in skinned_meshes(armature):
+        weights, names = read_weights(obj)
+        if not removed & set(names):
+            continue
+        kept = [name for name in names if name not in removed]
+        for parent_name in {target[name] for name in names if name in removed and target[name]}:
+            if parent_name not in kept:
+                kept.append(parent_name)
+
+        # Projection from the old columns onto the kept ones
+        column = {name: col for col, name in enumerate(kept)}
+        projection = np.zeros((len(names), len(kept)), dtype=np.float32)
+        for row, name in enumerate(names):
+            destination = target.get(name) if name in removed else name
+            if destination is not None:
+                projection[row, column[destination]] = 1.0
+        write_weights(obj, np.minimum(weights @ projection, 1.0), kept)
+
+    bone_culling.delete_bones(armature, bone_names, logger)
+
+
+def enforce_bone_budget(armature, max_bones: int, protected: set, logger) -> list:
+    """Fold the weakest unprotected leaf bones into their parents until max_bones remain"""
+    influence = bone_culling.aggregate_bone_influence(armature, logger)
+    children = {bone.name: len(bone.children) for bone in armature.data.bones}
+    parents = {bone.name: bone.parent.name if bone.parent else None for bone in armature.data.bones}
+
+    folded = []
+    remaining = len(children)
+    while remaining > max_bones:
+        leaves = [name for name, count in children.items()
+                  if count == 0 and name not in protected and parents[name] is not None]
+        if not leaves:
+            logger.warning(f"Bone budget {max_bones} not reachable: {remaining} bones left, rest protected")
+            break
+        weakest = min(leaves, key=lambda name: (influence[name], name))
+        folded.append(weakest)
+        influence[parents[weakest]] += influence[weakest]
+        children[parents[weakest]] -= 1
+        del children[weakest]
+        remaining -= 1
+
+    if folded:
+        fold_bones(armature, folded, logger)
+    logger.info(f"Bone budget: {remaining}/{max_bones} bones ({len(folded)} folded into parents)")
+    return folded
+
+
+def add_decimation(meshes, ratio: float):
+    """Collapse-decimate meshes on export; vertex groups are interpolated"""
+    for obj in meshes:
+        modifier = obj.modifiers.new(name="VariantDecimate", type='DECIMATE')
+        modifier.ratio = ratio
+        # Decimate the rest mesh, before the armature deforms it
+        obj.modifiers.move(len(obj.modifiers) - 1, 0)
+
+
+def apply_variant(variant: dict, armature, target_names: list, culling: dict, logger) -> dict:
+    """Post-process the weighted scene into one variant; returns what changed"""
+    report = {}
+
+    if variant['cull_unused']:
+        report['unused_bones'] = bone_culling.cull_unused_bones(
+            armature, culling['physbone_roots'], culling['keep_bones'],
+            culling['min_influence'], True, logger
+        )
+
+    if variant['max_bones']:
+        protected = bone_culling.find_protected_bones(armature, culling['physbone_roots'], culling['keep_bones'])
+        report['folded_bones'] = enforce_bone_budget(armature, variant['max_bones'], protected, logger)
+
+    if variant['max_influences']:
+        limited = {obj.name: limit_influences(obj, variant['max_influences']) for obj in skinned_meshes(armature)}
+        report['limited_vertices'] = sum(limited.values())
+        logger.info(f"Influences capped at {variant['max_influences']}: "
+                    f"{report['limited_vertices']} vertices changed")
+
+    if variant['merge']:
+        garments = [bpy.data.objects[name] for name in target_names if name in bpy.data.objects]
+        report['merge'] = mesh_merge.merge_garments(garments, logger)
+
+    if variant['decimate_ratio'] < 1.0:
+        add_decimation([obj for obj in bpy.data.objects if obj.type == 'MESH'], variant['decimate_ratio'])
+        report['decimate_ratio'] = variant['decimate_ratio']
+
+    return report
+
+
+def export_variants(variants: list, output_fbx: str, armature_name: str, target_names: list,
+                    culling: dict, export_fn, logger, texture_workers: int = 0) -> dict:
+    """Export every variant from the current scene, which is left as it was"""
+    logger.info(f"=== EXPORTING {len(variants)} OUTPUT VARIANTS ===")
+    reports = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        shared_path = os.path.join(directory, "shared.blend")
+        bpy.ops.wm.save_as_mainfile(filepath=shared_path, copy=True, compress=False)
+
+        for variant in variants:
+            logger.info(f"--- Variant {variant['name']} ---")
+            armature = bpy.data.objects[armature_name]
+            report = apply_variant(variant, armature, target_names, culling, logger)
+            path = os.path.splitext(output_fbx)[0] + variant['suffix'] + ".fbx"
+            if variant['texture_max_size']:
+                meshes = [obj for obj in bpy.data.objects if obj.type == 'MESH']
+                report['textures'] = texture_optimize.optimize_textures(
+                    meshes, target_names, path, variant['texture_max_size'], False, 0, texture_workers, logger
+                )
+
+            report['output'] = path
+            report['success'] = export_fn(path, logger)
+            report['bones'] = len(bpy.data.objects[armature_name].data.bones)
+            reports[variant['name']] = report
+            mark = '✓' if report['success'] else '✗'
+            logger.info(f"{mark} {variant['name']}: {path} ({report['bones']} bones)")
+
+            bpy.ops.wm.open_mainfile(filepath=shared_path)
+
+    return reports
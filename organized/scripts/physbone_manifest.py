@@ -0,0 +1,108 @@
+"""
+PhysBone Chain Manifest
+=======================
+
+Detects PhysBone chains on the armature that is already loaded and writes a
+compact JSON manifest next to the exported FBX, so the headless Unity
+installer (SkirtPBInstallerHeadless -manifest) can add PhysBones directly
+instead of scanning the scene hierarchy.
+
+Chains follow the installer's rules: for every bone named like a root pattern,
+each direct child whose name matches the bone regex starts a chain, which runs
+down single-child links to its leaf.
+
+Keys are camelCase so Unity's JsonUtility can read the manifest as-is.
+"""
+
+import json
+import math
+import re
+
+from mathutils import Vector
+
+MANIFEST_VERSION = 1
+
+
+def bone_path(bone) -> str:
+    """Slash-separated path of a bone below the armature object, as in Unity"""
+    names = [bone.name] + [parent.name for parent in bone.parent_recursive]
+    return "/".join(reversed(names))
+
+
+def follow_chain(bone) -> list:
+    """Bones from bone down single-child links to the leaf"""
+    chain = [bone]
+    while len(chain[-1].children) == 1:
+        chain.append(chain[-1].children[0])
+    return chain
+
+
+def to_unity(vector: Vector) -> Vector:
+    """Convert a Blender direction to Unity axes (FBX -Z forward, Y up, mirrored X)"""
+    return Vector((-vector.x, vector.z, -vector.y))
+
+
+def chain_metadata(armature, chain: list, root_name: str, max_angle: float, inner_angle: float,
+                   add_leaf_bones: bool) -> dict:
+    """Length, segment count and angle data of one chain"""
+    matrix = armature.matrix_world
+    heads = [matrix @ bone.head_local for bone in chain]
+    tails = [matrix @ bone.tail_local for bone in chain]
+
+    length = sum((tail - head).length for head, tail in zip(heads, tails))
+    directions = [tail - head for head, tail in zip(heads, tails)]
+    bends = [round(math.degrees(previous.angle(current, 0.0)), 3)
+             for previous, current in zip(directions, directions[1:])]
+
+    # Same roll formula as SkirtPBInstallerHeadless.ConfigurePhysBone; with leaf
+    # bones added on export, Unity's leaf transform sits at the last bone's tail
+    leaf = tails[-1] if add_leaf_bones else heads[-1]
+    to_leaf = to_unity(leaf - heads[0])
+    roll = math.degrees(math.atan2(to_leaf.z, to_leaf.x)) + 90.0
+
+    return {
+        'root': root_name,
+        'bone': chain[0].name,
+        'path': bone_path(chain[0]),
+        'leaf': chain[-1].name,
+        'segments': len(chain),
+        'length': round(length, 6),
+        'maxAngle': max_angle,
+        'innerAngle': inner_angle,
+        'roll': round(roll, 3),
+        'bendAngles': bends,
+    }
+
+
+def find_physbone_chains(armature, root_patterns: list, bone_regex: str,
+                         max_angle: float, inner_angle: float, add_leaf_bones: bool, logger) -> list:
+    """Detect PhysBone chains on the armature using root and child name rules"""
+    roots = [re.compile(pattern) for pattern in root_patterns]
+    child_pattern = re.compile(bone_regex)
+    chains = []
+
+    for bone in armature.data.bones:
+        if not any(pattern.fullmatch(bone.name) for pattern in roots):
+            continue
+        for child in bone.children:
+            if child_pattern.search(child.name):
+                chain = follow_chain(child)
+                chains.append(chain_metadata(armature, chain, bone.name, max_angle, inner_angle,
+                                             add_leaf_bones))
+                logger.info(f"  PhysBone chain: {bone_path(child)} ({len(chain)} bones)")
+
+    logger.info(f"Found {len(chains)} PhysBone chains")
+    return chains
+
+
+def write_physbone_manifest(armature, chains: list, add_leaf_bones: bool, path: str, logger):
+    """Write the chain manifest as compact JSON"""
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'armature': armature.name,
+        'addLeafBones': add_leaf_bones,
+        'chains': chains,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, separators=(',', ':'), ensure_ascii=False)
+    logger.info(f"PhysBone manifest written: {path}")
@@ -0,0 +1,117 @@
+"""
+Pipeline Logging
+================
+
+Queue-based logging for the weight transfer pipeline.
+
+- The pipeline logger has a single QueueHandler. Messages are resolved in
+  the calling thread, because their arguments may be mutable or bpy data
+  that changes (or is freed) before the listener runs. Layout and file
+  writes happen on a QueueListener thread, off the transfer loop. Use
+  %-style arguments (``logger.debug("%s", name)``) so disabled levels cost
+  nothing.
+- Calling setup again (e.g. one job after another in a long-lived process)
+  replaces the previous handlers instead of adding more.
+- Structured events (run and stage boundaries, per-garment results) go to a
+  separate JSON lines file, so orchestrators can follow progress without
+  parsing the human log.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+from datetime import datetime
+
+_listeners = {}
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that resolves messages here and leaves layout and I/O to the listener"""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        if is_event(record):
+            record.msg = event_json(record)
+        else:
+            record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def event_json(record) -> str:
+    """JSON line of an event record"""
+    payload = {
+        'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+        'event': record.event,
+    }
+    payload.update(record.fields)
+    return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class JsonEventFormatter(logging.Formatter):
+    """One JSON object per event record (already encoded by DeferredQueueHandler)"""
+
+    def format(self, record) -> str:
+        return record.getMessage()
+
+
+def is_event(record) -> bool:
+    return hasattr(record, 'event')
+
+
+def is_message(record) -> bool:
+    return not hasattr(record, 'event')
+
+
+def log_event(logger, event: str, **fields):
+    """Emit a structured event to the JSON event log"""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(event, extra={'event': event, 'fields': fields})
+
+
+def setup_pipeline_logging(name: str, handlers: list, events_file: str = None,
+                           level: int = logging.DEBUG) -> logging.Logger:
+    """Route a logger through a queue to handlers, replacing any earlier setup"""
+    stop_pipeline_logging(name)
+
+    for handler in handlers:
+        handler.addFilter(is_message)
+    if events_file:
+        events_handler = logging.FileHandler(events_file, encoding='utf-8')
+        events_handler.setFormatter(JsonEventFormatter())
+        events_handler.addFilter(is_event)
+        handlers = handlers + [events_handler]
+
+    records = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners[name] = listener
+
+    logger = logging.getLogger(name)
+    logger.handlers = [DeferredQueueHandler(records)]
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger
+
+
+def stop_pipeline_logging(name: str):
+    """Flush and close the handlers of a logger set up by setup_pipeline_logging"""
+    listener = _listeners.pop(name, None)
+    if listener is None:
+        return
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+    logging.getLogger(name).handlers = []
+
+
+@atexit.register
+def _stop_all():
+    for name in list(_listeners):
+        stop_pipeline_logging(name)
@@ -0,0 +1,200 @@
+"""
+Linear Blend Skinning Pose Validation
+=====================================
+
+Checks transferred weights without Unity. Each test pose is turned into bone
+skinning matrices straight from the armature's rest data, and every skinned
+mesh is deformed with vectorized linear blend skinning over its top-N
+influences. No depsgraph evaluation is involved, so dozens of poses take
+seconds.
+
+Per pose and mesh the report measures:
+- edge stretch (posed / rest edge length)
+- garment penetration into the posed body (sampled vertices)
+- problem vertices per dominant bone, to point at the regions to fix
+
+A pose is a list of (bone name regex, local axis, degrees) rotations. The
+built-in poses target common humanoid bone names; extra poses can be loaded
+from a JSON file with the same structure.
+"""
+
+import json
+import math
+import re
+
+import numpy as np
+from mathutils import Matrix, Vector
+from mathutils.bvhtree import BVHTree
+
+from weight_arrays import align_weights, apply_matrix, read_coordinates, read_triangles, read_weights
+
+DEFAULT_POSES = {
+    'arms_up': [(r'(?i).*upper_?arm.*', 'Z', 70.0)],
+    'arms_forward': [(r'(?i).*upper_?arm.*', 'X', 70.0)],
+    'sit': [(r'(?i).*(thigh|upper_?leg).*', 'X', -90.0),
+            (r'(?i).*(knee|lower_?leg|calf).*', 'X', 90.0)],
+    'leg_raise': [(r'(?i).*(thigh|upper_?leg).*', 'X', -60.0)],
+    'twist': [(r'(?i)^(spine|chest).*', 'Y', 35.0)],
+    'bend': [(r'(?i)^(spine|chest).*', 'X', 30.0)],
+}
+
+
+def load_poses(poses_file: str = None) -> dict:
+    """Built-in poses plus any defined in a JSON poses file"""
+    poses = dict(DEFAULT_POSES)
+    if poses_file:
+        with open(poses_file, encoding='utf-8') as f:
+            poses.update({name: [tuple(rotation) for rotation in rotations]
+                          for name, rotations in json.load(f).items()})
+    return poses
+
+
+def skinning_matrices(armature, rotations: list) -> tuple:
+    """(B, 4, 4) armature-space skinning matrices for a pose, and bone names"""
+    patterns = [(re.compile(pattern), axis, math.radians(degrees)) for pattern, axis, degrees in rotations]
+    bones = armature.data.bones
+    posed = {}
+    matrices = np.zeros((len(bones), 4, 4), dtype=np.float32)
+
+    # Bones are stored parents-first, so parents are always posed before children
+    for index, bone in enumerate(bones):
+        local = Matrix.Identity(4)
+        for pattern, axis, angle in patterns:
+            if pattern.fullmatch(bone.name):
+                local = local @ Matrix.Rotation(angle, 4, axis)
+
+        if bone.parent:
+            offset = bone.parent.matrix_local.inverted() @ bone.matrix_local
+            posed[bone.name] = posed[bone.parent.name] @ offset @ local
+        else:
+            posed[bone.name] = bone.matrix_local @ local
+
+        matrices[index] = np.array(posed[bone.name] @ bone.matrix_local.inverted(), dtype=np.float32)
+
+    return matrices, [bone.name for bone in bones]
+
+
+def top_influences(weights: np.ndarray, count: int) -> tuple:
+    """Keep the strongest count influences per vertex, normalized: (indices, weights)"""
+    count = min(count, weights.shape[1])
+    indices = np.argsort(-weights, axis=1)[:, :count]
+    values = np.take_along_axis(weights, indices, axis=1)
+    totals = values.sum(axis=1, keepdims=True)
+    values = np.divide(values, totals, out=np.zeros_like(values), where=totals > 0)
+    return indices, values
+
+
+def deform(rest: np.ndarray, indices: np.ndarray, values: np.ndarray, matrices: np.ndarray) -> np.ndarray:
+    """Linear blend skinning of (V, 3) armature-space points"""
+    blended = np.einsum('vk,vkij->vij', values, matrices[indices])
+    posed = np.einsum('vij,vj->vi', blended[:, :3, :3], rest) + blended[:, :3, 3]
+
+    # Vertices without weights stay in place
+    unweighted = values.sum(axis=1) == 0
+    posed[unweighted] = rest[unweighted]
+    return posed
+
+
+def read_skinned_mesh(obj, armature, bone_names: list, influences: int) -> dict:
+    """Rest coordinates, edges and sparse bone influences of a skinned mesh"""
+    world_coords = read_coordinates(obj, world=True)
+    weights, names = read_weights(obj)
+    indices, values = top_influences(align_weights(weights, names, bone_names), influences)
+
+    edges = np.empty(len(obj.data.edges) * 2, dtype=np.int64)
+    obj.data.edges.foreach_get('vertices', edges)
+
+    return {
+        'name': obj.name,
+        'rest': apply_matrix(world_coords, armature.matrix_world.inverted()),
+        'edges': edges.reshape(-1, 2),
+        'indices': indices,
+        'values': values,
+        'dominant': indices[:, 0],
+    }
+
+
+def edge_stretch(rest: np.ndarray, posed: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Posed / rest length ratio of every edge"""
+    rest_length = np.linalg.norm(rest[edges[:, 0]] - rest[edges[:, 1]], axis=1)
+    posed_length = np.linalg.norm(posed[edges[:, 0]] - posed[edges[:, 1]], axis=1)
+    return np.divide(posed_length, rest_length, out=np.ones_like(posed_length), where=rest_length > 1e-9)
+
+
+def penetration_depth(body_tree, points: np.ndarray) -> np.ndarray:
+    """Depth of points below the posed body surface (0 when outside)"""
+    depth = np.zeros(len(points), dtype=np.float32)
+    for i, point in enumerate(points):
+        location, normal, _index, distance = body_tree.find_nearest(Vector(point))
+        if location is not None and (Vector(point) - location).dot(normal) < 0.0:
+            depth[i] = distance
+    return depth
+
+
+def validate_poses(armature, body_mesh, meshes, poses: dict, influences: int,
+                   stretch_tolerance: float, penetration_samples: int, logger) -> dict:
+    """Deform all meshes through every pose and score the results"""
+    logger.info("=== VALIDATING WEIGHTS WITH TEST POSES ===")
+    bone_names = [bone.name for bone in armature.data.bones]
+    body = read_skinned_mesh(body_mesh, armature, bone_names, influences)
+    body_triangles = read_triangles(body_mesh).tolist()
+    garments = [read_skinned_mesh(obj, armature, bone_names, influences)
+                for obj in meshes if obj != body_mesh and len(obj.vertex_groups)]
+
+    report = {'poses': {}, 'bones': {}, 'score': 100.0}
+    problem_fractions = []
+
+    for pose_name, rotations in poses.items():
+        matrices, _names = skinning_matrices(armature, rotations)
+        posed_body = deform(body['rest'], body['indices'], body['values'], matrices)
+        body_tree = BVHTree.FromPolygons(posed_body.tolist(), body_triangles)
+        pose_report = {}
+
+        for mesh in [body] + garments:
+            posed = deform(mesh['rest'], mesh['indices'], mesh['values'], matrices)
+            stretch = edge_stretch(mesh['rest'], posed, mesh['edges'])
+            bad_edges = np.abs(stretch - 1.0) > stretch_tolerance
+            problem = np.zeros(len(posed), dtype=bool)
+            problem[mesh['edges'][bad_edges].ravel()] = True
+
+            max_depth = 0.0
+            if mesh is not body:
+                step = max(1, len(posed) // penetration_samples)
+                sampled = np.arange(0, len(posed), step)
+                depth = penetration_depth(body_tree, posed[sampled])
+                problem[sampled[depth > 0.0]] = True
+                max_depth = float(depth.max(initial=0.0))
+
+            for bone_index, count in zip(*np.unique(mesh['dominant'][problem], return_counts=True)):
+                bone_name = bone_names[bone_index]
+                report['bones'][bone_name] = report['bones'].get(bone_name, 0) + int(count)
+
+            fraction = float(problem.mean()) if len(problem) else 0.0
+            problem_fractions.append(fraction)
+            pose_report[mesh['name']] = {
+                'max_stretch': float(np.abs(stretch - 1.0).max(initial=0.0)),
+                'stretched_edges': int(bad_edges.sum()),
+                'max_penetration': max_depth,
+                'problem_fraction': fraction,
+            }
+
+        report['poses'][pose_name] = pose_report
+        worst = max(pose_report.items(), key=lambda item: item[1]['problem_fraction'])
+        logger.info(f"  {pose_name}: worst mesh {worst[0]} "
+                    f"({worst[1]['problem_fraction']:.1%} problem vertices)")
+
+    if problem_fractions:
+        report['score'] = round(100.0 * (1.0 - float(np.mean(problem_fractions))), 2)
+    report['bones'] = dict(sorted(report['bones'].items(), key=lambda item: -item[1]))
+
+    logger.info(f"Pose validation score: {report['score']}/100")
+    for bone_name, count in list(report['bones'].items())[:10]:
+        logger.info(f"  Problem region: {bone_name} ({count} vertices)")
+    return report
+
+
+def write_pose_report(report: dict, path: str, logger):
+    """Save the pose validation report as JSON"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    logger.info(f"Pose validation report written: {path}")
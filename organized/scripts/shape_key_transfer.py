@@ -0,0 +1,114 @@
+"""
+Shape Key Propagation
+=====================
+
+Gives garments the body's shape keys (body-type sliders, correctives) so
+clothing follows them in Unity/VRChat instead of being left behind.
+
+The body's selected keys are read once as a (keys, vertices, 3) offset array
+relative to its basis. Each garment is mapped to the body surface once
+(nearest triangle + barycentric coordinates, as in weight transfer), and the
+offsets of all keys are interpolated in one array operation and written per
+key with foreach_set. No data_transfer pass runs per shape key.
+
+Garment vertices farther than MAX_DISTANCE from the body get no offset, and
+keys that move no garment vertex by more than MIN_OFFSET are not created.
+"""
+
+import re
+
+import numpy as np
+
+import surface_mapping
+from weight_arrays import read_coordinates
+
+
+def select_body_keys(body, patterns: list) -> list:
+    """Non-basis shape keys of the body whose names match any pattern"""
+    shape_keys = body.data.shape_keys
+    if not shape_keys:
+        return []
+    compiled = [re.compile(pattern) for pattern in patterns]
+    return [key_block for key_block in shape_keys.key_blocks
+            if key_block != shape_keys.reference_key
+            and any(pattern.fullmatch(key_block.name) for pattern in compiled)]
+
+
+def read_key_offsets(body, key_blocks: list) -> np.ndarray:
+    """World-space offsets of key_blocks from the body basis as a (K, V, 3) array"""
+    count = len(body.data.vertices)
+    basis = np.empty(count * 3, dtype=np.float32)
+    body.data.shape_keys.reference_key.data.foreach_get('co', basis)
+
+    offsets = np.empty((len(key_blocks), count * 3), dtype=np.float32)
+    for k, key_block in enumerate(key_blocks):
+        key_block.data.foreach_get('co', offsets[k])
+    offsets = (offsets - basis).reshape(len(key_blocks), count, 3)
+
+    rotation_scale = np.array(body.matrix_world, dtype=np.float32)[:3, :3]
+    return offsets @ rotation_scale.T
+
+
+def write_garment_keys(garment, key_blocks: list, offsets: np.ndarray, min_offset: float) -> list:
+    """Add one shape key per body key from (K, V, 3) local offsets; returns the created names"""
+    magnitudes = np.abs(offsets).max(axis=(1, 2)) if offsets.size else np.zeros(len(key_blocks))
+    if not (magnitudes > min_offset).any():
+        return []
+
+    if not garment.data.shape_keys:
+        garment.shape_key_add(name='Basis', from_mix=False)
+    shape_keys = garment.data.shape_keys
+    reference = shape_keys.reference_key
+
+    basis = np.empty(len(garment.data.vertices) * 3, dtype=np.float32)
+    reference.data.foreach_get('co', basis)
+
+    created = []
+    for k, body_key in enumerate(key_blocks):
+        if magnitudes[k] <= min_offset:
+            continue
+        key_block = shape_keys.key_blocks.get(body_key.name) or \
+            garment.shape_key_add(name=body_key.name, from_mix=False)
+        key_block.data.foreach_set('co', basis + offsets[k].ravel())
+        key_block.relative_key = reference
+        key_block.slider_min = body_key.slider_min
+        key_block.slider_max = body_key.slider_max
+        key_block.value = body_key.value
+        created.append(body_key.name)
+    return created
+
+
+def propagate_shape_keys(body, garments, patterns: list, max_distance: float, min_offset: float,
+                         logger) -> dict:
+    """Copy the body's selected shape keys onto every garment; returns {garment: key names}"""
+    logger.info("=== PROPAGATING SHAPE KEYS ===")
+    key_blocks = select_body_keys(body, patterns)
+    if not key_blocks:
+        logger.info("Body has no matching shape keys - skipped")
+        return {}
+
+    offsets = read_key_offsets(body, key_blocks)
+    # (V, K, 3) so one interpolate call covers every key
+    per_vertex = np.ascontiguousarray(offsets.transpose(1, 0, 2))
+    surface = surface_mapping.build_surface(body)
+    logger.info(f"Body keys: {len(key_blocks)} ({', '.join(key.name for key in key_blocks[:8])}"
+                f"{', ...' if len(key_blocks) > 8 else ''})")
+
+    report = {}
+    for garment in garments:
+        if not len(garment.data.vertices):
+            continue
+        mapping = surface_mapping.map_points(surface, read_coordinates(garment, world=True), max_distance)
+        garment_offsets = surface_mapping.interpolate(surface, mapping, per_vertex).transpose(1, 0, 2)
+
+        # World-space offsets into the garment's local space
+        to_local = np.linalg.inv(np.array(garment.matrix_world, dtype=np.float64)[:3, :3])
+        garment_offsets = (garment_offsets @ to_local.T.astype(np.float32)).astype(np.float32)
+
+        report[garment.name] = write_garment_keys(garment, key_blocks, garment_offsets, min_offset)
+        mapped = int((mapping['triangle_index'] >= 0).sum())
+        logger.info(f"  ✓ {garment.name}: {len(report[garment.name])} shape keys "
+                    f"({mapped}/{len(garment.data.vertices)} vertices near the body)")
+
+    logger.info(f"Shape keys propagated to {sum(1 for keys in report.values() if keys)}/{len(report)} garments")
+    return report
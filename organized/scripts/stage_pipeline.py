@@ -0,0 +1,234 @@
+"""
+Declarative Stage Pipeline
+==========================
+
+Runs a table of named stages lazily: only the stages the requested outputs
+depend on are run, and each stage's outputs can be cached under a key hashed
+from its inputs.
+
+A stage declares the values it reads and produces. Values are JSON data
+(object names, counts, reports) or scene states. A scene state stands for
+the Blender scene after the stage that produced it; stages that change the
+scene read one scene state and produce the next, e.g.
+
+    load      -> imported
+    prepare   imported -> prepared
+    transfer  prepared -> weighted
+
+Stage keys chain like a Merkle tree: a key hashes the stage name, its
+parameters (e.g. its config sections) and the keys of its input values,
+down to a seed (the input file's content hash). So a key can be computed
+without running anything, and any upstream change invalidates every stage
+below it.
+
+With a cache directory, a finished stage writes <stage>-<key>.json (its
+outputs), plus a compressed <stage>-<key>.blend when it produced a scene
+state. Only the max_entries most recently used entries of each stage are
+kept. A later run skips stages that are cached and not needed by a stage
+that has to run. It reopens at most one cached scene state, so a "verify
+only" run after a cached transfer pays for neither import nor transfer.
+
+A scene state can only be changed by one running stage. Targets on two
+diverging branches that both change the scene (e.g. prune and transfer)
+cannot share a run.
+"""
+
+import glob
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Callable
+
+import bpy
+
+
+class StageError(Exception):
+    """A stage could not produce its outputs; the run stops with this message"""
+
+
+@dataclass
+class Stage:
+    """A pipeline step: run(values) returns a dict with every name in outputs"""
+    name: str
+    run: Callable
+    inputs: tuple = ()
+    outputs: tuple = ()
+    scene_outputs: tuple = ()
+    params: object = None
+    cache: bool = True
+
+
+@dataclass
+class StagePlan:
+    """What a run will do for its targets"""
+    run: list = field(default_factory=list)
+    cached: list = field(default_factory=list)
+    restore: str = None
+
+
+def digest(*parts) -> str:
+    """Short stable hash of JSON-serializable parts"""
+    data = json.dumps(parts, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+class StagePipeline:
+    """Lazy evaluator for a declared stage table"""
+
+    def __init__(self, stages: list, logger, cache_dir: str = None, max_entries: int = 2):
+        self.stages = stages
+        self.logger = logger
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.producers = {}
+        for stage in stages:
+            for name in stage.outputs:
+                if name in self.producers:
+                    raise ValueError(f"{name} is produced by both {self.producers[name].name} and {stage.name}")
+                self.producers[name] = stage
+        self.stage_by_name = {stage.name: stage for stage in stages}
+
+    def keys(self, seed: str, values: dict) -> dict:
+        """Cache key of every stage (stages are declared in dependency order)"""
+        value_keys = {name: digest(seed, name, value) for name, value in values.items()}
+        keys = {}
+        for stage in self.stages:
+            missing = [name for name in stage.inputs if name not in value_keys]
+            if missing:
+                raise ValueError(f"Stage {stage.name} needs {', '.join(missing)}, which nothing produces")
+            keys[stage.name] = digest(stage.name, stage.params, [value_keys[name] for name in stage.inputs])
+            for name in stage.outputs:
+                value_keys[name] = digest(keys[stage.name], name)
+        return keys
+
+    def cache_paths(self, stage: Stage, key: str) -> tuple:
+        base = os.path.join(self.cache_dir, f"{stage.name}-{key}")
+        return base + ".json", base + ".blend"
+
+    def is_cached(self, stage: Stage, key: str) -> bool:
+        if not (self.cache_dir and stage.cache):
+            return False
+        outputs_path, blend_path = self.cache_paths(stage, key)
+        return os.path.exists(outputs_path) and (not stage.scene_outputs or os.path.exists(blend_path))
+
+    def plan(self, targets: list, keys: dict, values: dict, done: set = ()) -> StagePlan:
+        """Stages to run and to take from the cache, walking back from the targets"""
+        unknown = [target for target in targets if target not in self.stage_by_name]
+        if unknown:
+            raise ValueError(f"Unknown stage: {', '.join(unknown)}")
+
+        # A restored scene would be overwritten by a stage running before it, so such
+        # a stage's cache entry is not used and it runs as well
+        order = [stage.name for stage in self.stages]
+        uncached = set()
+        while True:
+            plan = self.plan_once(targets, keys, values, set(done), uncached)
+            if plan.restore and plan.run and order.index(plan.run[0]) < order.index(plan.restore):
+                uncached.add(plan.restore)
+                continue
+            return plan
+
+    def plan_once(self, targets: list, keys: dict, values: dict, done: set, uncached: set) -> StagePlan:
+        plan = StagePlan()
+        needed = {name for target in targets for name in self.stage_by_name[target].outputs}
+        for stage in reversed(self.stages):
+            if not (set(stage.outputs) & needed) or stage.name in done:
+                continue
+            if stage.name not in uncached and self.is_cached(stage, keys[stage.name]):
+                plan.cached.insert(0, stage.name)
+            else:
+                plan.run.insert(0, stage.name)
+                needed.update(name for name in stage.inputs if name not in values)
+
+        # Scene states reopened from the cache, and scene states changed by running stages
+        restores = {self.producers[name].name for name in needed
+                    if name in self.producers and name in self.producers[name].scene_outputs
+                    and self.producers[name].name in plan.cached}
+        if len(restores) > 1:
+            raise ValueError(f"Targets need several cached scenes ({', '.join(sorted(restores))}); "
+                             "run them separately")
+        plan.restore = restores.pop() if restores else None
+
+        consumers = {}
+        for name in plan.run:
+            stage = self.stage_by_name[name]
+            if not stage.scene_outputs:
+                continue
+            for value in stage.inputs:
+                producer = self.producers.get(value)
+                if producer and value in producer.scene_outputs:
+                    consumers.setdefault(value, []).append(name)
+        for value, stages in consumers.items():
+            if len(stages) > 1:
+                raise ValueError(f"Stages {', '.join(stages)} would all change scene state {value}; "
+                                 "run them separately")
+        return plan
+
+    def load_cached(self, stage: Stage, key: str, restore: bool) -> dict:
+        outputs_path, blend_path = self.cache_paths(stage, key)
+        with open(outputs_path, encoding='utf-8') as f:
+            outputs = json.load(f)
+        # The outputs file's mtime is the entry's last use, for prune()
+        os.utime(outputs_path)
+        if restore:
+            bpy.ops.wm.open_mainfile(filepath=blend_path)
+            self.logger.info(f"  {stage.name}: scene restored from stage cache")
+        else:
+            self.logger.info(f"  {stage.name}: cached")
+        return outputs
+
+    def store(self, stage: Stage, key: str, outputs: dict):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        outputs_path, blend_path = self.cache_paths(stage, key)
+        if stage.scene_outputs:
+            bpy.ops.wm.save_as_mainfile(filepath=blend_path, copy=True, compress=True)
+        # Outputs last, so an entry never points at a partial .blend
+        with open(outputs_path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(outputs, f, default=str, ensure_ascii=False)
+        os.replace(outputs_path + ".tmp", outputs_path)
+        self.prune(stage)
+
+    def prune(self, stage: Stage):
+        """Keep the max_entries most recently used entries of a stage"""
+        pattern = os.path.join(glob.escape(self.cache_dir), f"{glob.escape(stage.name)}-*.json")
+        entries = sorted(glob.glob(pattern), key=os.path.getmtime, reverse=True)
+        for outputs_path in entries[self.max_entries:]:
+            for path in (outputs_path, outputs_path[:-len(".json")] + ".blend"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def run(self, targets: list, seed: str, values: dict, done: set = (), on_stage: Callable = None,
+            on_start: Callable = None) -> dict:
+        """Evaluate targets; values holds the pipeline inputs and outputs of done stages
+
+        on_start(stage, cached) is called before each stage runs or is loaded
+        from the cache, on_stage(stage, outputs, cached) after it.
+        """
+        values = dict(values)
+        keys = self.keys(seed, {name: value for name, value in values.items()
+                                if name not in self.producers})
+        plan = self.plan(targets, keys, values, done)
+        self.logger.info(f"Stages to run: {', '.join(plan.run) or 'none'}"
+                         f"{' (cached: ' + ', '.join(plan.cached) + ')' if plan.cached else ''}")
+
+        for name in plan.cached:
+            stage = self.stage_by_name[name]
+            if on_start:
+                on_start(stage, True)
+            outputs = self.load_cached(stage, keys[name], restore=name == plan.restore)
+            values.update(outputs)
+            if on_stage:
+                on_stage(stage, outputs, True)
+
+        for name in plan.run:
+            stage = self.stage_by_name[name]
+            if on_start:
+                on_start(stage, False)
+            outputs = stage.run(values)
+            values.update(outputs)
+            if self.cache_dir and stage.cache:
+                self.store(stage, keys[name], {key: outputs[key] for key in stage.outputs})
+            if on_stage:
+                on_stage(stage, outputs, False)
+        return values
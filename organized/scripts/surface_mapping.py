@@ -0,0 +1,110 @@
+"""
+Nearest-Surface Mapping
+=======================
+
+NumPy counterpart of data_transfer's POLYINTERP_NEAREST vertex mapping.
+
+A source mesh is triangulated once into a world-space BVH tree. Target points
+are mapped to their nearest source triangle and barycentric coordinates, and
+any per-vertex source data (weights, shape key offsets, ...) can then be
+interpolated for all points at once.
+
+Only the nearest-triangle queries run per point; everything else is bulk
+array work, and a mapping can be reused for any number of data layers.
+"""
+
+import numpy as np
+from mathutils import Vector
+from mathutils.bvhtree import BVHTree
+
+from weight_arrays import read_coordinates, read_triangles
+
+
+def build_surface(obj) -> dict:
+    """Triangulate a mesh in world space and build its BVH tree"""
+    coords = read_coordinates(obj, world=True)
+    triangles = read_triangles(obj)
+    tree = BVHTree.FromPolygons(coords.tolist(), triangles.tolist())
+    return {
+        'name': obj.name,
+        'coords': coords,
+        'triangles': triangles,
+        'tree': tree,
+    }
+
+
+def barycentric(points: np.ndarray, corners: np.ndarray) -> np.ndarray:
+    """Barycentric coordinates of (N, 3) points in (N, 3, 3) triangles"""
+    a = corners[:, 0]
+    v0 = corners[:, 1] - a
+    v1 = corners[:, 2] - a
+    v2 = points - a
+
+    d00 = np.einsum('ij,ij->i', v0, v0)
+    d01 = np.einsum('ij,ij->i', v0, v1)
+    d11 = np.einsum('ij,ij->i', v1, v1)
+    d20 = np.einsum('ij,ij->i', v2, v0)
+    d21 = np.einsum('ij,ij->i', v2, v1)
+
+    denom = d00 * d11 - d01 * d01
+    degenerate = np.abs(denom) < 1e-20
+    denom[degenerate] = 1.0
+
+    v = (d11 * d20 - d01 * d21) / denom
+    w = (d00 * d21 - d01 * d20) / denom
+    result = np.stack([1.0 - v - w, v, w], axis=1)
+
+    # Degenerate triangles collapse onto their first corner
+    result[degenerate] = (1.0, 0.0, 0.0)
+    result = np.clip(result, 0.0, 1.0)
+    return (result / result.sum(axis=1, keepdims=True)).astype(np.float32)
+
+
+def map_points(surface: dict, points: np.ndarray, max_distance: float = None) -> dict:
+    """Map world-space points to their nearest source triangle
+
+    Points farther than max_distance get triangle index -1.
+    """
+    count = len(points)
+    triangle_index = np.full(count, -1, dtype=np.int64)
+    locations = np.zeros((count, 3), dtype=np.float32)
+    distances = np.full(count, np.inf, dtype=np.float32)
+
+    tree = surface['tree']
+    for i, point in enumerate(points):
+        if max_distance is None:
+            location, _normal, index, distance = tree.find_nearest(Vector(point))
+        else:
+            location, _normal, index, distance = tree.find_nearest(Vector(point), max_distance)
+        if location is None:
+            continue
+        triangle_index[i] = index
+        locations[i] = location
+        distances[i] = distance
+
+    weights = np.zeros((count, 3), dtype=np.float32)
+    found = triangle_index >= 0
+    if found.any():
+        corners = surface['coords'][surface['triangles'][triangle_index[found]]]
+        weights[found] = barycentric(locations[found], corners)
+
+    return {
+        'triangle_index': triangle_index,
+        'barycentric': weights,
+        'distance': distances,
+    }
+
+
+def interpolate(surface: dict, mapping: dict, values: np.ndarray) -> np.ndarray:
+    """Interpolate per-vertex source values (V, ...) at mapped points (N, ...)"""
+    triangle_index = mapping['triangle_index']
+    result = np.zeros((len(triangle_index),) + values.shape[1:], dtype=values.dtype)
+
+    found = triangle_index >= 0
+    if found.any():
+        corners = surface['triangles'][triangle_index[found]]
+        bary = mapping['barycentric'][found]
+        bary = bary.reshape(bary.shape + (1,) * (values.ndim - 1))
+        result[found] = (values[corners] * bary).sum(axis=1)
+
+    return result
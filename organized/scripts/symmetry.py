@@ -0,0 +1,122 @@
+"""
+Mirror-Symmetric Weight Transfer
+================================
+
+Transfers weights for one half of a garment (plus the centre strip) and fills
+the other half by mirroring, swapping left/right vertex groups such as
+``HipRoot_L.001`` <-> ``HipRoot_R.001`` or ``IK_Arm_L`` <-> ``IK_Arm_R``.
+
+Mirrored vertex pairs are found with a KD-tree over X-flipped coordinates in
+the armature's space, so the symmetry plane is the rig's X = 0 plane. Vertices
+without a partner are transferred directly. Garments where too few vertices
+pair up are handed to the fallback transfer instead.
+"""
+
+import re
+
+import numpy as np
+from mathutils.kdtree import KDTree
+
+import surface_mapping
+from weight_arrays import apply_matrix, read_coordinates, read_weights, write_weights
+
+SIDE_PATTERN = re.compile(r'(?<=[_.])([LRlr])(?=(\.\d+)?$)')
+WORD_PATTERN = re.compile(r'(Left|Right|left|right)')
+SIDE_SWAP = {'L': 'R', 'R': 'L', 'l': 'r', 'r': 'l',
+             'Left': 'Right', 'Right': 'Left', 'left': 'right', 'right': 'left'}
+
+
+def mirror_group_name(name: str) -> str:
+    """Return the opposite-side name of a bone/group, or the name itself"""
+    mirrored, count = SIDE_PATTERN.subn(lambda m: SIDE_SWAP[m.group(1)], name)
+    if count:
+        return mirrored
+    return WORD_PATTERN.sub(lambda m: SIDE_SWAP[m.group(1)], name)
+
+
+def mirror_permutation(names: list) -> np.ndarray:
+    """Column index of each group's mirrored counterpart (itself if none)"""
+    lookup = {name: col for col, name in enumerate(names)}
+    return np.array([lookup.get(mirror_group_name(name), col) for col, name in enumerate(names)],
+                    dtype=np.int64)
+
+
+def find_mirror_pairs(coords: np.ndarray, tolerance: float) -> np.ndarray:
+    """Index of each vertex's mirror partner across X = 0, or -1 if none"""
+    tree = KDTree(len(coords))
+    for index, co in enumerate(coords.tolist()):
+        tree.insert(co, index)
+    tree.balance()
+
+    flipped = coords * np.array([-1.0, 1.0, 1.0], dtype=np.float32)
+    found = list(map(tree.find, flipped.tolist()))
+    partners = np.fromiter((-1 if index is None else index for _co, index, _dist in found),
+                           dtype=np.int64, count=len(found))
+    distances = np.fromiter((np.inf if dist is None else dist for _co, _index, dist in found),
+                            dtype=np.float64, count=len(found))
+    partners[distances > tolerance] = -1
+    return partners
+
+
+class SymmetricTransfer:
+    """Transfer callable that computes one side of a garment and mirrors the rest"""
+
+    def __init__(self, armature, tolerance: float, min_paired_ratio: float, fallback, logger,
+                 sampler=None, max_distance: float = None):
+        self.armature = armature
+        self.tolerance = tolerance
+        self.min_paired_ratio = min_paired_ratio
+        self.fallback = fallback
+        self.logger = logger
+        self.sampler = sampler
+        self.max_distance = max_distance
+        self.sources = {}
+
+    def source_data(self, source) -> dict:
+        """Surface and weights of a source mesh, built once per run"""
+        if source.name not in self.sources:
+            weights, names = read_weights(source)
+            self.sources[source.name] = {
+                'surface': surface_mapping.build_surface(source),
+                'weights': weights,
+                'names': names,
+                'permutation': mirror_permutation(names),
+            }
+        return self.sources[source.name]
+
+    def __call__(self, source, target_mesh):
+        world_coords = read_coordinates(target_mesh, world=True)
+        rig_coords = apply_matrix(world_coords, self.armature.matrix_world.inverted())
+        partners = find_mirror_pairs(rig_coords, self.tolerance)
+
+        centre = np.abs(rig_coords[:, 0]) <= self.tolerance
+        paired = (partners >= 0) | centre
+        paired_ratio = paired.mean() if len(paired) else 0.0
+        if paired_ratio < self.min_paired_ratio:
+            self.logger.info(f"  Not symmetric ({paired_ratio:.1%} paired) - using full transfer")
+            self.fallback(source, target_mesh)
+            return
+
+        # Mirror the -X side from its +X partners; everything else is computed
+        mirrored = (rig_coords[:, 0] < -self.tolerance) & (partners >= 0)
+        mirrored &= rig_coords[np.maximum(partners, 0), 0] > self.tolerance
+        computed = ~mirrored
+
+        # sampler(source, points) -> (weights, names) replaces the body surface lookup
+        if self.sampler:
+            computed_weights, names = self.sampler(source, world_coords[computed])
+            permutation = mirror_permutation(names)
+        else:
+            data = self.source_data(source)
+            # Same reach as the data transfer operator (None = unlimited)
+            mapping = surface_mapping.map_points(data['surface'], world_coords[computed], self.max_distance)
+            computed_weights = surface_mapping.interpolate(data['surface'], mapping, data['weights'])
+            names, permutation = data['names'], data['permutation']
+
+        weights = np.zeros((len(world_coords), len(names)), dtype=np.float32)
+        weights[computed] = computed_weights
+        weights[mirrored] = weights[partners[mirrored]][:, permutation]
+
+        write_weights(target_mesh, weights, names)
+        self.logger.info(f"  Symmetric transfer: {int(computed.sum())} computed, "
+                         f"{int(mirrored.sum())} mirrored vertices")
@@ -0,0 +1,112 @@
+"""Bone remapping on stand-ins for Blender armatures and meshes (no bpy needed)"""
+
+import logging
+import os
+import re
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bone_remap  # noqa: E402
+from weight_arrays import read_weights  # noqa: E402
+
+
+class VertexGroup:
+    def __init__(self, obj, name, index):
+        self.obj = obj
+        self.name = name
+        self.index = index
+
+    def add(self, indices, weight, _mode):
+        for index in indices:
+            self.obj.data.vertices[index].groups.append(SimpleNamespace(group=self.index, weight=weight))
+
+
+class VertexGroups(list):
+    def __init__(self, obj):
+        super().__init__()
+        self.obj = obj
+
+    def new(self, name):
+        group = VertexGroup(self.obj, name, len(self))
+        self.append(group)
+        return group
+
+    def clear(self):
+        super().clear()
+        for vertex in self.obj.data.vertices:
+            vertex.groups.clear()
+
+
+class Mesh:
+    def __init__(self, name, weights, names):
+        self.name = name
+        self.data = SimpleNamespace(vertices=[SimpleNamespace(groups=[]) for _ in range(len(weights))])
+        self.vertex_groups = VertexGroups(self)
+        for col, group_name in enumerate(names):
+            group = self.vertex_groups.new(group_name)
+            for row in np.flatnonzero(weights[:, col]):
+                group.add([int(row)], float(weights[row, col]), 'REPLACE')
+
+
+class Bone:
+    def __init__(self, armature, name):
+        self.armature = armature
+        self._name = name
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        # Like Blender, renaming a bone renames the matching group of every bound mesh
+        for obj in self.armature.bound:
+            for group in obj.vertex_groups:
+                if group.name == self._name:
+                    group.name = value
+        self._name = value
+
+
+class Bones(list):
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return next(bone for bone in self if bone.name == key)
+        return super().__getitem__(key)
+
+
+class Armature:
+    def __init__(self, names, bound):
+        self.bound = bound
+        self.data = SimpleNamespace(bones=Bones(Bone(self, name) for name in names))
+
+
+def remap(names, rules):
+    weights = np.array([[1.0, 0.0], [0.0, 0.5]], dtype=np.float32)
+    bound = Mesh('Body', weights, names)
+    unbound = Mesh('Garment', weights, names)
+    armature = Armature(names, [bound])
+    rules = [(re.compile(pattern), replacement) for pattern, replacement in rules]
+    bone_remap.remap_bone_names(armature, [bound, unbound], {}, rules, logging.getLogger(__name__))
+    return armature, bound, unbound
+
+
+def column(obj, name):
+    weights, names = read_weights(obj)
+    return weights[:, names.index(name)].tolist()
+
+
+def test_swap_on_bound_mesh():
+    armature, bound, unbound = remap(['Hand_L', 'Hand_R'], [('(.*)_L', r'\1_R'), ('(.*)_R', r'\1_L')])
+    assert [bone.name for bone in armature.data.bones] == ['Hand_R', 'Hand_L']
+    for obj in (bound, unbound):
+        assert column(obj, 'Hand_R') == [1.0, 0.0]
+        assert column(obj, 'Hand_L') == [0.0, 0.5]
+
+
+def test_prefix_rule_applied_once_on_bound_mesh():
+    _armature, bound, _unbound = remap(['Hips', 'Spine'], [('(.*)', r'J_\1')])
+    assert sorted(group.name for group in bound.vertex_groups) == ['J_Hips', 'J_Spine']
@@ -0,0 +1,104 @@
+"""
+Texture Array Helpers
+=====================
+
+Pure NumPy image operations for the texture stage: downscaling and atlas
+packing of (height, width, channels) float32 pixel arrays, stored bottom row
+first like Blender's Image.pixels.
+
+This module does not import bpy. Its array operations release the GIL, so
+images are processed in parallel on worker threads.
+"""
+
+import numpy as np
+
+
+def to_rgba(pixels: np.ndarray) -> np.ndarray:
+    """Expand 1- (grey), 2- (grey + alpha) or 3-channel pixels to RGBA"""
+    height, width, channels = pixels.shape
+    if channels == 4:
+        return pixels
+    rgb = np.repeat(pixels[:, :, :1], 3, axis=2) if channels < 3 else pixels[:, :, :3]
+    alpha = pixels[:, :, 1:2] if channels == 2 else np.ones((height, width, 1), dtype=pixels.dtype)
+    return np.concatenate([rgb, alpha], axis=2)
+
+
+def halve(pixels: np.ndarray) -> np.ndarray:
+    """2x2 box-filter downscale of an image with even dimensions"""
+    height, width, channels = pixels.shape
+    return pixels.reshape(height // 2, 2, width // 2, 2, channels).mean(axis=(1, 3), dtype=np.float32)
+
+
+def resample(pixels: np.ndarray, height: int, width: int) -> np.ndarray:
+    """Bilinear resample to an exact size"""
+    source_height, source_width = pixels.shape[:2]
+    ys = (np.arange(height, dtype=np.float32) + 0.5) * source_height / height - 0.5
+    xs = (np.arange(width, dtype=np.float32) + 0.5) * source_width / width - 0.5
+    ys = np.clip(ys, 0, source_height - 1)
+    xs = np.clip(xs, 0, source_width - 1)
+
+    y0 = np.floor(ys).astype(np.int64)
+    x0 = np.floor(xs).astype(np.int64)
+    y1 = np.minimum(y0 + 1, source_height - 1)
+    x1 = np.minimum(x0 + 1, source_width - 1)
+    fy = (ys - y0)[:, None, None]
+    fx = (xs - x0)[None, :, None]
+
+    top = pixels[y0][:, x0] * (1 - fx) + pixels[y0][:, x1] * fx
+    bottom = pixels[y1][:, x0] * (1 - fx) + pixels[y1][:, x1] * fx
+    return (top * (1 - fy) + bottom * fy).astype(np.float32)
+
+
+def downscale(pixels: np.ndarray, max_size: int) -> np.ndarray:
+    """Shrink an image so neither side exceeds max_size, keeping its aspect ratio"""
+    # Box-filter halving while possible (exact for power-of-two textures), then resample the rest
+    while max(pixels.shape[:2]) > max_size and pixels.shape[0] % 2 == 0 and pixels.shape[1] % 2 == 0 \
+            and max(pixels.shape[:2]) // 2 >= max_size:
+        pixels = halve(pixels)
+
+    height, width = pixels.shape[:2]
+    if max(height, width) <= max_size:
+        return pixels
+    scale = max_size / max(height, width)
+    return resample(pixels, max(1, round(height * scale)), max(1, round(width * scale)))
+
+
+def downscale_job(job: tuple) -> tuple:
+    """Worker entry point: (key, pixels, max_size) -> (key, downscaled pixels)"""
+    key, pixels, max_size = job
+    return key, downscale(pixels, max_size)
+
+
+def shelf_pack(sizes: list, atlas_size: int, padding: int) -> list:
+    """Bottom-left (x, y) of each (width, height) tile on shelves, or None if they do not fit"""
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    positions = [None] * len(sizes)
+    x = y = shelf_height = 0
+    for i in order:
+        width, height = sizes[i][0] + padding, sizes[i][1] + padding
+        if x + width > atlas_size:
+            x, y, shelf_height = 0, y + shelf_height, 0
+        if x + width > atlas_size or y + height > atlas_size:
+            return None
+        positions[i] = (x, y)
+        x += width
+        shelf_height = max(shelf_height, height)
+    return positions
+
+
+def build_atlas(tiles: list, positions: list, atlas_size: int) -> np.ndarray:
+    """Copy tiles, as RGBA, into an RGBA atlas at their positions"""
+    atlas = np.zeros((atlas_size, atlas_size, 4), dtype=np.float32)
+    for tile, (x, y) in zip(tiles, positions):
+        height, width = tile.shape[:2]
+        atlas[y:y + height, x:x + width] = to_rgba(tile)
+    return atlas
+
+
+def trim_atlas(atlas: np.ndarray, tiles: list, positions: list) -> np.ndarray:
+    """Crop unused top rows to the next power of two"""
+    used = max(y + tile.shape[0] for tile, (_x, y) in zip(tiles, positions))
+    height = 1
+    while height < used:
+        height *= 2
+    return atlas[:min(height, atlas.shape[0])]
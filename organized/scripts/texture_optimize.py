@@ -0,0 +1,234 @@
+"""
+Texture Downscale and Atlas
+===========================
+
+Shrinks the textures an export references, for Quest-bound builds and faster
+Unity texture import. Marvelous Designer ships one full-resolution texture
+per panel, and the FBX export only references those files
+(path_mode='AUTO', embed_textures=False).
+
+- Pixels are read in bulk with Image.pixels.foreach_get into NumPy.
+- Images with identical pixels are collapsed into one.
+- Images larger than MAX_SIZE are downscaled in parallel on a thread pool.
+  texture_ops's NumPy operations release the GIL, and threads neither copy
+  the pixel arrays nor fork the Blender process.
+- With ATLAS, garment-only materials that use a single texture are packed
+  into one atlas image. The UVs of their faces are remapped in bulk with
+  foreach_get/foreach_set. Materials whose UVs leave the 0-1 range (tiling)
+  are not atlased.
+
+The new images are written as PNG to <output>_textures/ next to the
+exported FBX, and the materials point at them, so the export references the
+optimized files.
+"""
+
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import bpy
+import numpy as np
+
+import texture_ops
+
+ATLAS_PADDING = 4
+
+
+def image_nodes(material) -> list:
+    """Image texture nodes of a material that reference an image with pixels"""
+    if not (material and material.use_nodes and material.node_tree):
+        return []
+    return [node for node in material.node_tree.nodes
+            if node.type == 'TEX_IMAGE' and node.image and node.image.size[0] > 0]
+
+
+def read_pixels(image) -> np.ndarray:
+    """Image pixels as a (height, width, channels) float32 array"""
+    width, height = image.size
+    pixels = np.empty(width * height * image.channels, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    return pixels.reshape(height, width, image.channels)
+
+
+def write_image(name: str, pixels: np.ndarray, path: str, colorspace: str):
+    """Save pixels as a PNG and return it as a Blender image"""
+    pixels = texture_ops.to_rgba(pixels)
+    height, width = pixels.shape[:2]
+    image = bpy.data.images.new(name, width, height, alpha=True)
+    image.colorspace_settings.name = colorspace
+    image.pixels.foreach_set(np.ascontiguousarray(pixels, dtype=np.float32).ravel())
+    image.filepath_raw = path
+    image.file_format = 'PNG'
+    image.save()
+    return image
+
+
+def run_pool(jobs: list, workers: int, logger) -> dict:
+    """Run texture_ops.downscale_job over jobs on worker threads; {key: pixels}"""
+    if not jobs:
+        return {}
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    logger.info(f"Downscaling {len(jobs)} textures with {workers} workers")
+    with ThreadPoolExecutor(workers) as executor:
+        return dict(executor.map(texture_ops.downscale_job, jobs))
+
+
+def loop_mask(mesh, slot_indices: set) -> np.ndarray:
+    """Boolean mask of the loops of faces using any of the material slots"""
+    material_index = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('material_index', material_index)
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+    return np.repeat(np.isin(material_index, list(slot_indices)), loop_totals)
+
+
+def read_uvs(mesh) -> np.ndarray:
+    uvs = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+    mesh.uv_layers.active.data.foreach_get('uv', uvs)
+    return uvs.reshape(-1, 2)
+
+
+def tiling_materials(meshes) -> set:
+    """Names of materials whose faces have UVs outside the 0-1 square"""
+    tiling = set()
+    for obj in meshes:
+        mesh = obj.data
+        if not mesh.uv_layers.active:
+            tiling.update(slot.material.name for slot in obj.material_slots if slot.material)
+            continue
+        uvs = read_uvs(mesh)
+        for index, slot in enumerate(obj.material_slots):
+            if slot.material is None or slot.material.name in tiling:
+                continue
+            mask = loop_mask(mesh, {index})
+            if mask.any() and (uvs[mask].min() < -1e-4 or uvs[mask].max() > 1.0001):
+                tiling.add(slot.material.name)
+    return tiling
+
+
+def remap_uvs(meshes, tiles: dict):
+    """Move the UVs of faces using atlased materials into their tiles: {material: (scale, offset)}"""
+    remapped = set()
+    for obj in meshes:
+        mesh = obj.data
+        if mesh.name in remapped or not mesh.uv_layers.active:
+            continue
+        remapped.add(mesh.name)
+        uvs = read_uvs(mesh)
+        for index, slot in enumerate(obj.material_slots):
+            if slot.material is None or slot.material.name not in tiles:
+                continue
+            scale, offset = tiles[slot.material.name]
+            mask = loop_mask(mesh, {index})
+            uvs[mask] = uvs[mask] * scale + offset
+        mesh.uv_layers.active.data.foreach_set('uv', uvs.ravel())
+
+
+def pack_atlas(tiles: dict, atlas_size: int, logger) -> tuple:
+    """Pack {image name: pixels}; returns (atlas, {image name: (scale, offset)}) or (None, {})"""
+    names = list(tiles)
+    pixels = [texture_ops.to_rgba(tiles[name]) for name in names]
+    for _attempt in range(4):
+        positions = texture_ops.shelf_pack([(p.shape[1], p.shape[0]) for p in pixels], atlas_size, ATLAS_PADDING)
+        if positions is not None:
+            break
+        pixels = [texture_ops.downscale(p, max(1, max(p.shape[:2]) // 2)) for p in pixels]
+    else:
+        logger.warning(f"Textures do not fit a {atlas_size}px atlas - atlas skipped")
+        return None, {}
+
+    atlas = texture_ops.trim_atlas(texture_ops.build_atlas(pixels, positions, atlas_size), pixels, positions)
+    atlas_height = atlas.shape[0]
+    placement = {}
+    for name, tile, (x, y) in zip(names, pixels, positions):
+        height, width = tile.shape[:2]
+        placement[name] = (np.array([width / atlas_size, height / atlas_height], dtype=np.float32),
+                           np.array([x / atlas_size, y / atlas_height], dtype=np.float32))
+    return atlas, placement
+
+
+def optimize_textures(meshes, garment_names: list, output_fbx: str, max_size: int, atlas: bool,
+                      atlas_size: int, workers: int, logger) -> dict:
+    """Deduplicate, downscale and optionally atlas the textures of meshes"""
+    logger.info("=== OPTIMIZING TEXTURES ===")
+    texture_dir = os.path.splitext(output_fbx)[0] + "_textures"
+    materials = {slot.material.name: slot.material for obj in meshes
+                 for slot in obj.material_slots if slot.material}
+    images = {node.image.name: node.image for material in materials.values() for node in image_nodes(material)}
+    if not images:
+        logger.info("No image textures - skipped")
+        return {}
+
+    # Identical pixels (e.g. the same texture exported once per panel) become one image
+    pixels = {}
+    canonical = {}
+    by_hash = {}
+    for name, image in images.items():
+        data = read_pixels(image)
+        digest = hashlib.sha256(data.tobytes()).hexdigest()
+        canonical[name] = by_hash.setdefault(digest, name)
+        if canonical[name] == name:
+            pixels[name] = data
+    before = sum(image.size[0] * image.size[1] for image in images.values())
+
+    jobs = [(name, data, max_size) for name, data in pixels.items() if max(data.shape[:2]) > max_size]
+    resized = run_pool(jobs, workers, logger)
+    pixels.update(resized)
+
+    # Garment-only materials with a single texture share one atlas
+    placement = {}
+    atlas_image = None
+    if atlas:
+        garments = [obj for obj in meshes if obj.name in set(garment_names)]
+        others = [obj for obj in meshes if obj.name not in set(garment_names)]
+        excluded = tiling_materials(garments)
+        excluded.update(slot.material.name for obj in others for slot in obj.material_slots if slot.material)
+        candidates = {name: material for name, material in materials.items()
+                      if name not in excluded and len(image_nodes(material)) == 1}
+        tile_images = {canonical[image_nodes(material)[0].image.name] for material in candidates.values()}
+        if len(tile_images) > 1:
+            atlas_pixels, image_placement = pack_atlas({name: pixels[name] for name in sorted(tile_images)},
+                                                       atlas_size, logger)
+            if atlas_pixels is not None:
+                os.makedirs(texture_dir, exist_ok=True)
+                atlas_image = write_image("GarmentAtlas", atlas_pixels,
+                                          os.path.join(texture_dir, "GarmentAtlas.png"),
+                                          images[sorted(tile_images)[0]].colorspace_settings.name)
+                placement = {name: image_placement[canonical[image_nodes(material)[0].image.name]]
+                             for name, material in candidates.items()}
+                remap_uvs(garments, placement)
+                for name in placement:
+                    image_nodes(materials[name])[0].image = atlas_image
+                logger.info(f"✓ Atlas: {len(tile_images)} textures from {len(placement)} materials "
+                            f"({atlas_pixels.shape[1]}x{atlas_pixels.shape[0]})")
+
+    # Remaining nodes point at the downscaled copy of their image, or at the kept duplicate
+    nodes = [node for name, material in materials.items() if name not in placement
+             for node in image_nodes(material)]
+    used = {canonical[node.image.name] for node in nodes}
+    written = {}
+    for name in sorted(used & set(resized)):
+        os.makedirs(texture_dir, exist_ok=True)
+        path = os.path.join(texture_dir, f"{bpy.path.clean_name(name)}.png")
+        written[name] = write_image(f"{name}_optimized", pixels[name], path,
+                                    images[name].colorspace_settings.name)
+    for node in nodes:
+        name = canonical[node.image.name]
+        node.image = written.get(name, images[name])
+
+    after = sum(pixels[name].shape[0] * pixels[name].shape[1] for name in used)
+    if atlas_image is not None:
+        after += atlas_image.size[0] * atlas_image.size[1]
+    report = {
+        'images': len(images),
+        'unique': len(pixels),
+        'downscaled': len(resized),
+        'written': len(written) + (1 if atlas_image else 0),
+        'atlas_materials': sorted(placement),
+        'pixels_before': before,
+        'pixels_after': after,
+        'directory': texture_dir,
+    }
+    logger.info(f"Textures: {len(images)} images, {len(pixels)} unique, {len(resized)} downscaled "
+                f"({before / 1e6:.1f} -> {after / 1e6:.1f} Mpx)")
+    return report
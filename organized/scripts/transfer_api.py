@@ -0,0 +1,67 @@
+"""
+Weight Transfer Library API
+===========================
+
+Runs the fbx_weight_transfer pipeline in-process and returns a TransferResult
+instead of log text, so an orchestrator can run many jobs in one interpreter
+(Blender's Python, or the ``bpy`` module wheel) without paying a Blender
+launch per job.
+
+Usage:
+    import sys
+    sys.path.insert(0, "organized/scripts")
+    import transfer_api
+
+    result = transfer_api.transfer("in.fbx", "weight_transfer.conf", "out.fbx")
+    for garment in result.garments:
+        print(garment.name, garment.vertex_groups, garment.seconds)
+    print(result.to_dict())
+
+Each path-based job starts from an empty factory scene, so names and leftover
+data from earlier jobs cannot leak into the next export.
+"""
+
+import logging
+import os
+
+import bpy
+
+from fbx_weight_transfer import WeightTransferConfig, run_pipeline
+from transfer_result import GarmentResult, TransferResult
+
+__all__ = ['GarmentResult', 'TransferResult', 'WeightTransferConfig', 'load_config', 'transfer']
+
+
+def load_config(config=None) -> WeightTransferConfig:
+    """WeightTransferConfig from a config object, a .conf path or defaults"""
+    if isinstance(config, WeightTransferConfig):
+        return config
+    if config is not None and not os.path.exists(config):
+        raise FileNotFoundError(f"Config file not found: {config}")
+    return WeightTransferConfig(config)
+
+
+def transfer(input_fbx=None, config=None, output_fbx: str = None, resume: bool = False,
+             logger: logging.Logger = None, reset: bool = True, stages: list = None) -> TransferResult:
+    """Transfer weights and export; returns a TransferResult
+
+    input_fbx is an FBX path, or None to process the data already loaded in
+    Blender (every object in bpy.data). output_fbx defaults to
+    <input>_UNITY_READY.fbx next to an input path. stages limits the run to
+    those stages and what they depend on, e.g. ['verify'].
+    """
+    logger = logger or logging.getLogger('fbx_weight_transfer')
+    config = load_config(config)
+
+    if isinstance(input_fbx, (str, os.PathLike)):
+        input_fbx = os.fspath(input_fbx)
+        output_fbx = output_fbx or os.path.splitext(input_fbx)[0] + "_UNITY_READY.fbx"
+        if reset and not resume:
+            bpy.ops.wm.read_factory_settings(use_empty=True)
+    elif input_fbx is None:
+        if not output_fbx:
+            raise ValueError("output_fbx is required when processing the loaded scene")
+    else:
+        raise TypeError(f"Expected an FBX path or None, got {type(input_fbx).__name__}")
+
+    return run_pipeline(input_fbx, output_fbx, config, logger, resume, stages)
@@ -0,0 +1,66 @@
+"""
+Structured Transfer Results
+===========================
+
+Dataclasses returned by the weight transfer pipeline, so callers get
+per-garment timings, counts and stage reports instead of scraping log text.
+"""
+
+import time
+from dataclasses import asdict, dataclass, field
+
+
+@dataclass
+class GarmentResult:
+    """Outcome of the weight transfer for one garment"""
+    name: str
+    source: str = ''
+    vertices: int = 0
+    vertex_groups: int = 0
+    seconds: float = 0.0
+    success: bool = False
+    error: str = None
+
+
+@dataclass
+class TransferResult:
+    """Outcome of one pipeline run"""
+    input_fbx: str = None
+    output_fbx: str = None
+    success: bool = False
+    source_mesh: str = None
+    armature: str = None
+    resumed_stage: str = None
+    cached_stages: list = field(default_factory=list)
+    garments: list = field(default_factory=list)
+    rigged_meshes: int = 0
+    total_meshes: int = 0
+    stage_seconds: dict = field(default_factory=dict)
+    reports: dict = field(default_factory=dict)
+    files: list = field(default_factory=list)
+    error: str = None
+    _last_mark: float = field(default_factory=time.perf_counter, repr=False, compare=False)
+
+    @property
+    def successful_transfers(self) -> int:
+        return sum(1 for garment in self.garments if garment.success)
+
+    @property
+    def total_seconds(self) -> float:
+        return round(sum(self.stage_seconds.values()), 3)
+
+    def mark(self, stage: str):
+        """Record the time spent since the previous mark as a stage"""
+        now = time.perf_counter()
+        self.stage_seconds[stage] = round(now - self._last_mark, 3)
+        self._last_mark = now
+
+    def fail(self, error: str) -> 'TransferResult':
+        self.success = False
+        self.error = error
+        return self
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data.pop('_last_mark')
+        return data
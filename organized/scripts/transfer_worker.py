@@ -0,0 +1,63 @@
+"""
+Warm Transfer Worker
+====================
+
+Long-running Blender process used by watch_daemon.py. Blender starts once;
+every job after that only pays for its own import, transfer and export.
+
+Reads one JSON job per line from stdin:
+    {"id": 1, "input": "in.fbx", "output": "out.fbx", "config": "weight_transfer.conf"}
+
+and answers each with one line on stdout, prefixed with RESULT_PREFIX so it
+can be told apart from Blender's own output. The payload is the
+TransferResult as a dict plus the job id. Log output goes to stderr.
+
+Usage:
+    blender --background --python transfer_worker.py
+"""
+
+import json
+import logging
+import sys
+import traceback
+from pathlib import Path
+
+# Blender does not add the script directory to sys.path
+sys.path.insert(0, str(Path(__file__).parent))
+
+RESULT_PREFIX = '@@transfer-result '
+
+
+def reply(payload: dict):
+    print(RESULT_PREFIX + json.dumps(payload, default=str, ensure_ascii=False), flush=True)
+
+
+def main():
+    # Imported here so the daemon can import RESULT_PREFIX without bpy
+    import transfer_api
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        stream=sys.stderr
+    )
+    logger = logging.getLogger('fbx_weight_transfer')
+    reply({'ready': True})
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        logger.info(f"=== JOB {job['id']}: {job['input']} ===")
+        try:
+            result = transfer_api.transfer(job['input'], job.get('config'), job['output'],
+                                           logger=logger).to_dict()
+        except Exception as e:
+            logger.error(f"Job {job['id']} failed: {e}")
+            result = {'success': False, 'error': str(e), 'traceback': traceback.format_exc()}
+        result['id'] = job['id']
+        reply(result)
+
+
+if __name__ == "__main__":
+    main()
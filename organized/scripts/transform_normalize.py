@@ -0,0 +1,90 @@
+"""
+Bulk Transform Normalization
+============================
+
+Bakes the object transforms of the body and garments into their vertex data
+so every mesh lives in the armature's space before transfer. Garments from
+Marvelous Designer often carry unapplied scale or rotation, and matching
+nearest surfaces across inconsistent spaces gives bad weights.
+
+Per mesh this is one matmul over the (V, 3) coordinate array (and over each
+shape key), written back with foreach_set, after which the mesh's transform
+is the armature's, scaled by GLOBAL_SCALE. World placement does not change.
+No operators run and no selection changes, so there are no per-object
+depsgraph updates. Children of a normalized mesh keep their world placement
+through their parent inverse matrix.
+"""
+
+import bpy
+import numpy as np
+from mathutils import Matrix
+
+from weight_arrays import apply_matrix
+
+
+def is_aligned(matrix, target, tolerance: float = 1e-6) -> bool:
+    """Whether two 4x4 matrices are equal within tolerance"""
+    return np.allclose(np.array(matrix), np.array(target), atol=tolerance)
+
+
+def bake_matrix(obj, matrix):
+    """Transform a mesh's vertices and shape keys by matrix"""
+    mesh = obj.data
+    coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+
+    blocks = [mesh.vertices]
+    if mesh.shape_keys:
+        blocks += [key_block.data for key_block in mesh.shape_keys.key_blocks]
+    for block in blocks:
+        block.foreach_get('co', coords)
+        block.foreach_set('co', apply_matrix(coords.reshape(-1, 3), matrix).ravel())
+
+    # A mirroring matrix turns faces inside out
+    if matrix.determinant() < 0:
+        mesh.flip_normals()
+    mesh.update()
+
+
+def normalize_transforms(armature, meshes, global_scale: float, logger) -> dict:
+    """Bake mesh transforms so each mesh's transform is the armature's times global_scale"""
+    logger.info("=== NORMALIZING TRANSFORMS ===")
+    target = armature.matrix_world @ Matrix.Scale(global_scale, 4)
+    identity = Matrix.Identity(4)
+
+    # World matrices as imported; nothing is re-evaluated while transforms change
+    worlds = {obj.name: obj.matrix_world.copy() for obj in bpy.data.objects}
+
+    report = {'normalized': [], 'skipped': []}
+    for obj in meshes:
+        if is_aligned(worlds[obj.name], target) and is_aligned(obj.matrix_basis, identity):
+            continue
+        if obj.parent and obj.parent_type not in ('OBJECT', 'ARMATURE'):
+            logger.warning(f"  ✗ {obj.name}: parented to a {obj.parent_type.lower()}, skipped")
+            report['skipped'].append(obj.name)
+            continue
+        if obj.data.users > 1:
+            logger.warning(f"  ✗ {obj.name}: mesh data shared by {obj.data.users} objects, skipped")
+            report['skipped'].append(obj.name)
+            continue
+
+        bake_matrix(obj, target.inverted() @ worlds[obj.name])
+        report['normalized'].append(obj.name)
+        logger.info(f"  ✓ {obj.name}: {len(obj.data.vertices)} vertices baked")
+
+    # Reset transforms of normalized meshes; their children stay where they were
+    normalized = set(report['normalized'])
+    new_worlds = {name: (target if name in normalized else world) for name, world in worlds.items()}
+    for obj in bpy.data.objects:
+        if obj.name not in normalized and not (obj.parent and obj.parent.name in normalized):
+            continue
+        basis = identity if obj.name in normalized else obj.matrix_basis.copy()
+        if obj.parent is None:
+            obj.matrix_basis = new_worlds[obj.name]
+        else:
+            parent_world = new_worlds[obj.parent.name]
+            obj.matrix_parent_inverse = parent_world.inverted() @ new_worlds[obj.name] @ basis.inverted()
+            obj.matrix_basis = basis
+
+    logger.info(f"Normalized {len(normalized)}/{len(meshes)} meshes to the armature space "
+                f"(scale {global_scale})")
+    return report
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+Watch-Folder Transfer Daemon
+============================
+
+Watches the artist drop directories and turns every saved FBX into a
+Unity-ready FBX without anyone running transfer_weights.sh by hand.
+
+- inotify watches (polling fallback where inotify does not work, e.g. WSL2
+  drives under /mnt)
+- debouncing: a file is queued once it has had no events for DEBOUNCE_SECONDS
+  and its size and mtime stopped changing, so half-written files are skipped
+- priority queue: files from earlier INPUT_DIRS go first; repeated saves of a
+  queued file coalesce into one job
+- a warm Blender worker (transfer_worker.py) runs the jobs, so only the first
+  job pays Blender's startup; a worker that dies while starting is retried
+  with exponential backoff, and the daemon gives up after
+  WORKER_START_RETRIES failed starts
+- status as a JSON file, and optionally over HTTP on localhost
+
+Runs with plain Python; Blender is only started for the worker.
+
+Usage:
+    python watch_daemon.py [--config weight_transfer.conf]
+"""
+
+import argparse
+import configparser
+import ctypes
+import ctypes.util
+import heapq
+import itertools
+import json
+import os
+import queue
+import select
+import signal
+import struct
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from transfer_worker import RESULT_PREFIX
+
+SCRIPT_DIR = Path(__file__).parent
+RECENT_JOBS = 50
+WORKER_BACKOFF_SECONDS = 1.0
+WORKER_BACKOFF_MAX = 60.0
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """Changed file paths in watched directories, from Linux inotify"""
+
+    def __init__(self, directories: list):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self.directories = {}
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        for directory in directories:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), mask)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+            self.directories[wd] = directory
+
+    def wait(self, timeout: float) -> list:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        paths = []
+        offset = 0
+        while offset < len(data):
+            wd, _mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name and wd in self.directories:
+                paths.append(os.path.join(self.directories[wd], os.fsdecode(name)))
+        return paths
+
+
+class PollingWatcher:
+    """Changed file paths in watched directories, by comparing stat results"""
+
+    def __init__(self, directories: list):
+        self.directories = directories
+        self.seen = self.scan()
+
+    def scan(self) -> dict:
+        found = {}
+        for directory in self.directories:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        found[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        return found
+
+    def wait(self, timeout: float) -> list:
+        time.sleep(timeout)
+        current = self.scan()
+        changed = [path for path, signature in current.items() if self.seen.get(path) != signature]
+        self.seen = current
+        return changed
+
+
+def file_signature(path: str):
+    """(size, mtime) of a file, or None once it is gone"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class Debouncer:
+    """Holds changed files back until they stop changing"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.pending = {}
+
+    def touch(self, path: str, now: float):
+        self.pending[path] = (now, file_signature(path))
+
+    def ready(self, now: float) -> list:
+        settled = []
+        for path, (last_event, signature) in list(self.pending.items()):
+            if now - last_event < self.seconds:
+                continue
+            current = file_signature(path)
+            if current is None:
+                del self.pending[path]
+            elif current != signature:
+                self.pending[path] = (now, current)
+            else:
+                del self.pending[path]
+                settled.append(path)
+        return settled
+
+
+class JobQueue:
+    """Priority queue of input files; repeated saves of a queued file coalesce"""
+
+    def __init__(self):
+        self.heap = []
+        self.jobs = {}
+        self.counter = itertools.count(1)
+
+    def push(self, path: str, priority: int) -> bool:
+        """Queue a file; returns False when it was coalesced into a queued job"""
+        job = self.jobs.get(path)
+        if job:
+            job['saves'] += 1
+            if priority < job['priority']:
+                job['priority'] = priority
+                heapq.heappush(self.heap, (priority, job['seq'], path))
+            return False
+
+        seq = next(self.counter)
+        self.jobs[path] = {'input': path, 'priority': priority, 'seq': seq, 'saves': 1,
+                           'queued': datetime.now().isoformat(timespec='seconds')}
+        heapq.heappush(self.heap, (priority, seq, path))
+        return True
+
+    def pop(self) -> dict:
+        while self.heap:
+            priority, seq, path = heapq.heappop(self.heap)
+            job = self.jobs.get(path)
+            if job and job['seq'] == seq and job['priority'] == priority:
+                return self.jobs.pop(path)
+        return None
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def snapshot(self) -> list:
+        return sorted(self.jobs.values(), key=lambda job: (job['priority'], job['seq']))
+
+
+class BlenderWorker:
+    """A warm Blender process running transfer_worker.py"""
+
+    def __init__(self, blender: str, log_path: str):
+        self.blender = blender
+        self.log_path = log_path
+        self.process = None
+        self.results = queue.Queue()
+        self.ready = False
+
+    def start(self):
+        self.ready = False
+        log = open(self.log_path, 'a', encoding='utf-8')
+        self.process = subprocess.Popen(
+            [self.blender, '--background', '--python', str(SCRIPT_DIR / 'transfer_worker.py')],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=log,
+            text=True, encoding='utf-8', bufsize=1
+        )
+        log.close()
+        threading.Thread(target=self.read_results, args=(self.process,), daemon=True).start()
+
+    def read_results(self, process):
+        for line in process.stdout:
+            if line.startswith(RESULT_PREFIX):
+                self.results.put(json.loads(line[len(RESULT_PREFIX):]))
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def submit(self, job: dict):
+        self.process.stdin.write(json.dumps(job, ensure_ascii=False) + '\n')
+        self.process.stdin.flush()
+
+    def stop(self):
+        if self.alive():
+            self.process.stdin.close()
+            try:
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class TransferDaemon:
+    """Watch loop tying the watcher, debouncer, queue and worker together"""
+
+    def __init__(self, settings: dict):
+        self.settings = settings
+        self.directories = settings['input_dirs']
+        self.debouncer = Debouncer(settings['debounce'])
+        self.queue = JobQueue()
+        self.worker = BlenderWorker(settings['blender'], settings['worker_log'])
+        self.running = None
+        self.recent = []
+        self.started = datetime.now().isoformat(timespec='seconds')
+        self.stopping = False
+        self.start_failures = 0
+        self.retry_at = None
+        self.gave_up = False
+        self.lock = threading.Lock()
+
+        try:
+            self.watcher = InotifyWatcher(self.directories)
+            self.watch_mode = 'inotify'
+        except OSError:
+            self.watcher = PollingWatcher(self.directories)
+            self.watch_mode = 'polling'
+
+    def output_path(self, input_fbx: str) -> str:
+        stem = Path(input_fbx).stem
+        return str(Path(self.settings['output_dir']) / f"{stem}{self.settings['output_suffix']}.fbx")
+
+    def priority(self, path: str) -> int:
+        parent = os.path.dirname(os.path.abspath(path))
+        for index, directory in enumerate(self.directories):
+            if os.path.abspath(directory) == parent:
+                return index
+        return len(self.directories)
+
+    def is_input(self, path: str) -> bool:
+        """FBX files that are not outputs (<name><OUTPUT_SUFFIX>, plus any variant SUFFIX)"""
+        name = os.path.basename(path)
+        return (name.lower().endswith('.fbx') and not name.startswith('.')
+                and not Path(name).stem.endswith(tuple(self.settings['output_suffixes'])))
+
+    def queue_stale_inputs(self):
+        """Queue inputs saved while the daemon was not running"""
+        for directory in self.directories:
+            for entry in sorted(os.scandir(directory), key=lambda entry: entry.name):
+                if entry.is_file() and self.is_input(entry.path):
+                    output = self.output_path(entry.path)
+                    if not os.path.exists(output) or os.path.getmtime(output) < entry.stat().st_mtime:
+                        self.queue.push(entry.path, self.priority(entry.path))
+
+    def ensure_worker(self) -> bool:
+        """Start the worker when needed, backing off after failed starts; True once it is ready"""
+        if self.worker.alive():
+            return self.worker.ready
+
+        # A worker that exited before reporting ready failed to start
+        if self.worker.process is not None and not self.worker.ready and self.retry_at is None:
+            self.start_failures += 1
+            if self.start_failures > self.settings['worker_start_retries']:
+                print(f"✗ Blender worker failed to start {self.start_failures} times - giving up "
+                      f"(see {self.settings['worker_log']})")
+                self.gave_up = True
+                self.stopping = True
+                return False
+            delay = min(WORKER_BACKOFF_MAX, WORKER_BACKOFF_SECONDS * 2 ** (self.start_failures - 1))
+            self.retry_at = time.monotonic() + delay
+            print(f"✗ Blender worker exited during startup ({self.worker.process.returncode}); "
+                  f"retrying in {delay:g}s")
+
+        if self.retry_at is not None and time.monotonic() < self.retry_at:
+            return False
+        self.retry_at = None
+        self.worker.start()
+        return False
+
+    def dispatch(self):
+        if not self.ensure_worker():
+            return
+        job = self.queue.pop()
+        if job is None:
+            return
+        job['id'] = job['seq']
+        job['output'] = self.output_path(job['input'])
+        job['config'] = self.settings['config']
+        job['started'] = datetime.now().isoformat(timespec='seconds')
+        job['_started'] = time.monotonic()
+        self.running = job
+        self.worker.submit({key: job[key] for key in ('id', 'input', 'output', 'config')})
+        print(f"▶ {job['input']} (saves coalesced: {job['saves']})")
+
+    def finish(self, result: dict):
+        job = self.running
+        self.running = None
+        entry = {key: value for key, value in job.items() if not key.startswith('_')}
+        entry.update({
+            'finished': datetime.now().isoformat(timespec='seconds'),
+            'seconds': round(time.monotonic() - job['_started'], 3),
+            'success': bool(result.get('success')),
+            'error': result.get('error'),
+            'garments': len(result.get('garments') or []),
+            'stage_seconds': result.get('stage_seconds'),
+        })
+        self.recent = [entry] + self.recent[:RECENT_JOBS - 1]
+        mark = '✓' if entry['success'] else '✗'
+        print(f"{mark} {job['input']} -> {job['output']} ({entry['seconds']}s)")
+
+    def collect_results(self):
+        while True:
+            try:
+                result = self.worker.results.get_nowait()
+            except queue.Empty:
+                break
+            if result.get('ready'):
+                self.worker.ready = True
+                self.start_failures = 0
+            elif self.running and result.get('id') == self.running['id']:
+                self.finish(result)
+
+        # A crashed worker fails its job and is restarted on the next dispatch
+        if self.running and not self.worker.alive():
+            self.finish({'success': False, 'error': f"worker exited with {self.worker.process.returncode}"})
+
+    def status(self) -> dict:
+        with self.lock:
+            running = {key: value for key, value in self.running.items()
+                       if not key.startswith('_')} if self.running else None
+            return {
+                'updated': datetime.now().isoformat(timespec='seconds'),
+                'started': self.started,
+                'watch_mode': self.watch_mode,
+                'directories': self.directories,
+                'worker': {
+                    'pid': self.worker.process.pid if self.worker.alive() else None,
+                    'ready': self.worker.ready,
+                    'start_failures': self.start_failures,
+                },
+                'pending': sorted(self.debouncer.pending),
+                'queued': self.queue.snapshot(),
+                'running': running,
+                'recent': self.recent,
+            }
+
+    def write_status(self):
+        path = self.settings['status_file']
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.status(), f, indent=2, ensure_ascii=False)
+        os.replace(path + '.tmp', path)
+
+    def serve_status(self, port: int):
+        daemon = self
+
+        class StatusHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = json.dumps(daemon.status(), ensure_ascii=False).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', port), StatusHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"Status endpoint: http://127.0.0.1:{port}/")
+
+    def stop(self, *_args):
+        self.stopping = True
+
+    def run(self, tick: float = 0.5):
+        print(f"Watching {', '.join(self.directories)} ({self.watch_mode})")
+        self.queue_stale_inputs()
+        if self.settings['status_port']:
+            self.serve_status(self.settings['status_port'])
+
+        while not self.stopping:
+            now = time.monotonic()
+            with self.lock:
+                for path in self.watcher.wait(tick):
+                    if self.is_input(path):
+                        self.debouncer.touch(path, now)
+                for path in self.debouncer.ready(time.monotonic()):
+                    self.queue.push(path, self.priority(path))
+
+                self.collect_results()
+                if self.running is None and len(self.queue):
+                    self.dispatch()
+            self.write_status()
+
+        self.worker.stop()
+        self.write_status()
+
+
+def load_settings(config_file: str) -> dict:
+    """Daemon settings from the [PATHS] and [DAEMON] config sections"""
+    config = configparser.ConfigParser()
+    config.read(config_file)
+
+    def path(value: str) -> str:
+        return str((SCRIPT_DIR / value).resolve())
+
+    input_dirs = config.get('DAEMON', 'INPUT_DIRS', fallback=None) or \
+        config.get('PATHS', 'DEFAULT_INPUT_DIR', fallback='../workspace/input')
+    logs_dir = path(config.get('PATHS', 'LOGS_DIR', fallback='../workspace/logs'))
+    status_file = config.get('DAEMON', 'STATUS_FILE', fallback=None)
+    output_suffix = config.get('DAEMON', 'OUTPUT_SUFFIX', fallback='_UNITY_READY')
+    # Output variants are written as <name><OUTPUT_SUFFIX><SUFFIX>.fbx
+    variant_suffixes = [config.get(section, 'SUFFIX', fallback=f"_{section.split(':', 1)[1].strip()}")
+                        for section in config.sections() if section.startswith('VARIANT:')]
+
+    return {
+        'config': str(Path(config_file).resolve()),
+        'blender': path(config.get('PATHS', 'BLENDER_BIN', fallback='../bin/blender')),
+        'input_dirs': [path(item.strip()) for item in input_dirs.split(',') if item.strip()],
+        'output_dir': path(config.get('DAEMON', 'OUTPUT_DIR', fallback=None) or
+                           config.get('PATHS', 'DEFAULT_OUTPUT_DIR', fallback='../workspace/output')),
+        'output_suffix': output_suffix,
+        'output_suffixes': [output_suffix] + [output_suffix + suffix for suffix in variant_suffixes],
+        'worker_start_retries': config.getint('DAEMON', 'WORKER_START_RETRIES', fallback=5),
+        'debounce': config.getfloat('DAEMON', 'DEBOUNCE_SECONDS', fallback=2.0),
+        'status_file': path(status_file) if status_file else os.path.join(logs_dir, 'daemon_status.json'),
+        'status_port': config.getint('DAEMON', 'STATUS_PORT', fallback=0),
+        'worker_log': os.path.join(logs_dir, f"transfer_worker_{datetime.now():%Y%m%d_%H%M%S}.log"),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Watch drop directories and transfer weights on save")
+    parser.add_argument('--config', default=str(SCRIPT_DIR / 'weight_transfer.conf'),
+                        help="weight_transfer.conf with [PATHS] and [DAEMON] settings")
+    args = parser.parse_args(argv)
+
+    settings = load_settings(args.config)
+    if not os.path.exists(settings['blender']):
+        print(f"Error: Blender not found at '{settings['blender']}'")
+        return 1
+    for directory in settings['input_dirs'] + [settings['output_dir']]:
+        os.makedirs(directory, exist_ok=True)
+    os.makedirs(os.path.dirname(settings['status_file']), exist_ok=True)
+    os.makedirs(os.path.dirname(settings['worker_log']), exist_ok=True)
+
+    daemon = TransferDaemon(settings)
+    signal.signal(signal.SIGINT, daemon.stop)
+    signal.signal(signal.SIGTERM, daemon.stop)
+    daemon.run()
+    return 1 if daemon.gave_up else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Bulk Mesh Array Helpers
+=======================
+
+Helpers for reading and writing mesh data as NumPy arrays so pipeline stages
+can work on whole meshes at once instead of looping over vertices.
+
+Weights are handled as a dense (vertices x groups) float32 matrix whose
+columns follow the order of the returned group names. Vertex group weights
+have no foreach_get accessor in the Python API, so read_weights collects
+them in one flat pass and fills the matrix with a single scatter.
+"""
+
+import numpy as np
+
+
+def read_coordinates(obj, world: bool = False) -> np.ndarray:
+    """Read vertex coordinates as a (V, 3) array, optionally in world space"""
+    mesh = obj.data
+    coords = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', coords)
+    coords = coords.reshape(-1, 3)
+
+    if world:
+        coords = apply_matrix(coords, obj.matrix_world)
+
+    return coords
+
+
+def apply_matrix(coords: np.ndarray, matrix) -> np.ndarray:
+    """Apply a 4x4 matrix to a (N, 3) coordinate array"""
+    matrix = np.array(matrix, dtype=np.float64)
+    return (coords @ matrix[:3, :3].T + matrix[:3, 3]).astype(np.float32)
+
+
+def read_triangles(obj) -> np.ndarray:
+    """Read the loop triangulation as a (T, 3) array of vertex indices"""
+    mesh = obj.data
+    mesh.calc_loop_triangles()
+    triangles = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get('vertices', triangles)
+    return triangles.reshape(-1, 3)
+
+
+def read_loop_normals(mesh) -> np.ndarray:
+    """Split (per-loop) normals as a (L, 3) array"""
+    if hasattr(mesh, 'calc_normals_split'):
+        mesh.calc_normals_split()
+    normals = np.empty(len(mesh.loops) * 3, dtype=np.float32)
+    mesh.loops.foreach_get('normal', normals)
+    return normals.reshape(-1, 3)
+
+
+def read_weights(obj) -> tuple:
+    """Read all vertex group weights as a dense (V, G) matrix and group names"""
+    names = [vgroup.name for vgroup in obj.vertex_groups]
+    weights = np.zeros((len(obj.data.vertices), len(names)), dtype=np.float32)
+
+    # Per-vertex group collections are the only access; flatten them once
+    memberships = [vertex.groups for vertex in obj.data.vertices]
+    counts = np.fromiter((len(groups) for groups in memberships), dtype=np.int64, count=len(memberships))
+    elements = [element for groups in memberships for element in groups]
+    if not elements:
+        return weights, names
+
+    rows = np.repeat(np.arange(len(memberships), dtype=np.int64), counts)
+    cols = np.fromiter((element.group for element in elements), dtype=np.int64, count=len(elements))
+    values = np.fromiter((element.weight for element in elements), dtype=np.float32, count=len(elements))
+    valid = cols < len(names)
+    weights[rows[valid], cols[valid]] = values[valid]
+
+    return weights, names
+
+
+def write_weights(obj, weights: np.ndarray, names: list, min_weight: float = 0.0):
+    """Replace all vertex groups of obj with the columns of a (V, G) weight matrix"""
+    obj.vertex_groups.clear()
+
+    for col, name in enumerate(names):
+        vgroup = obj.vertex_groups.new(name=name)
+        column = weights[:, col]
+        indices = np.flatnonzero(column > min_weight)
+        if not len(indices):
+            continue
+
+        # One add() call per distinct weight value instead of one per vertex
+        values, inverse = np.unique(column[indices], return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        splits = np.cumsum(np.bincount(inverse))[:-1]
+        for value, members in zip(values, np.split(indices[order], splits)):
+            vgroup.add(members.tolist(), float(value), 'REPLACE')
+
+
+def align_weights(weights: np.ndarray, names: list, target_names: list) -> np.ndarray:
+    """Reorder weight columns to target_names, filling missing groups with zeros"""
+    lookup = {name: col for col, name in enumerate(names)}
+    aligned = np.zeros((weights.shape[0], len(target_names)), dtype=np.float32)
+    for col, name in enumerate(target_names):
+        if name in lookup:
+            aligned[:, col] = weights[:, lookup[name]]
+    return aligned
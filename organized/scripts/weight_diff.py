@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Weight Diff Regression Tool
+===========================
+
+Compares the skin weights of two transfer outputs (a known-good reference and
+a new result) so engine or config changes can be checked without opening
+Unity.
+
+Inputs are output FBX files (needs Blender) or weight array dumps (.npz,
+plain Python), or two directories of them compared file by file. Meshes are
+matched by name, bones by name, and vertices by index when the geometry is
+unchanged. Otherwise vertices are paired one-to-one with their nearest
+counterpart within the position tolerance, so duplicated seam vertices pair
+up with each other.
+
+Per mesh the report gives:
+- max and mean per-vertex weight delta
+- fraction of vertices changed by more than the tolerance
+- per-bone total and max delta
+- worst regions: changed vertices per dominant reference bone
+
+Exits with 1 when any mesh changed beyond the tolerance, or meshes or
+vertices could not be matched.
+
+Usage:
+    blender --background --python weight_diff.py -- reference.fbx result.fbx [options]
+    blender --background --python weight_diff.py -- avatar.fbx --dump avatar.npz
+    python weight_diff.py reference_dir/ result_dir/ [--tolerance 0.01] [--report diff.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Blender does not add the script directory to sys.path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from weight_arrays import align_weights
+
+WEIGHT_FILE_TYPES = ('.fbx', '.npz')
+
+
+def read_fbx_arrays(path: str) -> dict:
+    """{mesh name: {'coords', 'weights', 'names'}} of every mesh in an FBX (Blender only)"""
+    import bpy
+
+    from weight_arrays import read_coordinates, read_weights
+
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    bpy.ops.import_scene.fbx(filepath=path)
+
+    meshes = {}
+    for obj in bpy.data.objects:
+        if obj.type != 'MESH':
+            continue
+        weights, names = read_weights(obj)
+        meshes[obj.name] = {'coords': read_coordinates(obj, world=True), 'weights': weights, 'names': names}
+    return meshes
+
+
+def save_arrays(meshes: dict, path: str):
+    """Store mesh weight arrays as one .npz file"""
+    arrays = {}
+    for name, mesh in meshes.items():
+        arrays[f"{name}/coords"] = mesh['coords']
+        arrays[f"{name}/weights"] = mesh['weights']
+        arrays[f"{name}/names"] = np.array(mesh['names'], dtype=str)
+    np.savez_compressed(path, **arrays)
+
+
+def load_arrays(path: str) -> dict:
+    """Mesh weight arrays from an FBX or a .npz dump"""
+    if path.lower().endswith('.fbx'):
+        return read_fbx_arrays(path)
+
+    meshes = {}
+    with np.load(path) as data:
+        for key in data.files:
+            name, field = key.rsplit('/', 1)
+            value = data[key]
+            meshes.setdefault(name, {})[field] = value.tolist() if field == 'names' else value
+    return meshes
+
+
+def close_pairs(reference: np.ndarray, result: np.ndarray, distance: float) -> tuple:
+    """(reference index, result index, distance) arrays of all pairs within distance"""
+    empty = np.zeros(0, dtype=np.int64)
+    if not len(reference) or not len(result):
+        return empty, empty, np.zeros(0, dtype=np.float64)
+
+    # Cells of the tolerance: close pairs share a cell or are neighbours
+    origin = np.minimum(reference.min(axis=0), result.min(axis=0))
+    reference_cells = np.floor((reference - origin) / distance).astype(np.int64) + 1
+    result_cells = np.floor((result - origin) / distance).astype(np.int64) + 1
+    extent = np.maximum(reference_cells.max(axis=0), result_cells.max(axis=0)) + 2
+    reference_keys = (reference_cells[:, 0] * extent[1] + reference_cells[:, 1]) * extent[2] + reference_cells[:, 2]
+    result_keys = (result_cells[:, 0] * extent[1] + result_cells[:, 1]) * extent[2] + result_cells[:, 2]
+    order = np.argsort(result_keys, kind='stable')
+    sorted_keys = result_keys[order]
+
+    firsts, seconds, distances = [], [], []
+    for dx, dy, dz in np.ndindex(3, 3, 3):
+        neighbour = reference_keys + ((dx - 1) * extent[1] + (dy - 1)) * extent[2] + (dz - 1)
+        low = np.searchsorted(sorted_keys, neighbour, 'left')
+        counts = np.searchsorted(sorted_keys, neighbour, 'right') - low
+        if not counts.any():
+            continue
+        first = np.repeat(np.arange(len(reference)), counts)
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        second = order[np.repeat(low, counts) + within]
+        pair_distance = np.linalg.norm(reference[first] - result[second], axis=1)
+        close = pair_distance <= distance
+        firsts.append(first[close])
+        seconds.append(second[close])
+        distances.append(pair_distance[close])
+
+    if not firsts:
+        return empty, empty, np.zeros(0, dtype=np.float64)
+    return np.concatenate(firsts), np.concatenate(seconds), np.concatenate(distances)
+
+
+def closest_per(owner: np.ndarray, other: np.ndarray, distance: np.ndarray) -> np.ndarray:
+    """Index of each owner's closest pair (ties go to the lowest other index)"""
+    order = np.lexsort((other, distance, owner))
+    first_of_owner = np.r_[True, owner[order][1:] != owner[order][:-1]]
+    return order[first_of_owner]
+
+
+def match_vertices(reference: np.ndarray, result: np.ndarray, position_tolerance: float) -> tuple:
+    """Index pairs (reference, result) of vertices at the same position, matched one-to-one"""
+    if len(reference) == len(result) and \
+            (not len(reference) or np.abs(reference - result).max() <= position_tolerance):
+        indices = np.arange(len(reference))
+        return indices, indices
+
+    first, second, distance = close_pairs(reference, result, position_tolerance)
+
+    # Pair vertices that are each other's closest, drop them and repeat, so
+    # duplicated vertices at one position pair up one by one
+    reference_index, result_index = [], []
+    while len(first):
+        mutual = np.intersect1d(closest_per(first, second, distance), closest_per(second, first, distance))
+        reference_index.append(first[mutual])
+        result_index.append(second[mutual])
+        keep = ~np.isin(first, first[mutual]) & ~np.isin(second, second[mutual])
+        first, second, distance = first[keep], second[keep], distance[keep]
+
+    if not reference_index:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    reference_index = np.concatenate(reference_index)
+    result_index = np.concatenate(result_index)
+    order = np.argsort(reference_index)
+    return reference_index[order], result_index[order]
+
+
+def compare_mesh(reference: dict, result: dict, tolerance: float, position_tolerance: float,
+                 worst: int) -> dict:
+    """Weight deltas of one mesh, vectorized over all matched vertices and bones"""
+    reference_index, result_index = match_vertices(reference['coords'], result['coords'], position_tolerance)
+    names = list(dict.fromkeys(list(reference['names']) + list(result['names'])))
+    a = align_weights(reference['weights'], reference['names'], names)[reference_index]
+    b = align_weights(result['weights'], result['names'], names)[result_index]
+
+    delta = np.abs(a - b)
+    vertex_delta = delta.max(axis=1) if delta.size else np.zeros(len(a), dtype=np.float32)
+    changed = vertex_delta > tolerance
+
+    bone_total = delta.sum(axis=0)
+    bone_max = delta.max(axis=0) if len(delta) else np.zeros(len(names), dtype=np.float32)
+    bones = {names[col]: {'total': round(float(bone_total[col]), 6), 'max': round(float(bone_max[col]), 6)}
+             for col in np.argsort(-bone_total)[:worst] if bone_total[col] > 0}
+
+    regions = {}
+    if changed.any() and len(names):
+        dominant = a.argmax(axis=1)[changed]
+        counts = np.bincount(dominant, minlength=len(names))
+        regions = {names[col]: int(counts[col]) for col in np.argsort(-counts)[:worst] if counts[col]}
+
+    matched = len(reference_index)
+    return {
+        'vertices': int(len(reference['coords'])),
+        'matched': int(matched),
+        'unmatched': int(max(len(reference['coords']), len(result['coords'])) - matched),
+        'max_error': round(float(vertex_delta.max(initial=0.0)), 6),
+        'mean_error': round(float(vertex_delta.mean()) if matched else 0.0, 6),
+        'changed_fraction': round(float(changed.mean()) if matched else 0.0, 6),
+        'bones': bones,
+        'worst_regions': regions,
+    }
+
+
+def compare_files(reference_path: str, result_path: str, tolerance: float,
+                  position_tolerance: float, worst: int) -> dict:
+    """Compare every mesh of two weight files"""
+    reference = load_arrays(reference_path)
+    result = load_arrays(result_path)
+    return {
+        'reference': reference_path,
+        'result': result_path,
+        'missing_meshes': sorted(set(reference) - set(result)),
+        'extra_meshes': sorted(set(result) - set(reference)),
+        'meshes': {name: compare_mesh(reference[name], result[name], tolerance, position_tolerance, worst)
+                   for name in sorted(set(reference) & set(result))},
+    }
+
+
+def file_pairs(reference: str, result: str) -> list:
+    """(reference, result) file pairs; directories are paired by file name"""
+    if not os.path.isdir(reference):
+        return [(reference, result)]
+    pairs = []
+    for name in sorted(os.listdir(reference)):
+        if name.lower().endswith(WEIGHT_FILE_TYPES):
+            pairs.append((os.path.join(reference, name), os.path.join(result, name)))
+    return pairs
+
+
+def file_failures(report: dict, max_changed_fraction: float) -> list:
+    """Reasons a file comparison fails the regression check"""
+    failures = [f"missing mesh {name}" for name in report['missing_meshes']]
+    for name, mesh in report['meshes'].items():
+        if mesh['unmatched']:
+            failures.append(f"{name}: {mesh['unmatched']} unmatched vertices")
+        if mesh['changed_fraction'] > max_changed_fraction:
+            failures.append(f"{name}: {mesh['changed_fraction']:.2%} vertices changed "
+                            f"(max error {mesh['max_error']})")
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare skin weights of two transfer outputs")
+    parser.add_argument('reference', help="known-good .fbx/.npz, or a directory of them")
+    parser.add_argument('result', nargs='?', help="new .fbx/.npz, or a directory with the same file names")
+    parser.add_argument('--tolerance', type=float, default=0.01,
+                        help="weight delta above which a vertex counts as changed")
+    parser.add_argument('--max-changed-fraction', type=float, default=0.0,
+                        help="fraction of changed vertices allowed per mesh")
+    parser.add_argument('--position-tolerance', type=float, default=1e-4,
+                        help="distance within which vertices are matched (scene units)")
+    parser.add_argument('--worst', type=int, default=10, help="bones and regions listed per mesh")
+    parser.add_argument('--report', help="write the full report as JSON")
+    parser.add_argument('--dump', help="save the reference's weight arrays as .npz and exit")
+    argv = argv if argv is not None else (sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else sys.argv[1:])
+    args = parser.parse_args(argv)
+
+    if args.dump:
+        save_arrays(load_arrays(args.reference), args.dump)
+        print(f"Weight arrays written: {args.dump}")
+        return 0
+    if not args.result:
+        parser.error("result is required unless --dump is given")
+
+    reports = []
+    failed = 0
+    for reference_path, result_path in file_pairs(args.reference, args.result):
+        if not os.path.exists(result_path):
+            reports.append({'reference': reference_path, 'result': result_path, 'failures': ["result missing"]})
+            failed += 1
+            print(f"✗ {reference_path}: result missing")
+            continue
+
+        report = compare_files(reference_path, result_path, args.tolerance,
+                               args.position_tolerance, args.worst)
+        report['failures'] = file_failures(report, args.max_changed_fraction)
+        reports.append(report)
+
+        failed += bool(report['failures'])
+        mark = '✗' if report['failures'] else '✓'
+        print(f"{mark} {reference_path}")
+        for name, mesh in report['meshes'].items():
+            print(f"  {name}: max {mesh['max_error']:.4f}, mean {mesh['mean_error']:.5f}, "
+                  f"changed {mesh['changed_fraction']:.2%}")
+            for bone, count in mesh['worst_regions'].items():
+                print(f"    region {bone}: {count} changed vertices")
+        for failure in report['failures']:
+            print(f"  ✗ {failure}")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'tolerance': args.tolerance, 'files': reports}, f, indent=2, ensure_ascii=False)
+
+    print(f"{len(reports) - failed}/{len(reports)} files within tolerance")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())